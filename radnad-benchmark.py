@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for `radnad.py`.
+
+Usage:
+    radnad-benchmark.py spawn                  # process spawn latency: `echo | radclient` shell vs. exec with stdin
+    radnad-benchmark.py spawn -n 1000
+    radnad-benchmark.py spawn --program cat    # any program reading stdin stands in for radclient
+    radnad-benchmark.py imports                # `import radnad` time in a new interpreter, exit status 1 if over the budget
+    radnad-benchmark.py imports --budget 100
+    radnad-benchmark.py parse                  # RADIUSResponse parsing of recorded `radclient -x` transcripts
+    radnad-benchmark.py generate               # generate_mac() and generate_ip_address()
+    radnad-benchmark.py sessions --sizes 1000,100000,1000000   # session insert, lookup and expiry scan
+    radnad-benchmark.py sessions --store columnar              # with the NumPy columnar session table
+    radnad-benchmark.py startup --sizes 1000,200000            # RADNAD startup with a CSV, binary and read-only binary sessions file
+    radnad-benchmark.py e2e --transport udp    # auth + acct sessions with radnad-server.py on localhost
+    radnad-benchmark.py all --save baseline.json
+    radnad-benchmark.py all --baseline baseline.json           # exit status 1 if any benchmark is slower
+    radnad-benchmark.py compare baseline.json current.json
+
+"""
+__author__ = "Thomas Howard"
+__email__ = "thomas@cisco.com"
+__license__ = "MIT - https://mit-license.org/"
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import pandas as pd
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from radnad import RADNAD, RADIUSResponse, SessionExpiry, SessionStore, SessionTable
+
+# 📄 Recorded `radclient -x` transcripts
+TRANSCRIPT_ACCEPT = """Sent Access-Request Id 192 from 0.0.0.0:fd98 to 10.1.1.1:1812 length 159
+\tService-Type = Call-Check
+\tNAS-Port-Type = Ethernet
+\tNAS-Port-Id = "GigabitEthernet1/23"
+\tNAS-Port = 50123
+\tUser-Name = "A9-20-82-FF-3D-C6"
+\tUser-Password = "A9-20-82-FF-3D-C6"
+\tCalling-Station-Id = "A9-20-82-FF-3D-C6"
+\tCalled-Station-Id = "21-73-BD-32-EC-0F"
+\tAcct-Session-Id = "53"
+\tNAS-Identifier = "RADNAD"
+\tCisco-AVPair = "audit-session-id=0A01010100000035"
+Received Access-Accept Id 192 from 10.1.1.1:714 to 10.16.51.114:64920 length 166
+\tUser-Name = "A9-20-82-FF-3D-C6"
+\tClass = 0x434143533a6336313238353162435430705452444f634c4e724933665a6263594f475079722f527463303237424756363451573550307a4d3a4953452f3438383037313031332f31303430
+\tSession-Timeout = 3600
+\tCisco-AVPair = "profile-name=Unknown"
+"""
+TRANSCRIPT_REJECT = """Sent Access-Request Id 107 from 0.0.0.0:d618 to 10.1.1.1:1812 length 58
+\tUser-Name = "bjones"
+\tUser-Password = "C1sco12345"
+\tService-Type = Framed
+\tNAS-Port-Type = Ethernet
+\tCleartext-Password = "C1sco12345"
+Received Access-Reject Id 107 from 10.1.1.1:714 to 10.16.92.65:54808 length 20
+"""
+TRANSCRIPT_ACCOUNTING = """Sent Accounting-Request Id 56 from 0.0.0.0:e41c to 10.1.1.1:1813 length 188
+\tAcct-Status-Type = Start
+\tService-Type = Call-Check
+\tNAS-Port-Type = Ethernet
+\tNAS-Port-Id = "GigabitEthernet1/23"
+\tNAS-Port = 50123
+\tUser-Name = "A9-20-82-FF-3D-C6"
+\tCalling-Station-Id = "A9-20-82-FF-3D-C6"
+\tCalled-Station-Id = "21-73-BD-32-EC-0F"
+\tFramed-IP-Address = 84.187.5.121
+\tAcct-Session-Id = "53"
+\tNAS-Identifier = "RADNAD"
+\tClass = 0x434143533a6336313238353162435430705452444f634c4e724933665a6263594f475079722f527463303237424756363451573550307a4d3a4953452f3438383037313031332f31303430
+Received Accounting-Response Id 56 from 10.1.1.1:1813 to 10.16.51.114:58396 length 20
+"""
+
+BENCHMARK_PORTS = (18120, 18130) # radnad-server.py authentication and accounting ports for `e2e`
+BENCHMARK_SECRET = 'radnad-benchmark'
+IMPORT_BUDGET = 150 # milliseconds to `import radnad` for a one-shot command
+
+
+def summarize(name:str=None, samples:list=None) -> dict:
+    """
+    Returns a dictionary summarizing the latency samples, in milliseconds.
+    :param name (str) : the benchmark name
+    :param samples ([float]) : the latency samples, in seconds
+    """
+    samples = sorted(samples)
+    return {
+        'name' : name,
+        'n' : len(samples),
+        'mean_ms' : statistics.fmean(samples) * 1000,
+        'p50_ms' : samples[int(len(samples) * 0.50)] * 1000,
+        'p99_ms' : samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000,
+        'ops_s' : len(samples) / sum(samples) if sum(samples) > 0 else 0,
+    }
+
+
+def show(results:list=None) -> None:
+    """
+    Print the benchmark results.
+    """
+    print(f"{'Benchmark':<32} {'n':>8} {'mean ms':>10} {'p50 ms':>10} {'p99 ms':>10} {'ops/s':>12}")
+    for result in results:
+        print(f"{result['name']:<32} {result['n']:>8} {result['mean_ms']:>10.3f} {result['p50_ms']:>10.3f} {result['p99_ms']:>10.3f} {result.get('ops_s', 0):>12.1f}")
+
+
+def save(filename:str=None, results:list=None, args:argparse.Namespace=None) -> None:
+    """
+    Save the benchmark results with the environment as a JSON baseline.
+    """
+    baseline = {
+        'timestamp' : datetime.datetime.now(tz=None).isoformat(sep=' ', timespec='seconds'),
+        'python' : platform.python_version(),
+        'platform' : platform.platform(),
+        'args' : vars(args),
+        'results' : results,
+    }
+    with open(filename, 'w') as file:
+        json.dump(baseline, file, indent=2)
+    print(f"{RADNAD.ICONS['INFO']} Saved {len(results)} results to {filename}", file=sys.stderr)
+
+
+def load(filename:str=None) -> list:
+    """
+    Returns the benchmark results of a JSON baseline.
+    """
+    with open(filename) as file:
+        return json.load(file)['results']
+
+
+def compare(baseline:list=None, current:list=None, threshold:float=0.10) -> int:
+    """
+    Print the change of the mean latency of each benchmark in both results and return the number slower than the threshold.
+    :param baseline ([dict]) : the baseline results
+    :param current ([dict]) : the current results
+    :param threshold (float) : the relative increase of the mean latency that is a regression. Default: 0.10 (10%)
+    """
+    baseline = {result['name']:result for result in baseline}
+    regressions = 0
+    print(f"{'Benchmark':<32} {'base ms':>10} {'mean ms':>10} {'change':>8}")
+    for result in current:
+        if result['name'] not in baseline: continue
+        base = baseline[result['name']]['mean_ms']
+        change = (result['mean_ms'] - base) / base if base > 0 else 0
+        slower = change > threshold
+        regressions += 1 if slower else 0
+        print(f"{result['name']:<32} {base:>10.3f} {result['mean_ms']:>10.3f} {change:>+8.1%} {RADNAD.ICONS['FAIL'] if slower else ''}")
+    return regressions
+
+
+def timed(name:str=None, n:int=1000, function:callable=None, *args) -> dict:
+    """
+    Returns the summary of n calls of the function with the arguments.
+    """
+    samples = []
+    for i in range(n):
+        start = time.perf_counter()
+        function(*args)
+        samples.append(time.perf_counter() - start)
+    return summarize(name, samples)
+
+
+async def spawn_shell(program:str=None, text:str=None) -> None:
+    """
+    The original `radclient` invocation: `/bin/sh` runs `echo` piped into the program.
+    """
+    process = await asyncio.create_subprocess_shell(f"""echo "{text}" | {program}""", stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+    await process.communicate()
+
+
+async def spawn_exec(program:str=None, text:str=None) -> None:
+    """
+    The current `radclient` invocation: exec the program and write the attributes to its stdin.
+    """
+    process = await asyncio.create_subprocess_exec(program, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+    await process.communicate(text.encode())
+
+
+async def benchmark_spawn(n:int=200, program:str='cat') -> list:
+    """
+    Measure the latency to spawn, feed and reap the program with a shell pipeline and with exec.
+    :param n (int) : the number of spawns for each method
+    :param program (str) : the program to spawn, reading the attributes from stdin
+    """
+    attrs = {
+        'Service-Type': 'Call-Check',
+        'NAS-Port-Type': 'Ethernet',
+        'User-Name': RADNAD.generate_mac(),
+        'Calling-Station-Id': RADNAD.generate_mac(),
+        'Acct-Session-Id': 1,
+    }
+    results = []
+    for name,spawn,text in [
+        ('spawn.shell', spawn_shell, RADNAD.to_avp_string(attrs)),
+        ('spawn.exec', spawn_exec, RADNAD.to_radclient_input(attrs)),
+    ]:
+        samples = []
+        for i in range(n):
+            start = time.perf_counter()
+            await spawn(program, text)
+            samples.append(time.perf_counter() - start)
+        results.append(summarize(name, samples))
+    return results
+
+
+def transcript_many(n:int=64) -> str:
+    """
+    Returns a `radclient -x -p` transcript of n accounting requests with the replies in reverse order.
+    """
+    sent = [TRANSCRIPT_ACCOUNTING.split('Received')[0].replace('Id 56', f"Id {id}").replace('"53"', f'"{id + 1}"') for id in range(n)]
+    received = ['Received' + TRANSCRIPT_ACCOUNTING.split('Received')[1].replace('Id 56', f"Id {id}") for id in reversed(range(n))]
+    return ''.join(sent + received)
+
+
+def benchmark_parse(n:int=10000) -> list:
+    """
+    Measure the parsing of recorded `radclient -x` transcripts by RADIUSResponse.
+    :param n (int) : the number of transcripts of each type to parse
+    """
+    many = transcript_many(64)
+    return [
+        timed('parse.accept', n, RADIUSResponse, TRANSCRIPT_ACCEPT),
+        timed('parse.reject', n, RADIUSResponse, TRANSCRIPT_REJECT),
+        timed('parse.accounting', n, RADIUSResponse, TRANSCRIPT_ACCOUNTING),
+        timed('parse.many64', max(1, n // 64), RADIUSResponse.parse_many, many),
+    ]
+
+
+def benchmark_generate(n:int=100000) -> list:
+    """
+    Measure the generation of random endpoint MAC and IP addresses.
+    :param n (int) : the number of addresses of each type to generate
+    """
+    return [
+        timed('generate.mac', n, RADNAD.generate_mac),
+        timed('generate.ip_address', n, RADNAD.generate_ip_address),
+    ]
+
+
+def import_time(module:str='radnad') -> float:
+    """
+    Returns the time, in seconds, to import the module and its imports in a new interpreter, from `python -X importtime`.
+    """
+    with tempfile.TemporaryDirectory() as directory: # 💡 radnad.py logs to radnad.log in the working directory
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"], cwd=directory, env=env, capture_output=True, text=True, check=True)
+    for line in reversed(result.stderr.splitlines()): # import time: self [us] | cumulative | imported package
+        fields = line.split('|')
+        if len(fields) == 3 and fields[2].strip() == module: return int(fields[1]) / 1_000_000
+    raise ValueError(f"Invalid module: {module} was not imported")
+
+
+def benchmark_imports(n:int=10) -> list:
+    """
+    Measure the time to `import radnad` in a new interpreter: the start-up cost of every one-shot command.
+    pandas is measured for reference; radnad.py imports it only for the commands that need it.
+    :param n (int) : the number of interpreters for each module
+    """
+    return [
+        summarize('imports.radnad', [import_time('radnad') for i in range(n)]),
+        summarize('imports.pandas', [import_time('pandas') for i in range(n)]),
+    ]
+
+
+def fill_sessions(radnad:RADNAD=None, size:int=1000) -> None:
+    """
+    Replace the RADNAD's sessions with size active MAB sessions that have not expired.
+    """
+    now = pd.Timestamp.now()
+    macs = [RADNAD.generate_mac(index=n) for n in range(size)]
+    sessions = pd.DataFrame({
+        'Timestamp' : pd.date_range(end=now, periods=size, freq='ms'),
+        'Method' : 'MAB',
+        'Status' : RADNAD.ACCT_START,
+        'User-Name' : macs,
+        'Calling-Station-Id' : macs,
+        'Framed-IP-Address' : '10.1.1.1',
+        'Session-Timeout' : 86400,
+        'Acct-Session-Id' : range(1, size + 1),
+        'Called-Station-Id' : '21-73-BD-32-EC-0F',
+        'NAS-Port-Type' : 'Ethernet',
+        'NAS-Port-Id' : 'GigabitEthernet1/23',
+        'NAS-Port' : 50123,
+        'NAS-Identifier' : RADNAD.NAS_IDENTIFIER_DEFAULT,
+        'NAS-IP-Address' : '',
+        'Server' : '10.1.1.1',
+        'Class' : '',
+        'Other' : '',
+    }, columns=RADNAD.SESSION_COLUMNS).set_index(RADNAD.SESSION_COLUMNS[0])
+    radnad.sessions = SessionTable() if radnad.store == RADNAD.STORE_COLUMNAR else SessionStore()
+    radnad.sessions.load_dataframe(sessions)
+    radnad.counter = size
+    radnad.expiry = SessionExpiry()
+    radnad.schedule_sessions()
+
+
+async def benchmark_sessions(n:int=5, sizes:list=None, store:str=RADNAD.STORE_DEFAULT) -> list:
+    """
+    Measure the session store insert (`create_session()`), lookup (`get_session_value()`) and
+    expiry scan (`stop_expired_sessions()` with no expired sessions) with each number of sessions,
+    and show the store's memory per session.
+    :param n (int) : the number of operations of each type
+    :param sizes ([int]) : the numbers of sessions
+    :param store (str) : the session store, one of `RADNAD.STORES`
+    """
+    results = []
+    prefix = 'sessions' if store == RADNAD.STORE_DEFAULT else f"sessions.{store}"
+    with tempfile.TemporaryDirectory() as directory:
+        radnad = RADNAD(server='127.0.0.1', secret=BENCHMARK_SECRET, sessions_file=os.path.join(directory, 'sessions.csv'), store=store)
+        for size in sizes:
+            fill_sessions(radnad, size)
+            print(f"{prefix}.{size}: {radnad.sessions.bytes_per_session():0.0f} bytes/session", file=sys.stderr)
+            samples = []
+            for i in range(n):
+                response = RADIUSResponse(TRANSCRIPT_ACCOUNTING.replace('"53"', f'"{size + i + 1}"'))
+                start = time.perf_counter()
+                await radnad.create_session(response)
+                samples.append(time.perf_counter() - start)
+            results.append(summarize(f"{prefix}.insert.{size}", samples))
+            results.append(timed(f"{prefix}.lookup.{size}", n, lambda: radnad.get_session_value(random.randint(1, size))))
+            samples = []
+            for i in range(n):
+                start = time.perf_counter()
+                await radnad.stop_expired_sessions()
+                samples.append(time.perf_counter() - start)
+            results.append(summarize(f"{prefix}.expire.{size}", samples))
+        fill_sessions(radnad, 0) # 💡 nothing to save
+        radnad.close() # 💡 saves the sessions before the directory is removed
+    return results
+
+
+def create_radnad(sessions_file:str=None, store:str=RADNAD.STORE_DEFAULT, snapshot:str=RADNAD.SNAPSHOT_DEFAULT, readonly:bool=False) -> None:
+    """
+    Create a RADNAD that loads the sessions file, without saving the sessions.
+    """
+    RADNAD(server='127.0.0.1', secret=BENCHMARK_SECRET, sessions_file=sessions_file, store=store, snapshot=snapshot, readonly=readonly)
+
+
+def benchmark_startup(n:int=3, sizes:list=None, store:str=RADNAD.STORE_DEFAULT) -> list:
+    """
+    Measure creating a RADNAD that loads each number of sessions from a CSV file, a binary snapshot,
+    and a memory-mapped binary snapshot for read-only commands like `sessions`.
+    :param n (int) : the number of RADNADs created for each sessions file
+    :param sizes ([int]) : the numbers of sessions
+    :param store (str) : the session store, one of `RADNAD.STORES`
+    """
+    results = []
+    prefix = 'startup' if store == RADNAD.STORE_DEFAULT else f"startup.{store}"
+    with tempfile.TemporaryDirectory() as directory:
+        sessions_file = os.path.join(directory, 'sessions.csv')
+        for size in sizes:
+            for snapshot in RADNAD.SNAPSHOTS:
+                radnad = RADNAD(server='127.0.0.1', secret=BENCHMARK_SECRET, sessions_file=sessions_file, store=store, snapshot=snapshot, readonly=True)
+                fill_sessions(radnad, size)
+                radnad.save_sessions()
+                del radnad
+            for snapshot,readonly,name in [(RADNAD.SNAPSHOT_CSV, False, 'csv'), (RADNAD.SNAPSHOT_BINARY, False, 'binary'), (RADNAD.SNAPSHOT_BINARY, True, 'binary.readonly')]:
+                results.append(timed(f"{prefix}.{name}.{size}", n, create_radnad, sessions_file, store, snapshot, readonly))
+    return results
+
+
+async def benchmark_e2e(n:int=1000, transport:str=RADNAD.TRANSPORT_UDP) -> list:
+    """
+    Measure sequential MAB sessions (authentication + accounting) with radnad-server.py on localhost.
+    :param n (int) : the number of sessions
+    :param transport (str) : the RADNAD transport
+    """
+    server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'radnad-server.py'), '--secret', BENCHMARK_SECRET,
+                               '--auth-port', str(BENCHMARK_PORTS[0]), '--acct-port', str(BENCHMARK_PORTS[1]), '--coa-port', '0'], stderr=subprocess.DEVNULL)
+    try:
+        await asyncio.sleep(1) # 💡 wait for the server to listen
+        with tempfile.TemporaryDirectory() as directory:
+            radnad = RADNAD(server='127.0.0.1', secret=BENCHMARK_SECRET, auth_port=BENCHMARK_PORTS[0], acct_port=BENCHMARK_PORTS[1], transport=transport,
+                            timeout=1, sessions_file=os.path.join(directory, 'sessions.csv'))
+            samples = []
+            for i in range(n):
+                start = time.perf_counter()
+                await radnad.mab_wired(RADNAD.generate_mac(index=i))
+                samples.append(time.perf_counter() - start)
+            fill_sessions(radnad, 0) # 💡 nothing to save
+            radnad.close() # 💡 saves the sessions before the directory is removed
+    finally:
+        server.terminate()
+        server.wait()
+    return [summarize(f"e2e.{transport}.session", samples)]
+
+
+async def radnad_benchmark():
+    """
+    Parse the command line arguments and run the benchmark.
+    """
+    BENCHMARKS = ['spawn', 'imports', 'parse', 'generate', 'sessions', 'startup', 'e2e', 'all', 'compare']
+    ITERATIONS = { # default iterations of each benchmark
+        'spawn' : 200,
+        'imports' : 10,
+        'parse' : 10000,
+        'generate' : 100000,
+        'sessions' : 5,
+        'startup' : 3,
+        'e2e' : 1000,
+    }
+
+    argp = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter) # keep my format
+    argp.add_argument('benchmark', choices=BENCHMARKS, help='benchmark')
+    argp.add_argument('files', nargs='*', help='baseline and current JSON results to compare', default=[])
+    argp.add_argument('-n','--number', default=None, type=int, help='iterations. Default: depends on the benchmark', required=False)
+    argp.add_argument('--program', default='cat', help='program to spawn for the spawn benchmark', required=False)
+    argp.add_argument('--sizes', default='1000,100000,1000000', help='comma-separated numbers of sessions for the sessions and startup benchmarks', required=False)
+    argp.add_argument('--store', choices=RADNAD.STORES, default=RADNAD.STORE_DEFAULT, help='session store for the sessions and startup benchmarks', required=False)
+    argp.add_argument('--transport', choices=RADNAD.TRANSPORTS, default=RADNAD.TRANSPORT_UDP, help='request transport for the e2e benchmark', required=False)
+    argp.add_argument('--seed', default=0, type=int, help='random seed for reproducible inputs', required=False)
+    argp.add_argument('--save', default=None, help='save the results to a JSON file', required=False)
+    argp.add_argument('--baseline', default=None, help='compare the results with a saved JSON baseline', required=False)
+    argp.add_argument('--budget', default=IMPORT_BUDGET, type=float, help=f'median milliseconds to import radnad. Default: {IMPORT_BUDGET}', required=False)
+    argp.add_argument('--threshold', default=0.10, type=float, help='mean latency increase that is a regression. Default: 0.10', required=False)
+    args = argp.parse_args()
+    random.seed(args.seed)
+
+    if args.benchmark == 'compare':
+        if len(args.files) != 2: sys.exit(f"{RADNAD.ICONS['ERROR']} compare requires the baseline and current JSON files")
+        return compare(load(args.files[0]), load(args.files[1]), args.threshold)
+
+    iterations = lambda benchmark: ITERATIONS[benchmark] if args.number is None else args.number
+    benchmarks = ['parse', 'generate', 'sessions', 'startup', 'e2e'] if args.benchmark == 'all' else [args.benchmark] # 💡 not imports: its budget is wall-clock time of this host
+    results = []
+    for benchmark in benchmarks:
+        if benchmark == 'spawn':
+            results += await benchmark_spawn(iterations(benchmark), args.program)
+        elif benchmark == 'imports':
+            results += benchmark_imports(iterations(benchmark))
+        elif benchmark == 'parse':
+            results += benchmark_parse(iterations(benchmark))
+        elif benchmark == 'generate':
+            results += benchmark_generate(iterations(benchmark))
+        elif benchmark == 'sessions':
+            results += await benchmark_sessions(iterations(benchmark), [int(size) for size in args.sizes.split(',')], args.store)
+        elif benchmark == 'startup':
+            results += benchmark_startup(iterations(benchmark), [int(size) for size in args.sizes.split(',')], args.store)
+        elif benchmark == 'e2e':
+            results += await benchmark_e2e(iterations(benchmark), args.transport)
+    show(results)
+    if args.benchmark == 'spawn':
+        print(f"exec speedup: {results[0]['mean_ms'] / results[1]['mean_ms']:0.2f}x")
+    over = [result for result in results if result['name'] == 'imports.radnad' and result['p50_ms'] > args.budget]
+    for result in over:
+        print(f"{RADNAD.ICONS['FAIL']} import radnad: {result['p50_ms']:0.1f} ms is over the {args.budget:0.0f} ms budget. See `python -X importtime -c 'import radnad'`")
+    if args.save: save(args.save, results, args)
+    if args.baseline: return compare(load(args.baseline), results, args.threshold) + len(over)
+    return len(over)
+
+
+if __name__ == '__main__':
+    """
+    Execute when the module is not initialized from an import statement.
+    """
+    sys.exit(1 if asyncio.run(radnad_benchmark()) else 0) # 0 is ok, 1 for regressions or over the import budget
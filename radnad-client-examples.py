@@ -61,6 +61,9 @@ async def main(): # async/await required to use RADNAD
     # Dump your session list
     radnad.show_sessions()
 
+    # Save your sessions for the next run
+    radnad.close()
+
 if __name__ == '__main__':
     """
     Execute when the module is not initialized from an import statement.
@@ -4,6 +4,11 @@ A Python client that periodically creates and disconnects RADIUS sessions using
 
 Usage:
     radnad-periodic.py
+    radnad-periodic.py --metrics 9812    # serve Prometheus metrics on http://127.0.0.1:9812/metrics
+    radnad-periodic.py --interim 600     # send an Accounting Interim-Update for each active session every 10 minutes
+    radnad-periodic.py --persistence sqlite  # save each session Start and Stop, not only at exit
+    radnad-periodic.py --persistence journal --snapshot binary  # journal each session Start and Stop into a binary sessions file
+    radnad-periodic.py --profile mem     # write the allocations of each phase to radnad-periodic.mem.txt when stopped
 
 Requires setting the these environment variables using the `export` command:
   export ISE_PSN='1.2.3.4'              # hostname or IP of an ISE PSN (policy service node)
@@ -17,6 +22,7 @@ __author__ = "Thomas Howard"
 __email__ = "thomas@cisco.com"
 __license__ = "MIT - https://mit-license.org/"
 
+import argparse
 import asyncio
 import datetime
 import logging
@@ -27,8 +33,6 @@ import signal
 import sys
 import time
 import traceback
-import tracemalloc
-tracemalloc.start()
 
 DT_ISO8601 = "%Y-%m-%d %H:%M:%S"        # Ex: 2005-08-15 15:52:01
 # logging.basicConfig(filename='radnad.log', format=LOG_FORMAT, datefmt=DT_ISO8601)
@@ -105,7 +109,7 @@ async def stop_expired_sessions(radnad:radnad.RADNAD=None, period:int=60.0):
     if len(responses) > 0:
         print(f"{iso_timestamp()} {radnad.ICONS['STOP']} stop_expired_sessions({period}s): {len(responses)} sessions", file=sys.stderr)
     while True:
-        await asyncio.sleep(period)  # suspend task
+        await radnad.expiry.wait(period)  # suspend task until the next expiry or the period
         # print(f"{iso_timestamp()} {radnad.ICONS['PLAY']} stop_expired_sessions() {radnad.ICONS['WAIT']} {period}s", file=sys.stderr)
         log.debug(f"{radnad.ICONS['PLAY']} stop_expired_sessions() {radnad.ICONS['WAIT']} {period}s")
         try:
@@ -114,7 +118,7 @@ async def stop_expired_sessions(radnad:radnad.RADNAD=None, period:int=60.0):
             if len(responses) > 0:
                 print(f"{iso_timestamp()} {radnad.ICONS['STOP']} stop_expired_sessions({period}s): {len(responses)} sessions", file=sys.stderr)
 
-        except TimeoutError as e:
+        except (TimeoutError, asyncio.TimeoutError) as e:
             log.error(f"No Reply. Timeout/Dropped:\n{e}")   # No content!
             print(f"{radnad.ICONS['WARN']} No Reply. Timeout/Dropped:\n{e}")   # No content!
         except Exception as e:
@@ -136,13 +140,28 @@ async def show_sessions(radnad:radnad.RADNAD=None, period:int=60.0):
         await asyncio.sleep(period)  # suspend task
         try:
             # radnad.show_sessions()
-            print(f"{iso_timestamp()} {radnad.ICONS['PLAY']} show_sessions({period}s) {radnad.get_session_count()} sessions", file=sys.stderr)
+            admission = radnad.admission.stats()
+            print(f"{iso_timestamp()} {radnad.ICONS['PLAY']} show_sessions({period}s) {radnad.get_session_count()} sessions | radclient {admission['active']}/{admission['limit']} queued {admission['depth']} rejected {admission['rejected']} max wait {admission['wait_max']:0.3f}s", file=sys.stderr)
         except Exception as e:
             tb_text = '\n'.join(traceback.format_exc().splitlines()[1:]) # remove 'Traceback (most recent call last):'
             print(f"{radnad.ICONS['FAIL']} {e.__class__} | {tb_text}", file=sys.stderr)
             log.critical(f"{radnad.ICONS['FAIL']} show_sessions() {e.__class__} | {tb_text}")
 
 
+async def profile_steady_state(profiler:radnad.Profiler=None, period:int=60.0, delay:int=60.0):
+    """
+    A periodic task that ends the steady state phase of the profiler, so the report has its latest snapshot.
+    :param profiler (Profiler) : the profiler
+    :param period (int) : the interval, in seconds, between the snapshots
+    :param delay (int) : the delay, in seconds, to wait before the first snapshot
+    """
+    await asyncio.sleep(delay)  # suspend task
+    while True:
+        profiler.phase('steady state')
+        log.debug(f"{radnad.RADNAD.ICONS['INFO']} profile_steady_state({period}s)")
+        await asyncio.sleep(period)  # suspend task
+
+
 async def random_auth(radnad:radnad.RADNAD=None, usernames:list=None, scenarios:list=None, min:int=1, max:int=3600, delay:int=0):
     """
     A randomly occuring task.
@@ -224,26 +243,13 @@ async def random_disconnect(radnad:radnad.RADNAD=None, n=1, min:int=30, max:int=
             print(f"{iso_timestamp()} {radnad.ICONS['PLAY']} random_disconnect({min}-{max}s): {radnad.ICONS['WAIT']} {sleep_time}s", file=sys.stderr)
             # log.debug(f"{radnad.ICONS['WAIT']} random_disconnect({min}-{max}s): {sleep_time}s")
             await asyncio.sleep(sleep_time)  # suspend task
-            sessions = radnad.get_sessions()
+            sessions = radnad.sessions.sample(n)
             if len(sessions) > 0:
-                sessions = sessions.sample(n)
-                # print(f"random_disconnect(): {sessions.loc[sessions.first_valid_index()].to_dict()}")
-                for idx,session in sessions.iterrows():
-                    # print(f"random_disconnect(): {type(session)} {session}")
-                    # The minimum attributes required by ISE for an Accounting Stop are:
-                    # - User-Name           # Does not like MAC for MAB
-                    # - Calling-Station-Id
-                    # - Acct-Status-Type    # Must be 'Stop'
-                    # - Acct-Session-Id     # May be anything but must include something
-                    attrs = {
-                        'Acct-Status-Type' : 'Stop',
-                        'Acct-Session-Id' : session['Acct-Session-Id'],
-                        'User-Name' : session['User-Name'],
-                        'Calling-Station-Id' : session['Calling-Station-Id'],
-                    }
-                    response = await radnad.acct_stop_by_attrs(attrs)
-                    print(f"{iso_timestamp()} {radnad.ICONS['STOP']} random_disconnect({min}-{max}s): {attrs.get('User-Name')} {attrs.get('Calling-Station-Id')} {attrs.get('Acct-Session-Id')}")
-
+                results = await radnad.stop_sessions(sessions)
+                for session in sessions:
+                    result = results[str(session['Acct-Session-Id'])]
+                    icon = radnad.ICONS['STOP'] if not isinstance(result, Exception) and result.is_accepted() else radnad.ICONS['FAIL']
+                    print(f"{iso_timestamp()} {icon} random_disconnect({min}-{max}s): {session['User-Name']} {session['Calling-Station-Id']} {session['Acct-Session-Id']}")
 
         except Exception as e:
             tb_text = '\n'.join(traceback.format_exc().splitlines()[1:]) # remove 'Traceback (most recent call last):'
@@ -251,11 +257,18 @@ async def random_disconnect(radnad:radnad.RADNAD=None, n=1, min:int=30, max:int=
             log.critical(f"{radnad.ICONS['FAIL']} random_disconnect() {e.__class__} | {tb_text}")
 
 
-async def radnad_periodic_tasks():
+async def radnad_periodic_tasks(args:argparse.Namespace=None, profiler:radnad.Profiler=None):
     """
     """
     env = {k:v for (k,v) in os.environ.items()} # Load environment variables
-    nad = radnad.RADNAD(server=env.get('ISE_PSN', None), secret=env.get('ISE_RADIUS_SECRET', None))
+    if profiler: profiler.phase('startup')
+    nad = radnad.RADNAD(server=env.get('ISE_PSN', None), secret=env.get('ISE_RADIUS_SECRET', None), coalesce_window=0.005, interim=args.interim, persistence=args.persistence, snapshot=args.snapshot) # send concurrent requests with one radclient
+    if profiler: profiler.phase('session load')
+    metrics = None
+    if args.metrics:
+        metrics = radnad.MetricsServer(nad, host=args.metrics_host, port=args.metrics)
+        await metrics.start()
+        print(f"{iso_timestamp()} {nad.ICONS['INFO']} metrics: http://{args.metrics_host}:{args.metrics}/metrics", file=sys.stderr)
 
     USERNAMES = ['hayley', 'brad', 'paul', 'arthur', 'ryan', 'anita', 'cathy', 'victoria', 'sarah', 'ruby', 'carol', 'alex', 'armando', 'sergio', 'wilfriend', 'anna', 'adriana', 'maria', 'nicolina', 'wan', 'dong', 'yan', 'wu', 'ali', 'yasmin', 'rahul', 'amar', 'neha', 'aang', 'tyrice', 'dace', 'karah', 'eilane', 'alex', 'jane', 'paula', 'michael', 'wndy', 'hr', 'finance', 'sales', 'marketing', 'it', 'security', 'engineering', 'design', 'manufacturing', 'ceo', 'cto', 'cio', 'ciso', 'cfo','thomas', 'charlie', 'joff', 'paul', 'scott', 'devi', 'jerome', 'pavan', 'srilatha', 'jacob', 'ben', 'taylor',]
     SCENARIOS = ['dot1x', 'dot1x-wired', 'wireless', 'dot1x-wireless', 'mab-wired', 'mab-wireless', 'vpn']
@@ -286,6 +299,8 @@ async def radnad_periodic_tasks():
             # periodic_task(period=180),
             # random_task(min=5, max=60, delay=0),
         ]
+        if nad.interim is not None: tasks.append(nad.interim.run()) # 💡 one task for the Interim-Updates of every session
+        if profiler: tasks.append(profile_steady_state(profiler))
 
         # all coroutines are automatically scheduled as a Task(s)
         awaitables = await asyncio.gather(*tasks, return_exceptions=False) # use * to unpack list items
@@ -294,13 +309,27 @@ async def radnad_periodic_tasks():
 
     except asyncio.CancelledError:
         pass    # do_cleanup()
+    finally:
+        if metrics: await metrics.close()
+        nad.close() # 💡 saves the sessions, so the shutdown phase includes the save
+        if profiler: profiler.phase('shutdown')
 
 
 if __name__ == '__main__' :
 
+    argp = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter) # keep my format
+    argp.add_argument('--metrics', default=0, type=int, help='serve Prometheus metrics on this port. Default: 0 (disabled)', required=False)
+    argp.add_argument('--metrics-host', default=radnad.MetricsServer.HOST_DEFAULT, help='local address for the metrics', required=False)
+    argp.add_argument('--persistence', choices=radnad.RADNAD.PERSISTENCES, default=radnad.RADNAD.PERSISTENCE_DEFAULT, help='how the sessions are saved', required=False)
+    argp.add_argument('--snapshot', choices=radnad.RADNAD.SNAPSHOTS, default=radnad.RADNAD.SNAPSHOT_DEFAULT, help='sessions file format', required=False)
+    argp.add_argument('--interim', default=0, type=int, help='Accounting Interim-Update interval, in seconds. Default: 0 (disabled)', required=False)
+    argp.add_argument('--profile', choices=radnad.Profiler.MODES, default=None, help='profile the run: cpu writes radnad-periodic.cpu.pstats and .cpu.txt, mem writes radnad-periodic.mem.txt by phase', required=False)
+    args = argp.parse_args()
+    profiler = radnad.Profiler(args.profile, 'radnad-periodic').start() if args.profile else None
+
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
-    main_task = asyncio.ensure_future( radnad_periodic_tasks() )
+    main_task = asyncio.ensure_future( radnad_periodic_tasks(args, profiler) )
 
     # Handle CTRL+C interrupts gracefully
     from signal import SIGINT, SIGTERM
@@ -314,3 +343,4 @@ if __name__ == '__main__' :
         # loop.run_until_complete(handler.finish_connections(shutdown_timeout))
         # loop.run_until_complete(app.cleanup())
         loop.close()
+        if profiler: print(f"{iso_timestamp()} {radnad.RADNAD.ICONS['INFO']} Profile: {', '.join(profiler.stop())}", file=sys.stderr)
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Self-checks of the `radnad.py` RADIUS wire protocol used by the `udp` transport, its admission control and its session journal.
+Needs no RADIUS server: packets are checked against the RFC 2865 example values
+and exchanged with a responder on 127.0.0.1 within this process.
+
+Usage:
+    radnad-selftest.py      # exit status 0 if all checks pass, 1 otherwise
+    radnad-selftest.py -v   # show every check
+
+"""
+__author__ = "Thomas Howard"
+__email__ = "thomas@cisco.com"
+__license__ = "MIT - https://mit-license.org/"
+
+import argparse
+import asyncio
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+import time
+from multidict import MultiDict
+from radnad import RADIUSPacket, RADIUSClientProtocol, RADIUSUDPClient, RADIUSResponse, AdmissionController, SessionJournal, SessionRecord, SessionStore
+
+# 📄 RFC2865 7.1: User nemo with password arctangent on NAS 192.168.1.16 port 3, secret xyzzy5461
+RFC2865_SECRET = b'xyzzy5461'
+RFC2865_REQUEST = bytes.fromhex(
+    '01000038' '0f403f9473978057bd83d5cb98f4227a'
+    '01066e656d6f'                                   # User-Name = "nemo"
+    '02120dbe708d93d413ce3196e43f782a0aee'           # User-Password = "arctangent" (hidden)
+    '0406c0a80110'                                   # NAS-IP-Address = 192.168.1.16
+    '050600000003'                                   # NAS-Port = 3
+)
+RFC2865_RESPONSE = bytes.fromhex(
+    '02000026' '86fe220e7624ba2a1005f6bf9b55e0b2'
+    '060600000001'                                   # Service-Type = Login-User
+    '0f0600000000'                                   # Login-Service = Telnet
+    '0e06c0a80103'                                   # Login-IP-Host = 192.168.1.3
+)
+SECRET = b'C1sco12345'
+
+failures = 0
+verbose = False
+
+
+def check(name:str=None, condition:bool=False) -> None:
+    """
+    Record the result of a check and print it when it fails or with verbose output.
+    """
+    global failures
+    if not condition: failures += 1
+    if verbose or not condition:
+        print(f"{'✔' if condition else '✖'} {name}", file=sys.stdout if condition else sys.stderr)
+
+
+def raises(exception:type=Exception, function:callable=None, *args) -> bool:
+    """
+    Returns True if the function raises the exception with the arguments.
+    """
+    try:
+        function(*args)
+    except exception:
+        return True
+    return False
+
+
+def flip(data:bytes=None, offset:int=0) -> bytes:
+    """
+    Returns the data with the bits of the octet at the offset inverted.
+    """
+    return data[:offset] + bytes([data[offset] ^ 0xff]) + data[offset+1:]
+
+
+def check_rfc2865_example() -> None:
+    """
+    Encode and decode the RFC 2865 Access-Request and Access-Accept example packets.
+    """
+    authenticator = RFC2865_REQUEST[4:20]
+    request = RADIUSPacket(RADIUSPacket.ACCESS_REQUEST, 0, authenticator,
+                           MultiDict([('User-Name', 'nemo'), ('User-Password', 'arctangent'), ('NAS-IP-Address', '192.168.1.16'), ('NAS-Port', '3')]))
+    check("RFC2865 Access-Request encoding with the hidden User-Password", request._pack(request.encode_attributes(RFC2865_SECRET)) == RFC2865_REQUEST)
+
+    decoded = RADIUSPacket.decode(RFC2865_REQUEST, RFC2865_SECRET)
+    check("RFC2865 Access-Request decoding", (decoded.code, decoded.id, decoded.length) == (1, 0, 56))
+    check("RFC2865 User-Password revealed", decoded.attributes.get('User-Password') == 'arctangent')
+    check("RFC2865 NAS-IP-Address and NAS-Port", (decoded.attributes.get('NAS-IP-Address'), decoded.attributes.get('NAS-Port')) == ('192.168.1.16', '3'))
+    check("RFC2865 Access-Request without Message-Authenticator verifies", RADIUSPacket.verify_request(RFC2865_REQUEST, RFC2865_SECRET))
+
+    response = RADIUSPacket(RADIUSPacket.ACCESS_ACCEPT, 0, attributes=MultiDict([('Service-Type', 'Login-User'), ('Attr-15', '0x00000000'), ('Attr-14', '0xc0a80103')]))
+    check("RFC2865 Access-Accept Response Authenticator", response.encode_response(RFC2865_SECRET, decoded) == RFC2865_RESPONSE)
+    check("RFC2865 Access-Accept verifies", RADIUSPacket.verify_response(RFC2865_RESPONSE, RFC2865_SECRET, authenticator))
+    check("RFC2865 Access-Accept with the wrong secret fails", not RADIUSPacket.verify_response(RFC2865_RESPONSE, b'wrong', authenticator))
+    check("RFC2865 Access-Accept with a modified attribute fails", not RADIUSPacket.verify_response(flip(RFC2865_RESPONSE, 25), RFC2865_SECRET, authenticator))
+
+
+def check_password_hiding() -> None:
+    """
+    Round trip User-Passwords of every chunk length through hiding and revealing.
+    """
+    authenticator = bytes(range(16))
+    for password in ['', 'a', 'x' * 15, 'y' * 16, 'z' * 17, 'C1sco12345!' * 5, 'p' * 128]:
+        hidden = RADIUSPacket.hide_password(password, SECRET, authenticator)
+        check(f"User-Password of {len(password)} octets is hidden in 16 octet chunks", len(hidden) % 16 == 0 and len(hidden) >= 16)
+        check(f"User-Password of {len(password)} octets round trip", RADIUSPacket.unhide_password(hidden, SECRET, authenticator) == password)
+    check("User-Password longer than 128 octets is rejected", raises(ValueError, RADIUSPacket.hide_password, 'p' * 129, SECRET, authenticator))
+
+
+def check_accounting_authenticator() -> None:
+    """
+    Check the Accounting-Request Request Authenticator and the Accounting-Response Response Authenticator.
+    """
+    request = RADIUSPacket(RADIUSPacket.ACCOUNTING_REQUEST, 7, attributes=MultiDict([('User-Name', 'thomas'), ('Acct-Status-Type', 'Start'), ('Acct-Session-Id', '42')]))
+    data = request.encode_request(SECRET)
+    # 📄 RFC2866: Request Authenticator = MD5(Code + Identifier + Length + 16 zero octets + request attributes + secret)
+    check("Accounting-Request Request Authenticator", data[4:20] == hashlib.md5(data[0:4] + bytes(16) + data[20:] + SECRET).digest())
+    check("Accounting-Request has no Message-Authenticator", 'Message-Authenticator' not in RADIUSPacket.decode(data).attributes)
+    check("Accounting-Request verifies", RADIUSPacket.verify_request(data, SECRET))
+    check("Accounting-Request with the wrong secret fails", not RADIUSPacket.verify_request(data, b'wrong'))
+    check("Accounting-Request with a modified attribute fails", not RADIUSPacket.verify_request(flip(data, len(data) - 1), SECRET))
+    check("Accounting-Request attributes round trip", dict(RADIUSPacket.decode(data).attributes) == {'User-Name': 'thomas', 'Acct-Status-Type': 'Start', 'Acct-Session-Id': '42'})
+
+    reply = RADIUSPacket(RADIUSPacket.ACCOUNTING_RESPONSE, 7).encode_response(SECRET, request)
+    check("Accounting-Response verifies", RADIUSPacket.verify_response(reply, SECRET, request.authenticator))
+    check("Accounting-Response for another request fails", not RADIUSPacket.verify_response(reply, SECRET, bytes(16)))
+
+
+def check_message_authenticator() -> None:
+    """
+    Check the Message-Authenticator of Access-Requests and their responses.
+    """
+    request = RADIUSPacket(RADIUSPacket.ACCESS_REQUEST, 9, attributes=MultiDict([('User-Name', 'thomas'), ('User-Password', 'C1sco12345'), ('Service-Type', 'Framed-User')]))
+    data = request.encode_request(SECRET)
+    decoded = RADIUSPacket.decode(data, SECRET)
+    offset = len(data) - 18 # 💡 encode_request() appends the Message-Authenticator
+    check("Access-Request includes a Message-Authenticator", 'Message-Authenticator' in decoded.attributes and data[offset:offset+2] == bytes([80, 18]))
+    check("Access-Request Message-Authenticator verifies", RADIUSPacket.verify_request(data, SECRET))
+    check("Access-Request with a modified Message-Authenticator fails", not RADIUSPacket.verify_request(flip(data, offset + 2), SECRET))
+    check("Access-Request with a modified attribute fails", not RADIUSPacket.verify_request(flip(data, RADIUSPacket.HEADER_LENGTH + 2), SECRET))
+    check("Access-Request with the wrong secret fails", not RADIUSPacket.verify_request(data, b'wrong'))
+    check("Access-Request User-Password round trip", decoded.attributes.get('User-Password') == 'C1sco12345')
+    check("Two Access-Requests have different Request Authenticators", data[4:20] != RADIUSPacket(RADIUSPacket.ACCESS_REQUEST, 9).encode_request(SECRET)[4:20])
+
+    reply = RADIUSPacket(RADIUSPacket.ACCESS_ACCEPT, 9, attributes=MultiDict([('Session-Timeout', '3600'), ('Cisco-AVPair', 'profile-name=Unknown')])).encode_response(SECRET, decoded)
+    offset = len(reply) - 18
+    check("Access-Accept to a request with a Message-Authenticator includes one", reply[offset:offset+2] == bytes([80, 18]))
+    check("Access-Accept Message-Authenticator verifies", RADIUSPacket.verify_response(reply, SECRET, request.authenticator))
+    check("Access-Accept with a modified Message-Authenticator fails", not RADIUSPacket.verify_response(flip(reply, offset + 2), SECRET, request.authenticator))
+    check("Access-Accept Cisco-AVPair round trip", RADIUSPacket.decode(reply).attributes.get('Cisco-AVPair') == 'profile-name=Unknown')
+
+
+def check_decode_errors() -> None:
+    """
+    Malformed packets raise ValueError.
+    """
+    check("Packet shorter than the header", raises(ValueError, RADIUSPacket.decode, RFC2865_REQUEST[:19]))
+    check("Length shorter than the header", raises(ValueError, RADIUSPacket.decode, RFC2865_REQUEST[:2] + struct.pack('!H', 19) + RFC2865_REQUEST[4:]))
+    check("Length longer than the data", raises(ValueError, RADIUSPacket.decode, RFC2865_REQUEST[:-1]))
+    check("Unknown code", raises(ValueError, RADIUSPacket.decode, bytes([99]) + RFC2865_REQUEST[1:]))
+    check("Attribute length shorter than 2", raises(ValueError, RADIUSPacket.decode, RFC2865_REQUEST[:21] + bytes([1]) + RFC2865_REQUEST[22:]))
+    check("Attribute beyond the packet length", raises(ValueError, RADIUSPacket.decode, RFC2865_REQUEST[:21] + bytes([250]) + RFC2865_REQUEST[22:]))
+    truncated = RFC2865_REQUEST[:2] + struct.pack('!H', 21) + RFC2865_REQUEST[4:21]
+    check("Truncated attribute header", raises(ValueError, RADIUSPacket.decode, truncated))
+    padded = RADIUSPacket.decode(RFC2865_REQUEST + bytes(8), RFC2865_SECRET)
+    check("Octets beyond the length are ignored", padded.data == RFC2865_REQUEST and padded.attributes.get('User-Password') == 'arctangent')
+
+
+async def check_id_exhaustion() -> None:
+    """
+    At most 256 requests are in flight per server and a released Id is reused.
+    """
+    protocol = RADIUSClientProtocol(SECRET)
+    address = ('127.0.0.1', 1812)
+    ids = []
+    for _ in range(RADIUSClientProtocol.IDS):
+        id = await protocol.acquire_id(address)
+        protocol.pending[(address, id)] = (None, None)
+        ids.append(id)
+    check("256 unique Ids in flight", len(set(ids)) == RADIUSClientProtocol.IDS)
+    waiter = asyncio.ensure_future(protocol.acquire_id(address))
+    await asyncio.sleep(0.01)
+    check("Request 257 waits for an Id", not waiter.done())
+    protocol.release_id(address, ids[100])
+    id = await asyncio.wait_for(waiter, 1)
+    check("Request 257 gets the released Id", id == ids[100])
+    check("Ids of another server are independent", await asyncio.wait_for(protocol.acquire_id(('127.0.0.2', 1812)), 1) in range(256))
+
+
+async def check_admission_cancel() -> None:
+    """
+    A waiting request cancelled while its slot is released raises CancelledError and leaks no slot.
+    """
+    controller = AdmissionController(limit=1)
+    await controller.acquire()
+    waiter = asyncio.ensure_future(controller.acquire())
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+    controller.release() # 💡 drops the cancelled future before the waiter handles its cancellation
+    try:
+        await waiter
+        cancelled = False
+    except asyncio.CancelledError:
+        cancelled = True
+    check("Admission wait cancelled during a release raises CancelledError", cancelled)
+    check("Admission slot of a cancelled wait is free", controller.active == 0 and controller.depth == 0)
+    await asyncio.wait_for(controller.acquire(), 1)
+    check("Admission after a cancelled wait", controller.active == 1)
+
+
+def check_session_journal() -> None:
+    """
+    Replay a journal after a torn write and a compaction in a thread.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'radnad.sessions.journal')
+        store = SessionStore()
+        journal = SessionJournal(filename, snapshot=lambda sessions=None: None, copy=store.copy)
+        journal.start(SessionRecord({'Acct-Session-Id': '1'}, time.time()))
+        journal.close(compact=False)
+        with open(filename, 'a') as file: file.write('{"op": "start", "sess') # 💡 a crash in the middle of a write
+        journal = SessionJournal(filename, snapshot=lambda sessions=None: None)
+        check("Journal torn last line is skipped", [event.acct_session_id for _op,event in journal.replay()] == ['1'])
+        journal.start(SessionRecord({'Acct-Session-Id': '2'}, time.time()))
+        journal.close(compact=False)
+        check("Journal event after a torn last line is replayed", [event.acct_session_id for _op,event in SessionJournal(filename).replay()] == ['1', '2'])
+        with open(filename, 'a') as file: file.write('{"op": "start", "sess\n{"op": "stop", "sid": "1"}\n')
+        check("Journal invalid line before the last one raises ValueError", raises(ValueError, list, SessionJournal(filename).replay()))
+        os.remove(filename)
+
+        snapshots = []
+        journal = SessionJournal(filename, snapshot=lambda sessions=None: snapshots.append(len(store) if sessions is None else len(sessions)), copy=store.copy)
+        journal.COMPACT_ENTRIES = 3
+        for sid in range(4):
+            journal.start(store.add({'Acct-Session-Id': str(sid)}, time.time()))
+            journal.flush()
+        journal.wait()
+        check("Journal compaction writes a copy of the sessions in a thread", snapshots == [3] and not os.path.exists(journal.previous))
+        check("Journal keeps the events after the compaction", [event.acct_session_id for _op,event in SessionJournal(filename).replay()] == ['3'])
+        journal.close()
+        check("Journal is empty after closing", snapshots == [3, 4] and os.path.getsize(filename) == 0)
+
+
+class Responder(asyncio.DatagramProtocol):
+    """
+    Accepts Access-Requests with the password `C1sco12345`, rejects other Access-Requests,
+    acknowledges Accounting-Requests and ignores requests with an invalid authenticator or a User-Name of `drop`.
+    """
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data:bytes=None, addr:tuple=None) -> None:
+        if not RADIUSPacket.verify_request(data, SECRET): return
+        request = RADIUSPacket.decode(data, SECRET)
+        if request.attributes.get('User-Name') == 'drop': return
+        if request.code == RADIUSPacket.ACCOUNTING_REQUEST:
+            code = RADIUSPacket.ACCOUNTING_RESPONSE
+        else:
+            code = RADIUSPacket.ACCESS_ACCEPT if request.attributes.get('User-Password') == 'C1sco12345' else RADIUSPacket.ACCESS_REJECT
+        self.transport.sendto(RADIUSPacket(code, request.id, attributes={'Session-Timeout': '3600'} if code == RADIUSPacket.ACCESS_ACCEPT else None).encode_response(SECRET, request), addr)
+
+
+async def check_udp_client() -> None:
+    """
+    Exchange requests with a responder on 127.0.0.1 using RADIUSUDPClient and parse the replies with RADIUSResponse.
+    """
+    transport,_responder = await asyncio.get_running_loop().create_datagram_endpoint(Responder, local_addr=('127.0.0.1', 0))
+    port = transport.get_extra_info('sockname')[1]
+    client = RADIUSUDPClient(SECRET.decode(), timeout=2, retries=2)
+    try:
+        attrs = {'User-Name': 'thomas', 'User-Password': 'C1sco12345', 'Service-Type': 'Framed-User', 'Acct-Session-Id': '1'}
+        response = RADIUSResponse(await client.request('127.0.0.1', port, 'auth', attrs))
+        check("UDP Access-Accept", response.rsp_type == RADIUSResponse.ACCESS_ACCEPT and response.srv_port == str(port))
+        check("UDP sent password is redacted", response.req_attrs.get('User-Password') == '*' * 10)
+        response = RADIUSResponse(await client.request('127.0.0.1', port, 'auth', dict(attrs, **{'User-Password': 'wrong'})))
+        check("UDP Access-Reject", response.rsp_type == RADIUSResponse.ACCESS_REJECT)
+        response = RADIUSResponse(await client.request('127.0.0.1', port, 'acct', {'User-Name': 'thomas', 'Acct-Status-Type': 'Start', 'Acct-Session-Id': '1'}))
+        check("UDP Accounting-Response", response.rsp_type == RADIUSResponse.ACCOUNTING_RESPONSE)
+        responses = await asyncio.gather(*[client.request('127.0.0.1', port, 'auth', dict(attrs, **{'Acct-Session-Id': str(n)})) for n in range(600)])
+        check("600 concurrent UDP requests over one socket", all(RADIUSResponse(r).rsp_type == RADIUSResponse.ACCESS_ACCEPT for r in responses))
+        quick = RADIUSUDPClient(SECRET.decode(), timeout=0.2, retries=1)
+        check("UDP timeout raises TimeoutError", raises(TimeoutError, RADIUSResponse, await quick.request('127.0.0.1', port, 'auth', dict(attrs, **{'User-Name': 'drop'}))))
+        quick.close()
+        wrong = RADIUSUDPClient('wrong', timeout=0.2, retries=0)
+        check("UDP reply with the wrong secret is discarded", raises(TimeoutError, RADIUSResponse, await wrong.request('127.0.0.1', port, 'acct', {'User-Name': 'thomas', 'Acct-Status-Type': 'Start'})))
+        wrong.close()
+        sources = RADIUSUDPClient(SECRET.decode(), timeout=2, retries=2, max_endpoints=2)
+        sent = [RADIUSResponse(await sources.request('127.0.0.1', port, 'acct', {'User-Name': 'thomas', 'Acct-Status-Type': 'Start'}, local)) for local in ['127.0.0.2', '127.0.0.3', '127.0.0.4', '127.0.0.2']]
+        check("UDP requests from multiple source addresses", all(r.rsp_type == RADIUSResponse.ACCOUNTING_RESPONSE for r in sent))
+        check("UDP idle source sockets are closed least recently used first", list(sources.endpoints) == ['127.0.0.4', '127.0.0.2'])
+        sources.close()
+    finally:
+        client.close()
+        transport.close()
+
+
+async def radnad_selftest() -> int:
+    """
+    Parse the command line arguments, run all checks and return the number of failures.
+    """
+    global verbose
+    argp = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter) # keep my format
+    argp.add_argument('-v','--verbose', action='store_true', default=False, help='show every check', required=False)
+    args = argp.parse_args()
+    verbose = args.verbose
+
+    check_rfc2865_example()
+    check_password_hiding()
+    check_accounting_authenticator()
+    check_message_authenticator()
+    check_decode_errors()
+    check_session_journal()
+    await check_id_exhaustion()
+    await check_admission_cancel()
+    await check_udp_client()
+    print(f"{'✖' if failures else '✔'} {failures} failed checks", file=sys.stderr if failures else sys.stdout)
+    return failures
+
+
+if __name__ == '__main__':
+    """
+    Execute when the module is not initialized from an import statement.
+    """
+    sys.exit(1 if asyncio.run(radnad_selftest()) else 0) # 0 is ok
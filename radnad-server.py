@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+A local stand-in RADIUS server for offline benchmarking and fault injection with `radnad.py`.
+Answers Access-Request, Accounting-Request, Status-Server, CoA-Request and Disconnect-Request
+with a configurable latency, reject ratio and drop ratio. Press Ctrl+C to stop and show the counters.
+
+Usage:
+    radnad-server.py                                     # 127.0.0.1 on ports 1812, 1813 and 1700
+    radnad-server.py --latency exponential --delay 20    # mean 20 ms
+    radnad-server.py --latency lognormal --delay 20 --jitter 10 --reject 0.05 --drop 0.01
+    radnad-server.py -a 127.0.0.2 --session-timeout 60 --class 'CACS:{n}'
+
+Uses the same secret as the client, from the `ISE_RADIUS_SECRET` environment variable or `--secret`:
+  export ISE_PSN='127.0.0.1'
+  export ISE_RADIUS_SECRET='C1sco12345'
+
+"""
+__author__ = "Thomas Howard"
+__email__ = "thomas@cisco.com"
+__license__ = "MIT - https://mit-license.org/"
+
+import argparse
+import asyncio
+import collections
+import math
+import os
+import random
+import signal
+import sys
+import tabulate
+from multidict import MultiDict
+from radnad import RADNAD, RADIUSPacket
+
+
+class RADIUSResponder(asyncio.DatagramProtocol):
+    """
+    Answers RADIUS requests on one UDP socket after a random latency.
+    Requests with an invalid authenticator are silently discarded, like a real server.
+    """
+
+    LATENCIES = ['none', 'constant', 'uniform', 'exponential', 'lognormal']
+    LATENCY_DEFAULT = 'none'
+
+    # Request code : (Response code, Rejected code)
+    RESPONSES = {
+        RADIUSPacket.ACCESS_REQUEST : (RADIUSPacket.ACCESS_ACCEPT, RADIUSPacket.ACCESS_REJECT),
+        RADIUSPacket.ACCOUNTING_REQUEST : (RADIUSPacket.ACCOUNTING_RESPONSE, None), # 📄 RFC2866: only Accounting-Response
+        RADIUSPacket.COA_REQUEST : (RADIUSPacket.COA_ACK, RADIUSPacket.COA_NAK),
+        RADIUSPacket.DISCONNECT_REQUEST : (RADIUSPacket.DISCONNECT_ACK, RADIUSPacket.DISCONNECT_NAK),
+    }
+
+    def __init__(self, secret:str=None, accounting:bool=False, latency:str=LATENCY_DEFAULT, delay:float=0, jitter:float=0,
+                 reject:float=0, drop:float=0, session_timeout:int=RADNAD.SESSION_TIMEOUT, class_value:str=None, counts:collections.Counter=None) -> None:
+        """
+        :param secret (str) : the RADIUS shared secret
+        :param accounting (bool) : answer Status-Server as an accounting server
+        :param latency (str) : the latency distribution, one of `LATENCIES`
+        :param delay (float) : the mean latency, in seconds
+        :param jitter (float) : the latency standard deviation (`lognormal`) or range (`uniform`), in seconds
+        :param reject (float) : the ratio (0-1) of Access-Request, CoA-Request and Disconnect-Request to reject (NAK)
+        :param drop (float) : the ratio (0-1) of requests to ignore
+        :param session_timeout (int) : the Access-Accept Session-Timeout, in seconds. 0 for none.
+        :param class_value (str) : the Access-Accept Class; `{n}` is replaced with a counter. None for none.
+        :param counts (Counter) : the counters of requests and responses, shared by the responders
+        """
+        if latency not in self.LATENCIES: raise ValueError(f"Invalid latency: {latency}")
+        if delay < 0 or jitter < 0: raise ValueError(f"Invalid delay {delay} or jitter {jitter}")
+        if reject < 0 or reject > 1: raise ValueError(f"Invalid reject ratio: {reject}")
+        if drop < 0 or drop > 1: raise ValueError(f"Invalid drop ratio: {drop}")
+        self.secret = secret.encode()
+        self.accounting = accounting
+        self.latency = latency
+        self.delay = delay
+        self.jitter = jitter
+        self.reject = reject
+        self.drop = drop
+        self.session_timeout = session_timeout
+        self.class_value = class_value
+        self.counts = collections.Counter() if counts is None else counts
+        self.transport = None
+
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+
+    def next_latency(self) -> float:
+        """
+        Returns the next response latency, in seconds, from the latency distribution.
+        """
+        if self.latency == 'constant': return self.delay
+        if self.latency == 'uniform': return max(0, random.uniform(self.delay - self.jitter, self.delay + self.jitter))
+        if self.latency == 'exponential': return random.expovariate(1 / self.delay) if self.delay > 0 else 0
+        if self.latency == 'lognormal' and self.delay > 0:
+            # 💡 the underlying normal distribution for the mean and standard deviation
+            sigma2 = math.log(1 + (self.jitter / self.delay) ** 2)
+            return random.lognormvariate(math.log(self.delay) - sigma2 / 2, math.sqrt(sigma2))
+        return 0
+
+
+    def respond(self, request:RADIUSPacket=None) -> RADIUSPacket:
+        """
+        Returns the response packet to the request.
+        """
+        if request.code == RADIUSPacket.STATUS_SERVER:
+            # 📄 RFC5997: Status-Server is answered with Access-Accept on the authentication port and Accounting-Response on the accounting port
+            code = RADIUSPacket.ACCOUNTING_RESPONSE if self.accounting else RADIUSPacket.ACCESS_ACCEPT
+            return RADIUSPacket(code, request.id)
+        accept,reject = self.RESPONSES[request.code]
+        attributes = MultiDict()
+        if reject and random.random() < self.reject:
+            code = reject
+            if request.code == RADIUSPacket.ACCESS_REQUEST: attributes['Reply-Message'] = 'radnad-server rejected'
+        else:
+            code = accept
+            if request.code == RADIUSPacket.ACCESS_REQUEST:
+                if request.attributes.get('User-Name'): attributes['User-Name'] = request.attributes.get('User-Name')
+                if self.session_timeout: attributes['Session-Timeout'] = self.session_timeout
+                if self.class_value: attributes['Class'] = self.class_value.replace('{n}', str(self.counts['Access-Accept'] + 1))
+        for proxy_state in request.attributes.getall('Proxy-State', []): # 📄 RFC2865: MUST be copied unmodified into the response
+            attributes.add('Proxy-State', proxy_state)
+        return RADIUSPacket(code, request.id, attributes=attributes)
+
+
+    def datagram_received(self, data:bytes=None, addr:tuple=None) -> None:
+        try:
+            if not RADIUSPacket.verify_request(data, self.secret):
+                self.counts['Invalid'] += 1
+                return
+            request = RADIUSPacket.decode(data, self.secret)
+            if request.code not in self.RESPONSES and request.code != RADIUSPacket.STATUS_SERVER:
+                self.counts['Invalid'] += 1
+                return
+        except ValueError:
+            self.counts['Invalid'] += 1
+            return
+        self.counts[RADIUSPacket.CODES[request.code]] += 1
+        if random.random() < self.drop:
+            self.counts['Dropped'] += 1
+            return
+        response = self.respond(request)
+        self.counts[RADIUSPacket.CODES[response.code]] += 1
+        data = response.encode_response(self.secret, request)
+        latency = self.next_latency()
+        if latency > 0:
+            asyncio.get_running_loop().call_later(latency, self.transport.sendto, data, addr) # 💡 a timer, not a task, per request
+        else:
+            self.transport.sendto(data, addr)
+
+
+def show(counts:collections.Counter=None) -> None:
+    """
+    Print the request and response counters.
+    """
+    print(tabulate.tabulate(sorted(counts.items()), headers=['Packet', 'Count'], tablefmt="simple"), file=sys.stderr)
+
+
+async def radnad_server():
+    """
+    Parse the command line arguments and answer RADIUS requests until interrupted.
+    """
+    argp = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter) # keep my format
+    argp.add_argument('-a','--address', default='127.0.0.1', help='listening address', required=False)
+    argp.add_argument('-s','--secret', default=os.environ.get('ISE_RADIUS_SECRET', None), help='RADIUS shared secret. Default: ISE_RADIUS_SECRET', required=False)
+    argp.add_argument('--auth-port', default=RADNAD.AUTH_PORT_DEFAULT, type=int, help='authentication port', required=False)
+    argp.add_argument('--acct-port', default=RADNAD.ACCT_PORT_DEFAULT, type=int, help='accounting port', required=False)
+    argp.add_argument('--coa-port', default=RADNAD.COA_PORT_DEFAULT, type=int, help='CoA and Disconnect port; 0 for none', required=False)
+    argp.add_argument('--latency', choices=RADIUSResponder.LATENCIES, default=RADIUSResponder.LATENCY_DEFAULT, help='latency distribution', required=False)
+    argp.add_argument('--delay', default=0, type=float, help='mean latency, in milliseconds', required=False)
+    argp.add_argument('--jitter', default=0, type=float, help='latency standard deviation (lognormal) or range (uniform), in milliseconds', required=False)
+    argp.add_argument('--reject', default=0, type=float, help='ratio (0-1) of authentications, CoAs and Disconnects to reject', required=False)
+    argp.add_argument('--drop', default=0, type=float, help='ratio (0-1) of requests to ignore', required=False)
+    argp.add_argument('--session-timeout', default=RADNAD.SESSION_TIMEOUT, type=int, help='Access-Accept Session-Timeout, in seconds; 0 for none', required=False)
+    argp.add_argument('--class', dest='class_value', default='CACS:radnad-server:{n}', help='Access-Accept Class; {n} is a counter', required=False)
+    argp.add_argument('--stats', default=0, type=float, help='show the counters every N seconds', required=False)
+    args = argp.parse_args()
+    if args.secret is None or args.secret == '': sys.exit(f"{RADNAD.ICONS['ERROR']} Must specify a secret with --secret or ISE_RADIUS_SECRET")
+
+    loop = asyncio.get_running_loop()
+    counts = collections.Counter()
+    transports = []
+    for port in [args.auth_port, args.acct_port, args.coa_port]:
+        if port == 0: continue
+        transport,_responder = await loop.create_datagram_endpoint(
+            lambda accounting=(port == args.acct_port): RADIUSResponder(args.secret, accounting, args.latency, args.delay / 1000, args.jitter / 1000, args.reject, args.drop, args.session_timeout, args.class_value, counts),
+            local_addr=(args.address, port))
+        transports.append(transport)
+    print(f"{RADNAD.ICONS['PLAY']} radnad-server on {args.address} ports {args.auth_port}, {args.acct_port}, {args.coa_port} | latency {args.latency} {args.delay}±{args.jitter} ms | reject {args.reject} | drop {args.drop}", file=sys.stderr)
+
+    stop = asyncio.Event()
+    for signum in [signal.SIGINT, signal.SIGTERM]:
+        loop.add_signal_handler(signum, stop.set)
+    try:
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), args.stats if args.stats > 0 else None)
+            except asyncio.TimeoutError:
+                show(counts)
+    finally:
+        for transport in transports: transport.close()
+        show(counts)
+
+
+if __name__ == '__main__':
+    """
+    Execute when the module is not initialized from an import statement.
+    """
+    asyncio.run(radnad_server())
+    sys.exit(0) # 0 is ok
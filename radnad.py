@@ -22,15 +22,26 @@ Usage:
     radnad.py dot1x-wireless -u employee -p C1sco12345 --called 11:22:33:44:55:66:corp
 
     radnad.py vpn -u thomas -p C1sco12345
+    radnad.py vpn -u thomas -p C1sco12345 --transport udp    # native RADIUS client instead of `radclient`
+    radnad.py mab --stats            # show the request latency percentiles
+    radnad.py mab --profile cpu      # write the cProfile report to radnad.cpu.txt and radnad.cpu.pstats
+    radnad.py load --number 1000 --profile mem   # write the allocations of each phase to radnad.mem.txt
 
     radnad.py sessions               # list all active sessions
 
     radnad.py stop                   # stop all active sessions
     radnad.py stop --sid 35          # stop session ID == 35
 
+    radnad.py serve --transport udp --persistence journal &   # keep the sessions in a daemon; the commands above become its clients
+    radnad.py mab --local            # run in this process while the daemon is running
+
+    radnad.py load --number 1000 --concurrency 64                   # closed loop: 64 sessions at a time
+    radnad.py load --rate 100/s --duration 60 --mix dot1x:50,mab:30,vpn:20   # open loop: 100 new sessions per second
+    radnad.py load --rate 100/s --arrival poisson --transport udp --workers 4
+
 
 Requires setting the these environment variables using the `export` command:
-  export ISE_PSN='1.2.3.4'              # hostname or IP of an ISE PSN (policy service node)
+  export ISE_PSN='1.2.3.4'              # hostname or IP of an ISE PSN (policy service node) or a comma-separated list of them
   export ISE_RADIUS_SECRET='C1sco12345' # RADIUS server pre-shared key
 
 You may add these export lines to a text file and load with `source`:
@@ -45,20 +56,69 @@ from enum import Enum
 from multidict import MultiDict
 import argparse
 import asyncio
+import collections
+import concurrent.futures
+import contextvars
 import csv
 import datetime
+import hashlib
+import heapq
+import hmac
+import importlib
 import io
+import ipaddress
+import json
 import logging
+import math
+import multiprocessing
 import os
 import random
-import pandas as pd
+import resource
+import shlex
+import shutil
+import signal
+import socket
+import sqlite3
+import struct
 import sys
-import tabulate
+import tempfile
 import time
-import yaml
 import traceback
-import tracemalloc
-tracemalloc.start()
+
+
+class LazyModule():
+    """
+    A module imported on the first use of one of its attributes.
+
+    Usage:
+        np = LazyModule('numpy')
+        np.zeros(3) # imports numpy
+    """
+
+    def __init__(self, name:str=None) -> None:
+        """
+        - name (str): the module name
+        """
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+
+    def __getattr__(self, attribute:str=None):
+        if self._module is None: self.__dict__['_module'] = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+
+    def loaded(self) -> bool:
+        """
+        Returns True if the module is imported, so its objects may exist, without importing it.
+        """
+        return self._module is not None or self._name in sys.modules
+
+
+# 💡 numpy, pandas and tabulate are imported on their first use: they are most of the import time of a one-shot command
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+tabulate = LazyModule('tabulate')
 
 LOG_FORMAT = '%(asctime)s.%(msecs)03d | %(levelname)s | %(message)s'
 logging.basicConfig(filename='radnad.log', format=LOG_FORMAT, datefmt="%Y-%m-%d %H:%M:%S", encoding='utf-8', level=logging.DEBUG) # log to stdout by default
@@ -139,6 +199,12 @@ class RADIUSResponse():
         self.nas_port:int = 0 # the NAS (simulator) port in the request
         self.srv_ip:str = None # the RADIUS server IP address in the request
         self.srv_port:int = 0 # the RADIUS server port in the request
+        self.attempts:int = 1 # the number of attempts sent by RADNAD, including the successful one
+        self.hedged:bool = False # True if a hedged request was sent to a second server
+        self.winner:str = None # the attempt that replied first: `primary` or `hedge`
+        self.rtt:float = None # the round trip time, in seconds, of a single (not coalesced or batched) request
+        self.sent:float = None # the time (epoch seconds) RADNAD sent the first attempt
+        self.latency:float = None # the time, in seconds, from the first attempt to the reply, including retries
 
         if content is None: raise ValueError('content is None')
         # 💡 ToDo: create from response?
@@ -210,6 +276,67 @@ class RADIUSResponse():
         return mdict
 
 
+    @classmethod
+    def parse_many(self, content:str=None, session_ids:list=None) -> dict:
+        """
+        Returns a dictionary of `Acct-Session-Id` : RADIUSResponse (or TimeoutError) from the
+        `radclient -x` output of many packets sent by a single `radclient` invocation.
+
+        - content (str): the `radclient -x` output (stdout and stderr)
+        - session_ids ([str]): the Acct-Session-Id of each packet in the radclient input file, in order,
+          to attribute `(n) No reply from server` errors. Default: all sent packets.
+          Each Acct-Session-Id must be unique: a repeated one is taken for a retransmission.
+
+        💡 With `-p`, radclient interleaves the Sent and Received sections of different packets.
+        Replies are matched to their request by Id and NAS port because each socket reuses the same Ids.
+        radclient shows the Sent port in hex and the Received port in decimal.
+
+        Example output:
+            Sent Access-Request Id 1 from 0.0.0.0:fd98 to 1.2.3.4:1812 length 59
+                Acct-Session-Id = "5"
+            Sent Access-Request Id 2 from 0.0.0.0:fd98 to 1.2.3.4:1812 length 59
+                Acct-Session-Id = "6"
+            Received Access-Accept Id 2 from 1.2.3.4:714 to 10.16.51.114:64920 length 106
+            (0) No reply from server for ID 1 socket 4
+        """
+        sections = [] # [header line, [attribute lines]]
+        errors = {}   # packet number : error line
+        for line in content.splitlines():
+            if line.startswith('Sent ') or line.startswith('Received '):
+                sections.append([line, []])
+            elif line[:1].isspace() and line.find('=') > 0 and len(sections) > 0:
+                sections[-1][1].append(line)
+            elif line.startswith('(') and line.find('No reply') > 0:
+                n = line[1:line.find(')')]
+                if n.isdigit(): errors[int(n)] = line
+
+        sent = {}     # Acct-Session-Id : Sent section
+        pending = {}  # Id : [(NAS port, Acct-Session-Id)] awaiting a reply
+        responses = {}
+        for header,lines in sections:
+            words = header.split(' ')
+            if len(words) != 10: continue
+            section = '\n'.join([header] + lines)
+            if words[0] == 'Sent':
+                sid = self.avps_to_multidict(section).get('Acct-Session-Id', None)
+                if sid is None or sid in sent: continue # retransmission
+                sent[sid] = section
+                pending.setdefault(words[3], []).append((words[5].rsplit(':', 1)[-1], sid))
+            else:
+                candidates = pending.get(words[3], [])
+                if len(candidates) == 0: continue
+                port = words[7].rsplit(':', 1)[-1]
+                ports = [port, f"{int(port):x}"] if port.isdigit() else [port]
+                match = next((candidate for candidate in candidates if candidate[0] in ports), candidates[0])
+                candidates.remove(match)
+                responses[match[1]] = RADIUSResponse(sent[match[1]] + '\n' + section)
+
+        for n,sid in enumerate(list(sent.keys()) if session_ids is None else session_ids):
+            if sid not in responses:
+                responses[sid] = TimeoutError(errors.get(n, f"({n}) No reply from server for Acct-Session-Id {sid}"))
+        return responses
+
+
     def __repr__(self) -> str:
         """
         RADIUSResponse class representation.
@@ -299,56 +426,2958 @@ class RADIUSResponse():
             (0) No reply from server for ID 124 socket 4
         """
 
-        # 🚧 ToDo: Handle the Timeout output.
+        # 🚧 ToDo: Handle the Timeout output.
+
+        INDENT = ' ' * 4
+        out = io.StringIO()
+        print(f"Sent {self.req_type} Id {self.id} from {self.nas_ip}:{self.nas_port} to {self.srv_ip}:{self.srv_port} length {self.req_length}", file=out)
+        print(f"{INDENT}",f"\n{INDENT}".join([f"{key}='{val}'" for key,val in self.req_attrs.items()]), sep="", file=out)
+        print(f"Received {self.rsp_type} Id {self.id} from {self.srv_ip}:{self.srv_port} to {self.nas_ip}:{self.nas_port} length {self.rsp_length}", file=out)
+        print(f"{INDENT}", f"\n{INDENT}".join([f"{key}='{val}'" for key,val in self.rsp_attrs.items()]), sep="", file=out)
+        return out.getvalue()
+
+
+    def to_ise_log(self) -> str:
+        """
+        Generate a log string *similar* to an ISE LiveLog entry. 
+        Not all values are available in the RADIUS client and the order and format may be customized.
+
+        ISE LiveLog Field Names:
+            'Timestamp',                # ISE format example: Jan 01, 2024 01:02:03.456 PM
+            'Event',                    # Pass, Fail, Start, Stop
+            'Identity',                 # username or MAC (12:34:56:78:90:AB)
+            'Endpoint',                 # MAC (12:34:56:78:90:AB)
+            'Method',                   # 'mab', ...
+            'NAS-Id',                   # RADIUS client name in ISE (should match NAD-Identifier)
+            'NAS-Port-Type',            # RADIUS client port, if any
+            'NAS-Port-Id',              # RADIUS client port, if any
+            'NAS-IP-Address',           # Endpoint IP address, if provided by RADIUS client
+            'Acct-Session-Id',          # Created by RADIUS client
+            'CiscoAVPair',              # If assigned by ISE
+            # 'Security Group',         # If assigned by ISE
+            # 'Endpoint Profile',       # Unknown unless returned in attribute!
+            # 'Server',                 # ISE PSN node name
+            # 'Response Time (ms)',     # Example: 29
+        """
+        log = {
+            'Timestamp'   : datetime.datetime.fromtimestamp(self.timestamp, tz=None).isoformat(sep=" ", timespec="milliseconds"),
+            'Event'       : self.RESPONSE_ICONS[self.rsp_type],  # Passed, Failed, Session
+            'Identity'    : self.req_attrs.get('User-Name', ''),
+            'Endpoint'    : self.req_attrs.get('Calling-Station-Id', ''),
+            'Endpoin IP' : self.req_attrs.get('Framed-IP-Address', ''),
+            'Method'      : self.guess_access_method(),
+            'NAS-Id'      : self.req_attrs.get('NAS-Identifier', ''),
+            'NAS-IP' : self.req_attrs.get('NAS-IP-Address', ''),
+            'Port-Type' : self.req_attrs.get('NAS-Port-Type', ''),
+            'Port-Id' : self.req_attrs.get('NAS-Port-Id', ''),
+            'Acct-Session-Id'  : self.req_attrs.get('Acct-Session-Id', ''),
+            # 'Attributes'  : RADNAD.to_avp_string(self.req_attrs),
+        }
+        out = io.StringIO()
+        print(tabulate.tabulate([log.keys(), log.values()], headers="firstrow", tablefmt="simple"), file=out)
+        return out.getvalue()
+
+
+
+
+class RADIUSPacket():
+    """
+    An object representing a RADIUS packet on the wire, used by the native `udp` transport.
+
+    📄 RFC2865:
+     0                   1                   2                   3
+     0 1 2 3 4 5 6 7 8 9 0 1 2 3 4 5 6 7 8 9 0 1 2 3 4 5 6 7 8 9 0 1
+    +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+    |     Code      |  Identifier   |            Length             |
+    +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+    |                         Authenticator (16)                    |
+    +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+    |  Attributes ...
+    +-+-+-+-+-+-+-+-+-+-+-+-+-
+
+    Attribute values are kept as strings in the same format `radclient` uses so a
+    RADIUSPacket may be rendered as a `radclient -x` log and parsed by `RADIUSResponse`.
+    """
+
+    HEADER_LENGTH = 20
+    AUTHENTICATOR_LENGTH = 16
+    MAX_LENGTH = 4096
+    MAX_ATTRIBUTE_LENGTH = 253
+
+    # RADIUS Codes
+    ACCESS_REQUEST = 1
+    ACCESS_ACCEPT = 2
+    ACCESS_REJECT = 3
+    ACCOUNTING_REQUEST = 4
+    ACCOUNTING_RESPONSE = 5
+    ACCESS_CHALLENGE = 11
+    STATUS_SERVER = 12
+    DISCONNECT_REQUEST = 40
+    DISCONNECT_ACK = 41
+    DISCONNECT_NAK = 42
+    COA_REQUEST = 43
+    COA_ACK = 44
+    COA_NAK = 45
+
+    CODES = {
+        ACCESS_REQUEST : RADIUSResponse.ACCESS_REQUEST,
+        ACCESS_ACCEPT : RADIUSResponse.ACCESS_ACCEPT,
+        ACCESS_REJECT : RADIUSResponse.ACCESS_REJECT,
+        ACCOUNTING_REQUEST : RADIUSResponse.ACCOUNTING_REQUEST,
+        ACCOUNTING_RESPONSE : RADIUSResponse.ACCOUNTING_RESPONSE,
+        ACCESS_CHALLENGE : RADIUSResponse.ACCESS_CHALLENGE,
+        STATUS_SERVER : 'Status-Server',
+        DISCONNECT_REQUEST : 'Disconnect-Request',
+        DISCONNECT_ACK : 'Disconnect-ACK',
+        DISCONNECT_NAK : 'Disconnect-NAK',
+        COA_REQUEST : 'CoA-Request',
+        COA_ACK : 'CoA-ACK',
+        COA_NAK : 'CoA-NAK',
+    }
+
+    # `radclient` command to request code
+    COMMANDS = {
+        'auth' : ACCESS_REQUEST,
+        'acct' : ACCOUNTING_REQUEST,
+        'status' : STATUS_SERVER,
+        'disconnect' : DISCONNECT_REQUEST,
+        'coa' : COA_REQUEST,
+    }
+
+    # Attribute Name : (Type, Data Type)
+    ATTRIBUTES = {
+        'User-Name' : (1, 'string'),
+        'User-Password' : (2, 'password'),
+        'CHAP-Password' : (3, 'octets'),
+        'NAS-IP-Address' : (4, 'ipaddr'),
+        'NAS-Port' : (5, 'integer'),
+        'Service-Type' : (6, 'integer'),
+        'Framed-Protocol' : (7, 'integer'),
+        'Framed-IP-Address' : (8, 'ipaddr'),
+        'Framed-IP-Netmask' : (9, 'ipaddr'),
+        'Filter-Id' : (11, 'string'),
+        'Framed-MTU' : (12, 'integer'),
+        'Reply-Message' : (18, 'string'),
+        'State' : (24, 'octets'),
+        'Class' : (25, 'octets'),
+        'Vendor-Specific' : (26, 'octets'),
+        'Session-Timeout' : (27, 'integer'),
+        'Idle-Timeout' : (28, 'integer'),
+        'Termination-Action' : (29, 'integer'),
+        'Called-Station-Id' : (30, 'string'),
+        'Calling-Station-Id' : (31, 'string'),
+        'NAS-Identifier' : (32, 'string'),
+        'Proxy-State' : (33, 'octets'),
+        'Acct-Status-Type' : (40, 'integer'),
+        'Acct-Delay-Time' : (41, 'integer'),
+        'Acct-Input-Octets' : (42, 'integer'),
+        'Acct-Output-Octets' : (43, 'integer'),
+        'Acct-Session-Id' : (44, 'string'),
+        'Acct-Authentic' : (45, 'integer'),
+        'Acct-Session-Time' : (46, 'integer'),
+        'Acct-Input-Packets' : (47, 'integer'),
+        'Acct-Output-Packets' : (48, 'integer'),
+        'Acct-Terminate-Cause' : (49, 'integer'),
+        'Acct-Multi-Session-Id' : (50, 'string'),
+        'Acct-Link-Count' : (51, 'integer'),
+        'Acct-Input-Gigawords' : (52, 'integer'),
+        'Acct-Output-Gigawords' : (53, 'integer'),
+        'Event-Timestamp' : (55, 'integer'),
+        'NAS-Port-Type' : (61, 'integer'),
+        'Tunnel-Type' : (64, 'integer'),
+        'Tunnel-Medium-Type' : (65, 'integer'),
+        'Tunnel-Client-Endpoint' : (66, 'string'),
+        'Tunnel-Private-Group-Id' : (81, 'string'),
+        'Connect-Info' : (77, 'string'),
+        'Message-Authenticator' : (80, 'octets'),
+        'Acct-Interim-Interval' : (85, 'integer'),
+        'NAS-Port-Id' : (87, 'string'),
+        'Framed-Pool' : (88, 'string'),
+        'Error-Cause' : (101, 'integer'),
+    }
+    ATTRIBUTE_NAMES = {type:name for name,(type,_datatype) in ATTRIBUTES.items()}
+
+    # Vendor-Specific Attribute Name : (Vendor-Id, Vendor-Type, Data Type)
+    VENDOR_ATTRIBUTES = {
+        'Cisco-AVPair' : (9, 1, 'string'),
+    }
+    VENDOR_ATTRIBUTE_NAMES = {(vendor,type):name for name,(vendor,type,_datatype) in VENDOR_ATTRIBUTES.items()}
+
+    # Enumerated integer values by attribute name
+    VALUES = {
+        'Service-Type' : {
+            'Login-User' : 1,
+            'Framed-User' : 2,
+            'Callback-Login-User' : 3,
+            'Callback-Framed-User' : 4,
+            'Outbound-User' : 5,
+            'Administrative-User' : 6,
+            'NAS-Prompt-User' : 7,
+            'Authenticate-Only' : 8,
+            'Callback-NAS-Prompt' : 9,
+            'Call-Check' : 10,
+            'Callback-Administrative' : 11,
+            'Authorize-Only' : 17,
+        },
+        'Framed-Protocol' : { 'PPP' : 1, 'SLIP' : 2 },
+        'Termination-Action' : { 'Default' : 0, 'RADIUS-Request' : 1 },
+        'Acct-Status-Type' : {
+            'Start' : 1,
+            'Stop' : 2,
+            'Interim-Update' : 3,
+            'Accounting-On' : 7,
+            'Accounting-Off' : 8,
+        },
+        'Acct-Authentic' : { 'RADIUS' : 1, 'Local' : 2, 'Remote' : 3 },
+        'Acct-Terminate-Cause' : {
+            'User-Request' : 1,
+            'Lost-Carrier' : 2,
+            'Lost-Service' : 3,
+            'Idle-Timeout' : 4,
+            'Session-Timeout' : 5,
+            'Admin-Reset' : 6,
+            'Admin-Reboot' : 7,
+            'Port-Error' : 8,
+            'NAS-Error' : 9,
+            'NAS-Request' : 10,
+            'NAS-Reboot' : 11,
+            'Port-Unneeded' : 12,
+            'Port-Preempted' : 13,
+            'Port-Suspended' : 14,
+            'Service-Unavailable' : 15,
+            'Callback' : 16,
+            'User-Error' : 17,
+            'Host-Request' : 18,
+        },
+        'NAS-Port-Type' : {
+            'Async' : 0,
+            'Sync' : 1,
+            'ISDN-Sync' : 2,
+            'ISDN-Async-V.120' : 3,
+            'ISDN-Async-V.110' : 4,
+            'Virtual' : 5,
+            'PIAFS' : 6,
+            'HDLC-Clear-Channel' : 7,
+            'X.25' : 8,
+            'X.75' : 9,
+            'G.3-Fax' : 10,
+            'SDSL' : 11,
+            'ADSL-CAP' : 12,
+            'ADSL-DMT' : 13,
+            'IDSL' : 14,
+            'Ethernet' : 15,
+            'xDSL' : 16,
+            'Cable' : 17,
+            'Wireless-Other' : 18,
+            'Wireless-802.11' : 19,
+        },
+        'Tunnel-Type' : { 'PPTP' : 1, 'L2TP' : 3, 'VLAN' : 13 },
+        'Tunnel-Medium-Type' : { 'IPv4' : 1, 'IPv6' : 2, 'IEEE-802' : 6 },
+    }
+    VALUE_NAMES = {attr:{value:name for name,value in values.items()} for attr,values in VALUES.items()}
+    VALUE_ALIASES = {
+        # 💡 `radnad` scenarios use radclient's short `Framed` for `Framed-User`
+        'Service-Type' : { 'Framed' : 2 },
+    }
+
+
+    def __init__(self, code:int=ACCESS_REQUEST, id:int=0, authenticator:bytes=None, attributes:dict=None) -> None:
+        """
+        Instantiates a RADIUSPacket.
+
+        - code (int): the RADIUS packet code. Default: ACCESS_REQUEST
+        - id (int): the RADIUS packet identifier (0-255)
+        - authenticator (bytes): the 16 octet Request or Response Authenticator
+        - attributes (dict or MultiDict): the RADIUS attributes as `radclient` formatted strings
+        """
+        if code not in self.CODES: raise ValueError(f"Invalid RADIUS code: {code}")
+        if id < 0 or id > 255: raise ValueError(f"Invalid RADIUS Id: {id}")
+        self.code = code
+        self.id = id
+        self.authenticator = authenticator if authenticator else bytes(self.AUTHENTICATOR_LENGTH)
+        self.attributes:MultiDict = MultiDict() if attributes is None else MultiDict(attributes)
+        self.length = 0
+        self.data:bytes = b''
+
+
+    @classmethod
+    def hide_password(self, password:str=None, secret:bytes=None, authenticator:bytes=None) -> bytes:
+        """
+        Returns the hidden User-Password value.
+
+        📄 RFC2865: Call the shared secret S and the pseudo-random 128-bit Request Authenticator RA.
+        Break the password into 16-octet chunks p1, p2, etc. with the last one padded at the end with nulls.
+            b1 = MD5(S + RA)       c(1) = p1 xor b1
+            b2 = MD5(S + c(1))     c(2) = p2 xor b2
+        """
+        value = password.encode('utf-8')
+        if len(value) > 128: raise ValueError(f"User-Password is longer than 128 octets")
+        value += bytes(-len(value) % 16 if value else 16) # pad with nulls to a multiple of 16 octets
+        hidden = b''
+        last = authenticator
+        for n in range(0, len(value), 16):
+            b = hashlib.md5(secret + last).digest()
+            last = bytes(p ^ c for p,c in zip(value[n:n+16], b))
+            hidden += last
+        return hidden
+
+
+    @classmethod
+    def unhide_password(self, hidden:bytes=None, secret:bytes=None, authenticator:bytes=None) -> str:
+        """
+        Returns the User-Password value from the hidden value. The inverse of `hide_password()`.
+        """
+        password = b''
+        last = authenticator
+        for n in range(0, len(hidden), 16):
+            b = hashlib.md5(secret + last).digest()
+            password += bytes(c ^ x for c,x in zip(hidden[n:n+16], b))
+            last = hidden[n:n+16]
+        return password.rstrip(b'\x00').decode('utf-8', errors='replace')
+
+
+    @classmethod
+    def encode_value(self, name:str=None, datatype:str=None, value=None) -> bytes:
+        """
+        Returns the wire value of the `radclient` formatted attribute value.
+        """
+        value = str(value).strip('"\' ')
+        if datatype == 'integer':
+            if value in self.VALUES.get(name, {}): return struct.pack('!I', self.VALUES[name][value])
+            if value in self.VALUE_ALIASES.get(name, {}): return struct.pack('!I', self.VALUE_ALIASES[name][value])
+            return struct.pack('!I', int(value, 0))
+        if datatype == 'ipaddr':
+            return socket.inet_aton(value)
+        if datatype == 'octets' and value.startswith('0x'):
+            return bytes.fromhex(value[2:])
+        return value.encode('utf-8')
+
+
+    @classmethod
+    def decode_value(self, name:str=None, datatype:str=None, value:bytes=None) -> str:
+        """
+        Returns the `radclient` formatted string of the wire attribute value.
+        """
+        if datatype == 'integer' and len(value) == 4:
+            number = struct.unpack('!I', value)[0]
+            return self.VALUE_NAMES.get(name, {}).get(number, str(number))
+        if datatype == 'ipaddr' and len(value) == 4:
+            return socket.inet_ntoa(value)
+        if datatype == 'string':
+            return value.decode('utf-8', errors='replace')
+        return '0x' + value.hex()
+
+
+    def encode_attributes(self, secret:bytes=None) -> bytes:
+        """
+        Returns the wire encoding of the packet's attributes.
+        The Message-Authenticator is managed by `encode_request()` and `encode_response()` and ignored here.
+        """
+        data = b''
+        for name,value in self.attributes.items():
+            if name == 'Message-Authenticator': continue
+            if name in self.VENDOR_ATTRIBUTES:
+                vendor,vtype,datatype = self.VENDOR_ATTRIBUTES[name]
+                vsa = self.encode_value(name, datatype, value)[:self.MAX_ATTRIBUTE_LENGTH-8]
+                data += struct.pack('!BBIBB', 26, len(vsa)+8, vendor, vtype, len(vsa)+2) + vsa
+                continue
+            if name in self.ATTRIBUTES:
+                type,datatype = self.ATTRIBUTES[name]
+            elif name.startswith('Attr-') and name[5:].isdigit():
+                type,datatype = int(name[5:]), 'octets' # unknown attribute passed through from a response
+            else:
+                log.warning(f"{RADNAD.ICONS['WARN']} RADIUSPacket: Unknown attribute ignored: {name}")
+                continue
+            if datatype == 'password':
+                encoded = self.hide_password(str(value).strip('"\' '), secret, self.authenticator)
+            else:
+                encoded = self.encode_value(name, datatype, value)
+            if len(encoded) > self.MAX_ATTRIBUTE_LENGTH: raise ValueError(f"Attribute {name} is longer than {self.MAX_ATTRIBUTE_LENGTH} octets")
+            data += struct.pack('!BB', type, len(encoded)+2) + encoded
+        return data
+
+
+    def _pack(self, attributes:bytes=None) -> bytes:
+        """
+        Returns the packet header + attributes with the current authenticator.
+        """
+        self.length = self.HEADER_LENGTH + len(attributes)
+        if self.length > self.MAX_LENGTH: raise ValueError(f"RADIUS packet length {self.length} > {self.MAX_LENGTH}")
+        return struct.pack('!BBH', self.code, self.id, self.length) + self.authenticator + attributes
+
+
+    @classmethod
+    def _message_authenticator(self, data:bytes=None, secret:bytes=None) -> bytes:
+        """
+        Returns the Message-Authenticator (HMAC-MD5) of the packet data containing a zeroed Message-Authenticator.
+        📄 RFC3579: Message-Authenticator = HMAC-MD5 (Type, Identifier, Length, Request Authenticator, Attributes)
+        """
+        return hmac.new(secret, data, hashlib.md5).digest()
+
+
+    def encode_request(self, secret:bytes=None) -> bytes:
+        """
+        Returns the wire encoding of a request packet with a new Request Authenticator.
+
+        📄 RFC2865: Access-Request Request Authenticator is a random 16 octet value.
+        📄 RFC2866: Accounting-Request Request Authenticator = MD5(Code + Identifier + Length + 16 zero octets + request attributes + secret)
+        📄 RFC3579: Access-Request packets SHOULD include a Message-Authenticator.
+        """
+        if self.code in [self.ACCESS_REQUEST, self.STATUS_SERVER]:
+            self.authenticator = os.urandom(self.AUTHENTICATOR_LENGTH)
+            attributes = self.encode_attributes(secret) + bytes([80, 18]) + bytes(16)
+            data = self._pack(attributes)
+            self.data = data[:-16] + self._message_authenticator(data, secret)
+        else:
+            self.authenticator = bytes(self.AUTHENTICATOR_LENGTH)
+            attributes = self.encode_attributes(secret)
+            self.authenticator = hashlib.md5(self._pack(attributes) + secret).digest()
+            self.data = self._pack(attributes)
+        return self.data
+
+
+    def encode_response(self, secret:bytes=None, request:'RADIUSPacket'=None) -> bytes:
+        """
+        Returns the wire encoding of a response packet to the request packet.
+
+        📄 RFC2865: Response Authenticator = MD5(Code + ID + Length + Request Authenticator + response attributes + secret)
+        """
+        self.authenticator = request.authenticator
+        attributes = self.encode_attributes(secret)
+        if 'Message-Authenticator' in request.attributes:
+            data = self._pack(attributes + bytes([80, 18]) + bytes(16))
+            attributes += bytes([80, 18]) + self._message_authenticator(data, secret)
+        self.authenticator = hashlib.md5(self._pack(attributes) + secret).digest()
+        self.data = self._pack(attributes)
+        return self.data
+
+
+    @classmethod
+    def decode(self, data:bytes=None, secret:bytes=None) -> 'RADIUSPacket':
+        """
+        Returns a RADIUSPacket decoded from the wire data.
+
+        - data (bytes): the received UDP payload
+        - secret (bytes): the shared secret to reveal any User-Password. Default: None
+        - raises ValueError for malformed packets
+        """
+        if data is None or len(data) < self.HEADER_LENGTH: raise ValueError(f"RADIUS packet too short")
+        code,id,length = struct.unpack('!BBH', data[0:4])
+        if length < self.HEADER_LENGTH or length > len(data): raise ValueError(f"Invalid RADIUS packet length: {length}")
+        if code not in self.CODES: raise ValueError(f"Invalid RADIUS code: {code}")
+        packet = RADIUSPacket(code, id, data[4:20])
+        packet.data = data[:length] # 📄 RFC2865: Octets outside the range of the Length field MUST be treated as padding and ignored
+        packet.length = length
+        offset = self.HEADER_LENGTH
+        while offset < length:
+            if offset + 2 > length: raise ValueError(f"Truncated attribute at {offset}")
+            type,alength = data[offset], data[offset+1]
+            if alength < 2 or offset + alength > length: raise ValueError(f"Invalid attribute length {alength} at {offset}")
+            value = data[offset+2:offset+alength]
+            offset += alength
+            if type == 26 and len(value) > 6:
+                vendor,vtype,vlength = struct.unpack('!IBB', value[0:6])
+                name = self.VENDOR_ATTRIBUTE_NAMES.get((vendor,vtype), None)
+                if name and vlength == len(value) - 4:
+                    packet.attributes.add(name, self.decode_value(name, self.VENDOR_ATTRIBUTES[name][2], value[6:]))
+                    continue
+            name = self.ATTRIBUTE_NAMES.get(type, f"Attr-{type}")
+            datatype = self.ATTRIBUTES[name][1] if name in self.ATTRIBUTES else 'octets'
+            if datatype == 'password':
+                packet.attributes.add(name, self.unhide_password(value, secret, packet.authenticator) if secret else '0x' + value.hex())
+            else:
+                packet.attributes.add(name, self.decode_value(name, datatype, value))
+        return packet
+
+
+    @classmethod
+    def verify_response(self, data:bytes=None, secret:bytes=None, request_authenticator:bytes=None) -> bool:
+        """
+        Returns True if the response data has a valid Response Authenticator (and Message-Authenticator, if any) for the request.
+        """
+        if len(data) < self.HEADER_LENGTH: return False
+        length = struct.unpack('!H', data[2:4])[0]
+        expected = hashlib.md5(data[0:4] + request_authenticator + data[20:length] + secret).digest()
+        if not hmac.compare_digest(expected, data[4:20]): return False
+        return self._verify_message_authenticator(data[0:4] + request_authenticator + data[20:length], secret)
+
+
+    @classmethod
+    def verify_request(self, data:bytes=None, secret:bytes=None) -> bool:
+        """
+        Returns True if the request data has a valid Request Authenticator (accounting) and Message-Authenticator, if any.
+        """
+        if len(data) < self.HEADER_LENGTH: return False
+        length = struct.unpack('!H', data[2:4])[0]
+        if data[0] in [self.ACCOUNTING_REQUEST, self.DISCONNECT_REQUEST, self.COA_REQUEST]:
+            expected = hashlib.md5(data[0:4] + bytes(16) + data[20:length] + secret).digest()
+            if not hmac.compare_digest(expected, data[4:20]): return False
+            return self._verify_message_authenticator(data[0:4] + bytes(16) + data[20:length], secret)
+        return self._verify_message_authenticator(data[:length], secret)
+
+
+    @classmethod
+    def _verify_message_authenticator(self, data:bytes=None, secret:bytes=None) -> bool:
+        """
+        Returns True if the packet data has no Message-Authenticator or a valid one.
+        """
+        offset = self.HEADER_LENGTH
+        while offset + 2 <= len(data):
+            type,alength = data[offset], data[offset+1]
+            if alength < 2: return False
+            if type == 80 and alength == 18:
+                zeroed = data[:offset+2] + bytes(16) + data[offset+18:]
+                return hmac.compare_digest(self._message_authenticator(zeroed, secret), data[offset+2:offset+18])
+            offset += alength
+        return True
+
+
+    def to_radclient_log(self, direction:str='Sent', src:tuple=('0.0.0.0', 0), dst:tuple=('0.0.0.0', 0)) -> str:
+        """
+        Return the `radclient -x` representation of the packet for parsing by `RADIUSResponse`.
+
+        Example:
+            Sent Access-Request Id 192 from 0.0.0.0:64920 to 1.2.3.4:1812 length 59
+                User-Name = "thomas"
+        """
+        INDENT = '\t'
+        out = io.StringIO()
+        print(f"{direction} {self.CODES[self.code]} Id {self.id} from {src[0]}:{src[1]} to {dst[0]}:{dst[1]} length {self.length}", file=out)
+        for name,value in self.attributes.items():
+            datatype = self.ATTRIBUTES.get(name, self.VENDOR_ATTRIBUTES.get(name, ('string',)))[-1]
+            value = f'"{value}"' if datatype in ['string', 'password'] else value
+            print(f"{INDENT}{name} = {value}", file=out)
+        return out.getvalue().rstrip('\n')
+
+
+
+
+class RADIUSClientProtocol(asyncio.DatagramProtocol):
+    """
+    An asyncio RADIUS client protocol multiplexing many in-flight requests over a single UDP socket.
+    Replies are matched to their request by the (server address, Id) pair.
+    """
+
+    IDS = 256 # 📄 RFC2865: The Identifier field is one octet
+
+
+    def __init__(self, secret:bytes=None) -> None:
+        """
+        - secret (bytes): the RADIUS shared secret to validate replies
+        """
+        self.secret = secret
+        self.transport = None
+        self.pending = {}  # (address, Id) : (future, RADIUSPacket request)
+        self.ids = {}      # address : next Id to try
+        self.slots = {}    # address : asyncio.Semaphore limiting in-flight Ids
+        self.active = 0    # requests using this socket
+
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+
+    def connection_lost(self, exc:Exception=None) -> None:
+        for future,_request in self.pending.values():
+            if not future.done(): future.set_exception(exc if exc else ConnectionError('RADIUS socket closed'))
+
+
+    def error_received(self, exc:Exception=None) -> None:
+        log.warning(f"{RADNAD.ICONS['WARN']} RADIUSClientProtocol.error_received(): {exc}")
+
+
+    def datagram_received(self, data:bytes=None, addr:tuple=None) -> None:
+        """
+        Resolve the pending request's future with the reply, silently discarding unexpected or invalid replies.
+        """
+        if len(data) < RADIUSPacket.HEADER_LENGTH: return
+        entry = self.pending.get((addr[0:2], data[1]), None)
+        if entry is None:
+            log.warning(f"{RADNAD.ICONS['WARN']} RADIUSClientProtocol: Unexpected reply Id {data[1]} from {addr[0]}:{addr[1]}")
+            return
+        future,request = entry
+        if not RADIUSPacket.verify_response(data, self.secret, request.authenticator):
+            log.error(f"{RADNAD.ICONS['ERROR']} RADIUSClientProtocol: Invalid Response Authenticator for Id {data[1]} from {addr[0]}:{addr[1]}")
+            return
+        if not future.done(): future.set_result(data)
+
+
+    async def acquire_id(self, address:tuple=None) -> int:
+        """
+        Returns the next unused Id for the server address, waiting if all 256 Ids are in flight.
+        """
+        slots = self.slots.setdefault(address, asyncio.Semaphore(self.IDS))
+        await slots.acquire()
+        id = self.ids.get(address, random.randrange(self.IDS))
+        while (address, id) in self.pending:
+            id = (id + 1) % self.IDS
+        self.ids[address] = (id + 1) % self.IDS
+        return id
+
+
+    def release_id(self, address:tuple=None, id:int=0) -> None:
+        """
+        Returns the Id for the server address to the pool.
+        """
+        self.pending.pop((address, id), None)
+        self.slots[address].release()
+
+
+
+
+class RADIUSUDPClient():
+    """
+    A native asyncio RADIUS client, used by the RADNAD `udp` transport instead of spawning `radclient`.
+    Requests are sent from a reused UDP socket and their replies are returned as `radclient -x` formatted logs.
+    """
+
+    LOCAL_ADDRESS_DEFAULT = '0.0.0.0'
+
+
+    def __init__(self, secret:str=None, timeout:int=5, retries:int=3, max_endpoints:int=None) -> None:
+        """
+        - secret (str): the RADIUS shared secret
+        - timeout (int): the time to wait, in seconds, for a reply before retransmitting
+        - retries (int): the number of retransmissions before timeout
+        - max_endpoints (int): the maximum open sockets, one per local address. Default: derived from `RLIMIT_NOFILE`
+        """
+        if secret is None or secret == '': raise ValueError(f"Must specify a secret")
+        self.secret = secret.encode('utf-8')
+        self.timeout = timeout
+        self.retries = retries
+        self.max_endpoints = self.endpoints_limit() if max_endpoints is None else max_endpoints
+        if self.max_endpoints < 1: raise ValueError(f"Invalid max_endpoints: {self.max_endpoints}")
+        self.endpoints = collections.OrderedDict() # local address : RADIUSClientProtocol, least recently used first
+        self.addresses = {}  # (host, port) : resolved (ip, port)
+        self.lock = asyncio.Lock() # creates one endpoint at a time
+
+
+    @classmethod
+    def endpoints_limit(self, reserved:int=64) -> int:
+        """
+        Returns the number of sockets to keep open: half of the soft `RLIMIT_NOFILE` after the reserved file descriptors.
+        The other half remains for `radclient` processes, log and session files.
+        """
+        soft,_hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        soft = 65536 if soft == resource.RLIM_INFINITY else soft
+        return max(1, (soft - reserved) // 2)
+
+
+    async def resolve(self, host:str=None, port:int=0) -> tuple:
+        """
+        Returns the cached (ip, port) address of the server host.
+        """
+        address = self.addresses.get((host, port), None)
+        if address is None:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, port, family=socket.AF_INET, type=socket.SOCK_DGRAM)
+            address = self.addresses[(host, port)] = infos[0][4][0:2]
+        return address
+
+
+    async def endpoint(self, local:str=LOCAL_ADDRESS_DEFAULT) -> RADIUSClientProtocol:
+        """
+        Returns the RADIUSClientProtocol bound to the local address, creating it on first use.
+        When there are `max_endpoints` sockets, the least recently used idle socket is closed first.
+        """
+        protocol = self.endpoints.get(local, None)
+        if protocol is None:
+            async with self.lock:
+                protocol = self.endpoints.get(local, None)
+                if protocol is None:
+                    self.evict()
+                    _transport,protocol = await asyncio.get_running_loop().create_datagram_endpoint(
+                        lambda: RADIUSClientProtocol(self.secret), local_addr=(local, 0), family=socket.AF_INET)
+                    self.endpoints[local] = protocol
+        self.endpoints.move_to_end(local)
+        return protocol
+
+
+    def evict(self) -> None:
+        """
+        Closes the least recently used idle sockets until there is room for another one.
+        """
+        while len(self.endpoints) >= self.max_endpoints:
+            idle = next((local for local,protocol in self.endpoints.items() if protocol.active == 0), None)
+            if idle is None:
+                log.warning(f"{RADNAD.ICONS['WARN']} RADIUSUDPClient: All {len(self.endpoints)} sockets are busy; exceeding max_endpoints {self.max_endpoints}")
+                return
+            protocol = self.endpoints.pop(idle)
+            if protocol.transport: protocol.transport.close()
+
+
+    async def request(self, server:str=None, port:int=0, command:str='auth', attributes:dict=None, local:str=LOCAL_ADDRESS_DEFAULT) -> str:
+        """
+        Sends a RADIUS request and returns the `radclient -x` formatted request and reply for `RADIUSResponse`.
+
+        - server (str): the RADIUS server hostname or IP address
+        - port (int): the RADIUS server port
+        - command (str): the `radclient` command: `auth`, `acct` or `status`
+        - attributes (dict or MultiDict): a dictionary of RADIUS attributes
+        - local (str): the local address to send from. Default: LOCAL_ADDRESS_DEFAULT
+        """
+        if command not in RADIUSPacket.COMMANDS: raise ValueError(f"Invalid command: {command}")
+        address = await self.resolve(server, port)
+        protocol = await self.endpoint(local)
+        protocol.active += 1 # 💡 not evicted while in use
+        try:
+            return await self._request(protocol, address, command, attributes)
+        finally:
+            protocol.active -= 1
+
+
+    async def _request(self, protocol:RADIUSClientProtocol=None, address:tuple=None, command:str='auth', attributes:dict=None) -> str:
+        """
+        Sends a RADIUS request with the protocol's socket. See `request()`.
+        """
+        id = await protocol.acquire_id(address)
+        try:
+            request = RADIUSPacket(RADIUSPacket.COMMANDS[command], id, attributes=attributes)
+            data = request.encode_request(self.secret)
+            future = asyncio.get_running_loop().create_future()
+            protocol.pending[(address, id)] = (future, request)
+            sockname = protocol.transport.get_extra_info('sockname')
+            for attempt in range(self.retries + 1):
+                protocol.transport.sendto(data, address)
+                try:
+                    reply_data = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+                    break
+                except asyncio.TimeoutError: # 💡 not the builtin TimeoutError before Python 3.11
+                    log.info(f"{RADNAD.ICONS['TIMEOUT']} RADIUSUDPClient: No reply for Id {id} from {address[0]}:{address[1]} ({attempt+1}/{self.retries+1})")
+            else:
+                future.cancel()
+                # 💡 Same as the radclient output so RADIUSResponse raises TimeoutError
+                return f"(0) No reply from server for ID {id} socket {protocol.transport.get_extra_info('socket').fileno()}"
+        finally:
+            protocol.release_id(address, id)
+
+        sent = RADIUSPacket.decode(data, self.secret) # 💡 show the attributes as sent, like radclient
+        sent.attributes.popall('Message-Authenticator', None)
+        reply = RADIUSPacket.decode(reply_data)
+        return sent.to_radclient_log('Sent', sockname, address) + '\n' + reply.to_radclient_log('Received', address, sockname)
+
+
+    def close(self) -> None:
+        """
+        Close all sockets.
+        """
+        for protocol in self.endpoints.values():
+            if protocol.transport: protocol.transport.close()
+        self.endpoints = collections.OrderedDict()
+
+
+
+
+class RequestCoalescer():
+    """
+    Collects the requests arriving within a time window, or until a batch is full, for each key
+    and sends them together with a single call, resolving each caller's future with its own result.
+    Used by RADNAD to send concurrent requests with a single `radclient` process.
+    """
+
+    def __init__(self, send:callable=None, window:float=0.005, size:int=64) -> None:
+        """
+        - send (callable): an async function `send(key, items)` returning a list with a result (or exception) for each item
+        - window (float): the time, in seconds, to wait for more requests after the first one. Default: 0.005
+        - size (int): the number of requests that flushes a batch immediately. Default: 64
+        """
+        if send is None: raise ValueError(f"send is None")
+        if window <= 0: raise ValueError(f"Invalid window: {window}")
+        if size < 1: raise ValueError(f"Invalid size: {size}")
+        self.send = send
+        self.window = window
+        self.size = size
+        self.batches = {}  # key : [(item, future)]
+        self.timers = {}   # key : asyncio.TimerHandle
+        self.tasks = set() # in-flight batches
+
+
+    async def request(self, key=None, item=None):
+        """
+        Adds the item to the batch for the key and returns its result when the batch is sent.
+        - raises the item's exception, if any
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self.batches.setdefault(key, [])
+        batch.append((item, future))
+        if len(batch) >= self.size:
+            self.flush(key)
+        elif len(batch) == 1:
+            self.timers[key] = loop.call_later(self.window, self.flush, key)
+        result = await future
+        if isinstance(result, Exception): raise result
+        return result
+
+
+    def flush(self, key=None) -> None:
+        """
+        Sends the batch for the key, if any.
+        """
+        timer = self.timers.pop(key, None)
+        if timer: timer.cancel()
+        batch = self.batches.pop(key, [])
+        if len(batch) == 0: return
+        task = asyncio.get_running_loop().create_task(self._send(key, batch))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+
+    async def _send(self, key=None, batch:list=None) -> None:
+        """
+        Sends the batch and resolves each request's future with its result.
+        """
+        results = []
+        try:
+            results = await self.send(key, [item for item,_future in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        finally:
+            for n,(_item,future) in enumerate(batch):
+                if future.done(): continue
+                if n < len(results): future.set_result(results[n])
+                else: future.set_exception(TimeoutError(f"No result for request {n} of the batch")) # 💡 never leave a caller waiting when the send is cancelled or returns too few results
+
+
+class AdmissionError(Exception):
+    """
+    Raised when a request is rejected because the admission queue is full.
+    """
+
+
+
+
+class AdmissionController():
+    """
+    Limits the number of concurrent `radclient` processes to what the process file descriptor limit
+    (`RLIMIT_NOFILE`) allows, so many concurrent requests never fail with `OSError: [Errno 24] Too many open files`.
+    Requests beyond the limit wait in a bounded FIFO queue and are rejected with an AdmissionError when the queue is full.
+
+    Usage:
+        async with controller:
+            process = await asyncio.create_subprocess_exec(...)
+    """
+
+    FDS_PER_PROCESS = 6   # stdout & stderr pipes (both ends while spawning), the exec error pipe and the child watcher
+    FDS_RESERVED = 64     # headroom for stdio, sockets, log and session files
+    QUEUE_DEFAULT = 10000 # maximum waiting requests
+
+
+    def __init__(self, limit:int=None, queue:int=QUEUE_DEFAULT, reserved:int=FDS_RESERVED) -> None:
+        """
+        - limit (int): the maximum number of concurrent processes. Default: derived from `RLIMIT_NOFILE`
+        - queue (int): the maximum number of waiting requests. Default: `QUEUE_DEFAULT`
+        - reserved (int): the file descriptors reserved for everything else. Default: `FDS_RESERVED`
+        """
+        self.limit = self.max_processes(reserved) if limit is None else limit
+        if self.limit < 1: raise ValueError(f"Invalid limit: {self.limit}")
+        if queue < 0: raise ValueError(f"Invalid queue: {queue}")
+        self.queue = queue
+        self.active = 0           # admitted and not yet released
+        self.waiters = collections.deque() # futures of the waiting requests
+        self.admitted = 0         # total admitted
+        self.rejected = 0         # total rejected
+        self.waited = 0           # total admitted after waiting
+        self.wait_time = 0.0      # total seconds waited
+        self.wait_time_max = 0.0  # longest wait, in seconds
+
+
+    @classmethod
+    def max_processes(self, reserved:int=FDS_RESERVED) -> int:
+        """
+        Returns the number of concurrent processes the soft `RLIMIT_NOFILE` allows after the reserved file descriptors.
+        """
+        soft,_hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        soft = 65536 if soft == resource.RLIM_INFINITY else soft
+        return max(1, (soft - reserved) // self.FDS_PER_PROCESS)
+
+
+    @property
+    def depth(self) -> int:
+        """
+        The number of requests waiting for admission.
+        """
+        return len(self.waiters)
+
+
+    def stats(self) -> dict:
+        """
+        Returns a dictionary of the admission statistics.
+        """
+        return {
+            'limit' : self.limit,
+            'active' : self.active,
+            'depth' : self.depth,
+            'admitted' : self.admitted,
+            'rejected' : self.rejected,
+            'wait_avg' : self.wait_time / self.waited if self.waited else 0.0,
+            'wait_max' : self.wait_time_max,
+        }
+
+
+    async def acquire(self) -> None:
+        """
+        Waits until the request is admitted.
+        - raises AdmissionError when the queue is full
+        """
+        if self.active < self.limit and len(self.waiters) == 0:
+            self.active += 1
+            self.admitted += 1
+            return
+        if len(self.waiters) >= self.queue:
+            self.rejected += 1
+            raise AdmissionError(f"Admission queue is full: {len(self.waiters)} requests waiting for {self.limit} radclient processes (RLIMIT_NOFILE)")
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append(future)
+        start = time.monotonic()
+        try:
+            await future # 💡 release() hands over its slot without decrementing `active`
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release() # admitted while being cancelled
+            elif future in self.waiters: # 💡 release() or resize() may have dropped it already
+                self.waiters.remove(future)
+            raise
+        wait = time.monotonic() - start
+        self.admitted += 1
+        self.waited += 1
+        self.wait_time += wait
+        self.wait_time_max = max(self.wait_time_max, wait)
+
+
+    def resize(self, limit:int=None) -> None:
+        """
+        Changes the maximum number of concurrent processes and admits the waiting requests up to a higher limit.
+        Above a lower limit, released slots are not handed over until the active processes are below it.
+        """
+        if limit is None or limit < 1: raise ValueError(f"Invalid limit: {limit}")
+        self.limit = limit
+        while self.active < self.limit and len(self.waiters) > 0:
+            future = self.waiters.popleft()
+            if not future.done():
+                self.active += 1
+                future.set_result(None)
+
+
+    def release(self) -> None:
+        """
+        Releases an admitted request's slot to the next waiting request, if any.
+        """
+        while self.active <= self.limit and len(self.waiters) > 0:
+            future = self.waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+
+    async def __aenter__(self) -> 'AdmissionController':
+        await self.acquire()
+        return self
+
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+
+
+
+class LatencyHistogram():
+    """
+    A fixed-size latency histogram with logarithmic buckets, like HdrHistogram: values are counted in microseconds
+    with `PRECISION_BITS` significant bits, a relative error below 1%, in the same memory however many samples it holds.
+    Histograms of many RADNADs or `load` workers are combined with `merge()`.
+    """
+
+    PRECISION_BITS = 7   # significant bits: exact below 128 µs, then 64 buckets per power of 2
+    MAX_BITS = 36        # values up to 2^36 µs (19 hours); larger values are counted as the maximum
+    PERCENTILES = [0.50, 0.90, 0.99, 0.999]
+    OUTCOMES = {         # response type : outcome
+        RADIUSResponse.ACCESS_ACCEPT : 'accept',
+        RADIUSResponse.ACCESS_REJECT : 'reject',
+        RADIUSResponse.ACCESS_CHALLENGE : 'challenge',
+        RADIUSResponse.ACCOUNTING_RESPONSE : 'accept',
+    }
+    OUTCOME_TIMEOUT = 'timeout'
+    OUTCOME_ERROR = 'error'
+
+
+    def __init__(self) -> None:
+        self.counts = [0] * self.index((1 << self.MAX_BITS) - 1) + [0]
+        self.count = 0   # samples
+        self.total = 0.0 # sum of the samples, in seconds
+        self.min = None  # smallest sample, in seconds
+        self.max = None  # largest sample, in seconds
+
+
+    @classmethod
+    def index(self, us:int=0) -> int:
+        """
+        Returns the bucket of the value in microseconds.
+        """
+        shift = us.bit_length() - self.PRECISION_BITS
+        if shift <= 0: return us
+        half = 1 << (self.PRECISION_BITS - 1)
+        return (shift + 1) * half + (us >> shift) - half
+
+
+    @classmethod
+    def value(self, index:int=0) -> float:
+        """
+        Returns the middle value, in seconds, of the bucket.
+        """
+        half = 1 << (self.PRECISION_BITS - 1)
+        if index < 2 * half: return index / 1e6
+        shift = index // half - 1
+        return (((index % half + half) << shift) + (1 << shift) / 2) / 1e6
+
+
+    def record(self, seconds:float=0) -> None:
+        """
+        Count a latency sample, in seconds.
+        """
+        us = min(max(0, int(seconds * 1e6)), (1 << self.MAX_BITS) - 1)
+        self.counts[self.index(us)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+
+    def merge(self, other:'LatencyHistogram'=None) -> 'LatencyHistogram':
+        """
+        Adds the other histogram's samples to this one and returns it.
+        """
+        for n,count in enumerate(other.counts):
+            if count: self.counts[n] += count
+        self.count += other.count
+        self.total += other.total
+        for name,better in [('min', min), ('max', max)]:
+            values = [value for value in [getattr(self, name), getattr(other, name)] if value is not None]
+            setattr(self, name, better(values) if values else None)
+        return self
+
+
+    def percentile(self, p:float=0.99) -> float:
+        """
+        Returns the p percentile (0-1) of the samples, in seconds, or None without samples.
+        """
+        if self.count == 0: return None
+        rank = max(1, math.ceil(p * self.count))
+        seen = 0
+        for n,count in enumerate(self.counts):
+            seen += count
+            if seen >= rank: return min(max(self.value(n), self.min), self.max)
+        return self.max
+
+
+    def cumulative(self, bounds:list=None) -> list:
+        """
+        Returns the number of samples less than or equal to each bound, in seconds, like Prometheus histogram buckets.
+        The counts are approximate: each sample is compared at the middle value of its bucket.
+        """
+        counts = [0] * len(bounds)
+        for n,count in enumerate(self.counts):
+            if count == 0: continue
+            value = self.value(n)
+            for b,bound in enumerate(bounds):
+                if value <= bound: counts[b] += count
+        return counts
+
+
+    def __repr__(self) -> str:
+        return f"LatencyHistogram(count={self.count}, p50={self.percentile(0.50)}, p99={self.percentile(0.99)}, max={self.max})"
+
+
+    @classmethod
+    def report(self, histograms:dict=None) -> list:
+        """
+        Returns a list of dictionaries with the count, mean, percentiles and maximum, in milliseconds, of each histogram.
+
+        - histograms (dict): (scenario, request type, outcome) : LatencyHistogram
+        """
+        rows = []
+        for (scenario, request, outcome),histogram in sorted(histograms.items()):
+            if histogram.count == 0: continue
+            row = {'scenario': scenario, 'request': request, 'outcome': outcome, 'count': histogram.count, 'mean_ms': 1000 * histogram.total / histogram.count}
+            for p in self.PERCENTILES:
+                row[f"p{p * 100:g}_ms"] = 1000 * histogram.percentile(p)
+            row['max_ms'] = 1000 * histogram.max
+            rows.append(row)
+        return rows
+
+
+
+
+class MetricsServer():
+    """
+    Serves `RADNAD.metrics()` in the Prometheus text format on a local HTTP `/metrics` endpoint for long-running simulators.
+    Requires the optional `aiohttp` package.
+
+    Usage:
+        metrics = MetricsServer(radnad, port=9812)
+        await metrics.start()
+        ...
+        await metrics.close()
+    """
+
+    HOST_DEFAULT = '127.0.0.1'
+    PORT_DEFAULT = 9812
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+    def __init__(self, radnad:'RADNAD'=None, host:str=HOST_DEFAULT, port:int=PORT_DEFAULT) -> None:
+        """
+        - radnad (RADNAD): the RADNAD to export
+        - host (str): the local address to listen on. Default: `HOST_DEFAULT`
+        - port (int): the TCP port to listen on. Default: `PORT_DEFAULT`
+        """
+        if radnad is None: raise ValueError(f"radnad is None")
+        self.radnad = radnad
+        self.host = host
+        self.port = port
+        self.runner = None # aiohttp.web.AppRunner
+
+
+    async def start(self) -> None:
+        """
+        Start listening for `/metrics` requests.
+        - raises ImportError without `aiohttp`
+        """
+        from aiohttp import web # 💡 optional: only needed with metrics
+        app = web.Application()
+        app.router.add_get('/metrics', self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+        log.info(f"{RADNAD.ICONS['INFO']} MetricsServer: http://{self.host}:{self.port}/metrics")
+
+
+    async def handle(self, request):
+        from aiohttp import web
+        return web.Response(body=self.radnad.metrics().encode('utf-8'), headers={'Content-Type': self.CONTENT_TYPE})
+
+
+    async def close(self) -> None:
+        """
+        Stop listening.
+        """
+        if self.runner: await self.runner.cleanup()
+        self.runner = None
+
+
+
+
+class Profiler():
+    """
+    Profiles a `radnad.py` or `radnad-periodic.py` run to show where the time or memory goes,
+    like `RADIUSResponse` parsing, building DataFrames or spawning `radclient`.
+    The `cpu` mode profiles every function call with cProfile and writes the `.pstats` file and a `.txt` report of the top functions.
+    The `mem` mode traces allocations with tracemalloc, takes a snapshot at the end of each phase
+    and writes a `.txt` report of the top lines allocating memory in each phase.
+
+    Usage:
+        profiler = Profiler(Profiler.MODE_MEM).start()
+        profiler.phase('startup')       # a snapshot at the end of each phase
+        profiler.phase('session load')
+        profiler.phase('steady state')  # again for the latest steady state
+        profiler.phase('shutdown')
+        profiler.stop()                 # write the report
+    """
+
+    MODE_CPU = 'cpu'
+    MODE_MEM = 'mem'
+    MODES = [MODE_CPU, MODE_MEM]
+    FILENAME_DEFAULT = 'radnad' # the report files are `{filename}.{mode}.txt` and `{filename}.cpu.pstats`
+    TOP = 25 # functions or lines in each report
+    FRAMES = 1 # tracemalloc frames of each allocation: its line
+
+
+    def __init__(self, mode:str=MODE_CPU, filename:str=FILENAME_DEFAULT, top:int=TOP) -> None:
+        """
+        - mode (str): one of `MODES`. Default: `MODE_CPU`
+        - filename (str): the report filename without the extension. Default: `FILENAME_DEFAULT`
+        - top (int): the number of functions or lines in each report. Default: `TOP`
+        """
+        if mode not in self.MODES: raise ValueError(f"Invalid mode: {mode} is not one of {self.MODES}")
+        if top < 1: raise ValueError(f"Invalid top: {top}")
+        self.mode = mode
+        self.filename = filename
+        self.top = top
+        self.profile = None  # cProfile.Profile
+        self.snapshots = {}  # phase : tracemalloc.Snapshot, in phase order
+        self.started = None  # time.perf_counter()
+
+
+    def start(self) -> 'Profiler':
+        """
+        Start profiling and return the profiler.
+        """
+        self.started = time.perf_counter()
+        if self.mode == self.MODE_CPU:
+            import cProfile
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        else:
+            import tracemalloc
+            if not tracemalloc.is_tracing(): tracemalloc.start(self.FRAMES) # 💡 `python -X tracemalloc` also traces the imports
+        return self
+
+
+    def phase(self, name:str=None) -> None:
+        """
+        End the phase: take a `mem` snapshot of the allocations, replacing an earlier snapshot of the same phase.
+        """
+        if self.mode != self.MODE_MEM or self.started is None: return
+        import tracemalloc
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        ])
+        self.snapshots.pop(name, None)
+        self.snapshots[name] = snapshot
+        log.info(f"{RADNAD.ICONS['INFO']} Profiler: {name} {sum(stat.size for stat in snapshot.statistics('filename')) / 1024:0.1f} KiB")
+
+
+    def stop(self) -> list:
+        """
+        Stop profiling, write the report files and return their names.
+        """
+        if self.started is None: return []
+        elapsed = time.perf_counter() - self.started
+        self.started = None
+        if self.mode == self.MODE_CPU:
+            import pstats
+            self.profile.disable()
+            filenames = [f"{self.filename}.cpu.pstats", f"{self.filename}.cpu.txt"]
+            self.profile.dump_stats(filenames[0]) # 💡 `python -m pstats` or snakeviz
+            with open(filenames[1], 'w') as file:
+                print(f"# {RADNAD.ICONS['INFO']} cProfile: {elapsed:0.3f} seconds", file=file)
+                stats = pstats.Stats(self.profile, stream=file).strip_dirs()
+                stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+                stats.sort_stats(pstats.SortKey.TIME).print_stats(self.top)
+            return filenames
+
+        import tracemalloc
+        current,peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        filenames = [f"{self.filename}.mem.txt"]
+        with open(filenames[0], 'w') as file:
+            print(f"# {RADNAD.ICONS['INFO']} tracemalloc: {elapsed:0.3f} seconds, {current / 1024:0.1f} KiB current, {peak / 1024:0.1f} KiB peak", file=file)
+            previous = None
+            for name,snapshot in self.snapshots.items():
+                stats = snapshot.statistics('lineno') if previous is None else snapshot.compare_to(previous, 'lineno')
+                print(f"\n## {name}: {sum(stat.size for stat in snapshot.statistics('filename')) / 1024:0.1f} KiB{'' if previous is None else ', top changes since the previous phase'}", file=file)
+                for stat in stats[:self.top]:
+                    print(stat, file=file)
+                previous = snapshot
+        self.snapshots = {}
+        return filenames
+
+
+
+
+class RADNADDaemon():
+    """
+    Serves `radnad.py` commands from a long-running RADNAD on a local Unix socket, so the commands are thin clients:
+    the sessions, the Acct-Session-Id counter and the transports stay in one process, each command is one socket round trip
+    and concurrent commands never reuse a session ID. Each request and reply is one line of JSON.
+    The daemon also stops the expired sessions.
+
+    Usage:
+        daemon = RADNADDaemon(radnad, 'radnad.sock')
+        await daemon.run()                                              # until SIGINT or SIGTERM
+
+        reply = RADNADDaemon.request('radnad.sock', {'scenario': 'mab'}) # {'stdout': '...', 'stderr': '...'}
+    """
+
+    PATH_DEFAULT = 'radnad.sock' # Unix socket
+    LIMIT = 1 << 20              # bytes in a request
+    TIMEOUT = 600                # seconds a client waits for the reply to its command
+    EXPIRY_PERIOD = 5.0          # maximum seconds between stopping the expired sessions
+
+
+    def __init__(self, radnad:'RADNAD'=None, path:str=PATH_DEFAULT) -> None:
+        """
+        - radnad (RADNAD): the RADNAD running the commands
+        - path (str): the Unix socket to listen on. Default: `PATH_DEFAULT`
+        """
+        if radnad is None: raise ValueError(f"radnad is None")
+        if path is None or path == '': raise ValueError(f"Must specify a socket path")
+        self.radnad = radnad
+        self.path = path
+        self.server = None  # asyncio.Server
+        self.expiry = None  # asyncio.Task stopping the expired sessions
+
+
+    @classmethod
+    def request(self, path:str=PATH_DEFAULT, command:dict=None, timeout:float=TIMEOUT) -> dict:
+        """
+        Returns the daemon's reply to the command, like `{'stdout': '...', 'stderr': '...'}`.
+        - timeout (float): the seconds to wait for the reply. Default: `TIMEOUT`
+        - raises ConnectionRefusedError or FileNotFoundError without a running daemon
+        - raises PermissionError for the socket of another user, TimeoutError without a reply in time, and ConnectionError for an empty reply
+        """
+        request = json.dumps(command).encode('utf-8') + b'\n'
+        if len(request) > self.LIMIT: raise ValueError(f"Invalid command: {len(request)} bytes is over the {self.LIMIT} bytes limit")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(timeout) # 💡 a hung daemon does not block the command forever
+            client.connect(path)
+            client.sendall(request)
+            reply = b''.join(iter(lambda: client.recv(65536), b'')) # 💡 the daemon closes the connection after its reply
+        if not reply: raise ConnectionError(f"No reply from the daemon on {path}")
+        return json.loads(reply)
+
+
+    @classmethod
+    def running(self, path:str=PATH_DEFAULT) -> bool:
+        """
+        Returns True if a daemon is listening on the socket.
+        """
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client: client.connect(path)
+            return True
+        except OSError:
+            return False
+
+
+    async def start(self) -> None:
+        """
+        Start listening for commands and stopping the expired sessions.
+        """
+        if self.running(self.path): raise ValueError(f"Invalid socket: a daemon is running on {self.path}")
+        if os.path.exists(self.path): os.remove(self.path) # 💡 stale socket of a daemon that was killed
+        umask = os.umask(0o177) # 💡 only this user may send requests, from the moment the socket is created
+        try:
+            self.server = await asyncio.start_unix_server(self.handle, path=self.path, limit=self.LIMIT)
+        finally:
+            os.umask(umask)
+        self.expiry = asyncio.create_task(self.expire())
+        log.info(f"{RADNAD.ICONS['INFO']} RADNADDaemon: {self.path}")
+
+
+    async def run(self) -> None:
+        """
+        Serve commands until SIGINT (Ctrl+C) or SIGTERM.
+        """
+        await self.start()
+        loop = asyncio.get_running_loop()
+        stopped = asyncio.Event()
+        for signum in [signal.SIGINT, signal.SIGTERM]: loop.add_signal_handler(signum, stopped.set)
+        try:
+            await stopped.wait()
+        finally:
+            for signum in [signal.SIGINT, signal.SIGTERM]: loop.remove_signal_handler(signum)
+            await self.close()
+
+
+    async def expire(self) -> None:
+        """
+        Stop the expired sessions at their expiry or every `EXPIRY_PERIOD`.
+        """
+        while True:
+            try:
+                await self.radnad.stop_expired_sessions()
+            except Exception as e:
+                log.error(f"{RADNAD.ICONS['ERROR']} RADNADDaemon.expire(): {e.__class__} | {e}")
+            await self.radnad.expiry.wait(self.EXPIRY_PERIOD)
+
+
+    async def handle(self, reader:asyncio.StreamReader=None, writer:asyncio.StreamWriter=None) -> None:
+        """
+        Run the command of one request with `radnad_command()` and reply with its output.
+        With `stats`, the output ends with the latencies of this command's requests.
+        """
+        out,err = io.StringIO(),io.StringIO()
+        try:
+            line = await reader.readline() # 💡 raises ValueError over `LIMIT`
+            if not line: # 💡 a connection test by `running()`
+                writer.close()
+                return
+            command = json.loads(line)
+            log.info(f"{RADNAD.ICONS['INFO']} RADNADDaemon: {command.get('scenario', None)}")
+            latency = {}
+            RADNAD.LATENCY_SCOPE.set(latency) # 💡 each connection is a task, so only this command's requests are recorded
+            await radnad_command(self.radnad, command, out, err)
+            if command.get('stats', False) and len(latency) > 0:
+                print(tabulate.tabulate(LatencyHistogram.report(latency), headers='keys', tablefmt="simple", floatfmt='0.1f'), file=out)
+        except (TimeoutError, asyncio.TimeoutError) as e:
+            print(f"✖ No Reply. Timeout/Dropped:\n{e}", file=err)
+        except Exception as e:
+            print(f"✖ {e.__class__} | {e}", file=err)
+        try:
+            writer.write(json.dumps({'stdout': out.getvalue(), 'stderr': err.getvalue()}).encode('utf-8') + b'\n')
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass # the client is gone
+
+
+    async def close(self) -> None:
+        """
+        Stop listening and stopping the expired sessions, and remove the socket.
+        """
+        if self.expiry is not None: self.expiry.cancel()
+        self.expiry = None
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            if os.path.exists(self.path): os.remove(self.path)
+        self.server = None
+
+
+
+
+class RADIUSServer():
+    """
+    A RADIUS server and its request statistics for load distribution.
+    """
+
+    LATENCY_SAMPLES = 256    # recent round trip times kept for the percentiles
+    LATENCY_SAMPLES_MIN = 20 # samples required before `percentile()` returns a value
+
+    def __init__(self, host:str=None) -> None:
+        """
+        - host (str): the RADIUS server hostname or IP address. The hostname is resolved once.
+        """
+        if host is None or host == '': raise ValueError(f"Must specify a RADIUS server name or address")
+        self.host = host
+        try:
+            self.address = socket.gethostbyname(host) # 💡 resolve once instead of every radclient process
+        except OSError as e:
+            log.warning(f"{RADNAD.ICONS['WARN']} RADIUSServer: Unable to resolve {host}: {e}")
+            self.address = host
+        self.outstanding = 0  # requests awaiting a reply
+        self.requests = 0     # total requests
+        self.errors = 0       # total timeouts
+        self.rtt = None       # EWMA round trip time, in seconds
+        self.error_rate = 0.0 # EWMA error rate (0-1)
+        self.latencies = collections.deque(maxlen=self.LATENCY_SAMPLES) # recent round trip times, in seconds
+
+
+    def percentile(self, p:float=0.95) -> float:
+        """
+        Returns the p percentile (0-1) of the recent round trip times, in seconds, or None without enough samples.
+        """
+        if len(self.latencies) < self.LATENCY_SAMPLES_MIN: return None
+        latencies = sorted(self.latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+
+    def __repr__(self) -> str:
+        return f"RADIUSServer({self.host}, address={self.address}, outstanding={self.outstanding}, rtt={self.rtt}, error_rate={self.error_rate:0.3f})"
+
+
+    def stats(self) -> dict:
+        """
+        Returns a dictionary of the server statistics.
+        """
+        return {
+            'host' : self.host,
+            'address' : self.address,
+            'outstanding' : self.outstanding,
+            'requests' : self.requests,
+            'errors' : self.errors,
+            'rtt_ms' : None if self.rtt is None else self.rtt * 1000,
+            'p95_ms' : None if self.percentile(0.95) is None else self.percentile(0.95) * 1000,
+            'error_rate' : self.error_rate,
+        }
+
+
+
+
+class ServerPool():
+    """
+    Distributes requests over one or more RADIUS servers with a selection policy:
+    - `round-robin` : each server in turn
+    - `least-outstanding` : the server with the fewest requests awaiting a reply
+    - `latency-weighted` : randomly, weighted by the inverse of the EWMA round trip time and the success rate
+    - a callable `policy(servers) -> RADIUSServer` for a custom policy
+    """
+
+    POLICY_ROUND_ROBIN = 'round-robin'
+    POLICY_LEAST_OUTSTANDING = 'least-outstanding'
+    POLICY_LATENCY_WEIGHTED = 'latency-weighted'
+    POLICIES = [POLICY_ROUND_ROBIN, POLICY_LEAST_OUTSTANDING, POLICY_LATENCY_WEIGHTED]
+    POLICY_DEFAULT = POLICY_ROUND_ROBIN
+
+    EWMA_ALPHA = 0.2     # weight of the newest sample
+    RTT_DEFAULT = 0.010  # seconds, assumed for servers without any replies yet
+    ERROR_RATE_MAX = 0.99
+
+
+    def __init__(self, hosts:list=None, policy=POLICY_DEFAULT) -> None:
+        """
+        - hosts ([str]): the RADIUS server hostnames or IP addresses
+        - policy (str or callable): one of `POLICIES` or a callable `policy(servers) -> RADIUSServer`. Default: `POLICY_DEFAULT`
+        """
+        if hosts is None or len(hosts) == 0: raise ValueError(f"Must specify a RADIUS server name or address")
+        if not callable(policy) and policy not in self.POLICIES: raise ValueError(f"Invalid policy: {policy}")
+        self.servers = [RADIUSServer(host) for host in hosts]
+        self.policy = policy
+        self.next = 0 # round-robin index
+
+
+    def __len__(self) -> int:
+        return len(self.servers)
+
+
+    def __iter__(self):
+        return iter(self.servers)
+
+
+    def select(self, exclude:RADIUSServer=None) -> RADIUSServer:
+        """
+        Returns the server for the next request.
+
+        - exclude (RADIUSServer): a server not to select, for a hedged request. Returns None if there is no other server.
+        """
+        servers = self.servers if exclude is None else [server for server in self.servers if server is not exclude]
+        if len(servers) <= 1: return servers[0] if servers else None
+        if callable(self.policy): return self.policy(servers)
+        if self.policy == self.POLICY_LEAST_OUTSTANDING:
+            fewest = min(server.outstanding for server in servers)
+            candidates = [server for server in servers if server.outstanding == fewest]
+            self.next += 1
+            return candidates[self.next % len(candidates)]
+        if self.policy == self.POLICY_LATENCY_WEIGHTED:
+            known = [server.rtt for server in servers if server.rtt is not None]
+            default = min(known) if known else self.RTT_DEFAULT # 💡 try new servers as if they were the fastest
+            weights = [(1 - min(server.error_rate, self.ERROR_RATE_MAX)) / max(server.rtt if server.rtt else default, 0.0001) for server in servers]
+            return random.choices(servers, weights=weights)[0]
+        self.next = (self.next + 1) % len(servers)
+        return servers[self.next]
+
+
+    def get(self, address:str=None) -> RADIUSServer:
+        """
+        Returns the server with the hostname or address or None if there is no such server.
+        """
+        return next((server for server in self.servers if address in [server.address, server.host]), None)
+
+
+    def start(self, server:RADIUSServer=None, n:int=1) -> None:
+        """
+        Record the start of n requests to the server.
+        """
+        server.outstanding += n
+
+
+    def cancel(self, server:RADIUSServer=None, n:int=1) -> None:
+        """
+        Record the cancellation of n requests to the server.
+        """
+        server.outstanding -= n
+
+
+    def finish(self, server:RADIUSServer=None, errors:list=None, rtt:float=None) -> None:
+        """
+        Record the end of the requests to the server with an error flag for each one.
+
+        - rtt (float): the round trip time, in seconds, of a single request or None when it is unknown (coalesced or batched requests)
+        """
+        server.outstanding -= len(errors)
+        for error in errors:
+            server.requests += 1
+            server.errors += 1 if error else 0
+            server.error_rate += self.EWMA_ALPHA * ((1.0 if error else 0.0) - server.error_rate)
+        if rtt is not None and errors == [False]:
+            server.rtt = rtt if server.rtt is None else server.rtt + self.EWMA_ALPHA * (rtt - server.rtt)
+            server.latencies.append(rtt)
+
+
+
+
+class SessionRecord():
+    """
+    An active session with a slot for each of the `RADNAD.SESSION_COLUMNS`.
+    """
+
+    FIELDS = ['timestamp', 'method', 'status', 'user_name', 'calling_station_id', 'framed_ip_address', 'session_timeout', 'acct_session_id',
+              'called_station_id', 'nas_port_type', 'nas_port_id', 'nas_port', 'nas_identifier', 'nas_ip_address', 'server', 'class_', 'other'] # in `RADNAD.SESSION_COLUMNS` order
+    __slots__ = FIELDS
+
+    def __init__(self, session:dict=None, timestamp:float=None) -> None:
+        """
+        - session (dict): the session's `RADNAD.SESSION_COLUMNS` values. Missing columns are ''.
+        - timestamp (float): the session start time (epoch seconds). Default: the session's Timestamp
+        """
+        for field,column in zip(self.FIELDS, RADNAD.SESSION_COLUMNS):
+            setattr(self, field, session.get(column, ''))
+        if timestamp is not None: self.timestamp = timestamp
+        self.session_timeout = int(self.session_timeout or 0)
+
+
+    def __repr__(self) -> str:
+        return f"SessionRecord({self.to_dict()})"
+
+
+    def __getitem__(self, column:str=None):
+        if column not in RADNAD.SESSION_COLUMNS: raise KeyError(column)
+        return self.get(column)
+
+
+    def get(self, column:str=None, default=None):
+        """
+        Returns the value of the `RADNAD.SESSION_COLUMNS` column.
+        """
+        try:
+            return getattr(self, self.FIELDS[RADNAD.SESSION_COLUMNS.index(column)])
+        except ValueError:
+            return default
+
+
+    def to_dict(self) -> dict:
+        """
+        Returns a dictionary of the session's `RADNAD.SESSION_COLUMNS` values.
+        """
+        return {column:getattr(self, field) for field,column in zip(self.FIELDS, RADNAD.SESSION_COLUMNS)}
+
+
+
+
+class SessionStore():
+    """
+    The active sessions as `SessionRecord`s by Acct-Session-Id, in the order they started,
+    with secondary indexes on the `INDEXES` columns so creating, finding and removing a session does not scan the others.
+
+    Usage:
+        store = SessionStore()
+        store.add({'Acct-Session-Id': '1', 'User-Name': 'thomas', 'Method': 'PAP'}, time.time())
+        store.get('1')
+        store.find('User-Name', 'thomas')
+        store.remove('1')
+        store.to_dataframe()
+    """
+
+    INDEXES = ['Calling-Station-Id', 'User-Name', 'Method'] # secondary index columns
+
+
+    def __init__(self) -> None:
+        self.records = {} # Acct-Session-Id : SessionRecord
+        self.indexes = {column:collections.defaultdict(dict) for column in self.INDEXES} # column : value : {Acct-Session-Id : SessionRecord}
+
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+    def __iter__(self):
+        return iter(self.records.values())
+
+
+    def __contains__(self, sid) -> bool:
+        return str(sid) in self.records
+
+
+    def add(self, session=None, timestamp:float=None) -> SessionRecord:
+        """
+        Add or replace the session and return its record.
+
+        - session (dict or SessionRecord): the session's `RADNAD.SESSION_COLUMNS` values
+        - timestamp (float): the session start time (epoch seconds). Default: the session's Timestamp
+        """
+        record = session if isinstance(session, SessionRecord) else SessionRecord(session, timestamp)
+        sid = str(record.acct_session_id)
+        if sid in self.records: self.remove(sid)
+        self.records[sid] = record
+        for column,index in self.indexes.items():
+            index[record.get(column)][sid] = record
+        return record
+
+
+    def get(self, sid:str=None) -> SessionRecord:
+        """
+        Returns the session's record or None.
+        """
+        return self.records.get(str(sid), None)
+
+
+    def remove(self, sid:str=None) -> SessionRecord:
+        """
+        Remove and return the session's record or None.
+        """
+        sid = str(sid)
+        record = self.records.pop(sid, None)
+        if record is None: return None
+        for column,index in self.indexes.items():
+            value = record.get(column)
+            sessions = index.get(value, None)
+            if sessions is None: continue
+            sessions.pop(sid, None)
+            if len(sessions) == 0: del index[value]
+        return record
+
+
+    def find(self, column:str=None, value=None) -> list:
+        """
+        Returns the records of the sessions with the value of an `INDEXES` column.
+        """
+        if column not in self.indexes: raise ValueError(f"Invalid column: {column} is not one of {self.INDEXES}")
+        return list(self.indexes[column].get(value, {}).values())
+
+
+    def count(self, column:str=None) -> dict:
+        """
+        Returns a dictionary of the number of sessions with each value of an `INDEXES` column.
+        """
+        if column not in self.indexes: raise ValueError(f"Invalid column: {column} is not one of {self.INDEXES}")
+        return {value:len(sessions) for value,sessions in self.indexes[column].items()}
+
+
+    def sample(self, n:int=1) -> list:
+        """
+        Returns the records of up to n random sessions.
+        """
+        return random.sample(list(self.records.values()), min(n, len(self.records)))
+
+
+    def bytes_per_session(self) -> float:
+        """
+        Returns the approximate memory, in bytes, of each session: its record, values and index entries. Shared values are counted once.
+        """
+        if len(self.records) == 0: return 0.0
+        size = sys.getsizeof(self.records) + sum(sys.getsizeof(index) + sum(sys.getsizeof(sessions) for sessions in index.values()) for index in self.indexes.values())
+        values = {id(sid):sys.getsizeof(sid) for sid in self.records}
+        for record in self.records.values():
+            size += sys.getsizeof(record)
+            values.update((id(value), sys.getsizeof(value)) for value in map(record.__getattribute__, SessionRecord.FIELDS))
+        return (size + sum(values.values())) / len(self.records)
+
+
+    def copy(self) -> 'SessionStore':
+        """
+        Returns a copy of the sessions sharing their records, to write them while the sessions change.
+        """
+        store = SessionStore()
+        store.records = dict(self.records)
+        store.indexes = {column:collections.defaultdict(dict, {value:dict(sessions) for value,sessions in index.items()}) for column,index in self.indexes.items()}
+        return store
+
+
+    def to_dataframe(self, records:list=None) -> 'pd.DataFrame':
+        """
+        Returns a DataFrame of the records, or all sessions, with `RADNAD.SESSION_COLUMNS` and the Timestamp index.
+        """
+        records = self.records.values() if records is None else records
+        sessions = pd.DataFrame([[getattr(record, field) for field in SessionRecord.FIELDS] for record in records], columns=RADNAD.SESSION_COLUMNS)
+        sessions['Timestamp'] = pd.to_datetime([datetime.datetime.fromtimestamp(timestamp, tz=None) for timestamp in sessions['Timestamp']]).floor('ms') # 💡 naive local time
+        return sessions.set_index(RADNAD.SESSION_COLUMNS[0])
+
+
+    def load_dataframe(self, sessions:'pd.DataFrame'=None) -> None:
+        """
+        Add the sessions of a DataFrame with the Timestamp index, like from the sessions CSV file.
+        """
+        for timestamp,session in zip(sessions.index, sessions.to_dict('records')):
+            self.add(session, pd.Timestamp(timestamp).to_pydatetime().timestamp()) # 💡 naive local time, like the index
+
+
+    def to_csv(self, filename:str=None) -> None:
+        """
+        Write all sessions to a CSV file with `RADNAD.SESSION_COLUMNS`, like `to_dataframe().to_csv()` without pandas.
+        """
+        with open(filename, 'w', newline='') as file:
+            writer = csv.writer(file, lineterminator='\n')
+            writer.writerow(RADNAD.SESSION_COLUMNS)
+            for record in self.records.values():
+                row = [getattr(record, field) for field in SessionRecord.FIELDS]
+                row[0] = datetime.datetime.fromtimestamp(row[0], tz=None).isoformat(sep=' ', timespec='milliseconds') # 💡 naive local time
+                writer.writerow(row)
+
+
+    def load_csv(self, filename:str=None) -> int:
+        """
+        Add the sessions of a CSV file with `RADNAD.SESSION_COLUMNS`, like the sessions file, without pandas.
+        Returns the largest numeric Acct-Session-Id or 0.
+        """
+        last = 0
+        with open(filename, newline='') as file:
+            for session in csv.DictReader(file, restval=''):
+                record = self.add(session, datetime.datetime.fromisoformat(session['Timestamp']).timestamp()) # 💡 naive local time
+                if record.acct_session_id.isdigit(): last = max(last, int(record.acct_session_id))
+        return last
+
+
+
+
+class SessionTable():
+    """
+    The active sessions in NumPy columns, with the `SessionStore` interface, for millions of sessions in one process.
+    Timestamps are int64 milliseconds, Session-Timeout and NAS-Port are int32 and the `CATEGORIES` columns are int32 codes
+    into a dictionary of their values; the per-session strings are object columns.
+    Expiry, sampling and counts are vectorized over the columns. Removing a session moves the last row into its place.
+
+    Usage:
+        table = SessionTable()
+        table.add({'Acct-Session-Id': '1', 'User-Name': 'thomas', 'Method': 'PAP', 'Session-Timeout': 3600}, time.time())
+        table.expired()             # the Acct-Session-Ids of the expired sessions
+        table.count('Method')       # {'PAP': 1}
+        table.bytes_per_session()
+    """
+
+    CAPACITY_DEFAULT = 1024 # rows, doubled when full
+    CATEGORIES = ['Method', 'Status', 'NAS-Port-Type', 'NAS-Port-Id', 'NAS-Identifier', 'NAS-IP-Address', 'Server', 'Other'] # dictionary-encoded columns
+    INTEGERS = ['Session-Timeout', 'NAS-Port'] # int32 columns
+    OBJECTS = ['User-Name', 'Calling-Station-Id', 'Framed-IP-Address', 'Acct-Session-Id', 'Called-Station-Id', 'Class'] # per-session values
+    MISSING = -1 # an empty integer column
+
+
+    def __init__(self, capacity:int=CAPACITY_DEFAULT) -> None:
+        """
+        - capacity (int): the initial number of rows. Default: `CAPACITY_DEFAULT`
+        """
+        if capacity < 1: raise ValueError(f"Invalid capacity: {capacity}")
+        self.size = 0                                                         # number of sessions
+        self.timestamps = np.zeros(capacity, dtype=np.int64)                  # session start times (epoch milliseconds)
+        self.integers = {column:np.zeros(capacity, dtype=np.int32) for column in self.INTEGERS}
+        self.codes = {column:np.zeros(capacity, dtype=np.int32) for column in self.CATEGORIES}
+        self.values = {column:[] for column in self.CATEGORIES}              # column : [value] by code
+        self.lookup = {column:{} for column in self.CATEGORIES}              # column : value : code
+        self.objects = {column:np.empty(capacity, dtype=object) for column in self.OBJECTS}
+        self.rows = {}                                                        # Acct-Session-Id : row
+        self.retries = {}                                                     # Acct-Session-Id : time (epoch seconds) to stop again after a failed Stop
+        self.rng = np.random.default_rng()
+
+
+    def __len__(self) -> int:
+        return self.size
+
+
+    def __iter__(self):
+        return (self.record(row) for row in range(self.size))
+
+
+    def __contains__(self, sid) -> bool:
+        return str(sid) in self.rows
+
+
+    def _reserve(self, n:int=1) -> None:
+        """
+        Grow the columns, doubling their capacity, to fit n more sessions.
+        """
+        capacity = len(self.timestamps)
+        if self.size + n <= capacity: return
+        while capacity < self.size + n: capacity *= 2
+        def grow(column:'np.ndarray') -> 'np.ndarray':
+            grown = np.zeros(capacity, dtype=column.dtype) if column.dtype != object else np.empty(capacity, dtype=object)
+            grown[:self.size] = column[:self.size]
+            return grown
+        self.timestamps = grow(self.timestamps)
+        self.integers = {column:grow(values) for column,values in self.integers.items()}
+        self.codes = {column:grow(codes) for column,codes in self.codes.items()}
+        self.objects = {column:grow(values) for column,values in self.objects.items()}
+
+
+    def encode(self, column:str=None, value=None) -> int:
+        """
+        Returns the code of the value of a `CATEGORIES` column, adding it to the column's dictionary if it is new.
+        """
+        code = self.lookup[column].get(value, None)
+        if code is None:
+            code = self.lookup[column][value] = len(self.values[column])
+            self.values[column].append(value)
+        return code
+
+
+    def record(self, row:int=None) -> SessionRecord:
+        """
+        Returns a SessionRecord copy of the row.
+        """
+        session = {column:self.values[column][self.codes[column][row]] for column in self.CATEGORIES}
+        for column in self.INTEGERS:
+            value = int(self.integers[column][row])
+            session[column] = '' if value == self.MISSING else value
+        for column in self.OBJECTS:
+            session[column] = self.objects[column][row]
+        return SessionRecord(session, int(self.timestamps[row]) / 1000)
+
+
+    def add(self, session=None, timestamp:float=None) -> SessionRecord:
+        """
+        Add or replace the session and return its record.
+
+        - session (dict or SessionRecord): the session's `RADNAD.SESSION_COLUMNS` values
+        - timestamp (float): the session start time (epoch seconds). Default: the session's Timestamp
+        """
+        if isinstance(session, SessionRecord):
+            timestamp = session.timestamp if timestamp is None else timestamp
+            session = session.to_dict()
+        sid = str(session['Acct-Session-Id'])
+        if sid in self.rows: self.remove(sid)
+        self._reserve(1)
+        row = self.size
+        self.size += 1
+        self.rows[sid] = row
+        self.timestamps[row] = round(1000 * (session['Timestamp'] if timestamp is None else timestamp))
+        for column in self.INTEGERS:
+            value = session.get(column, '')
+            self.integers[column][row] = self.MISSING if value is None or value == '' else int(value)
+        for column in self.CATEGORIES:
+            self.codes[column][row] = self.encode(column, session.get(column, ''))
+        for column in self.OBJECTS:
+            self.objects[column][row] = session.get(column, '')
+        return self.record(row)
+
+
+    def get(self, sid:str=None) -> SessionRecord:
+        """
+        Returns a record of the session or None.
+        """
+        row = self.rows.get(str(sid), None)
+        return None if row is None else self.record(row)
+
+
+    def remove(self, sid:str=None) -> SessionRecord:
+        """
+        Remove and return a record of the session or None.
+        """
+        row = self.rows.pop(str(sid), None)
+        if row is None: return None
+        self.retries.pop(str(sid), None)
+        record = self.record(row)
+        last = self.size - 1
+        if row != last: # 💡 move the last row into the hole to keep the rows contiguous
+            self.timestamps[row] = self.timestamps[last]
+            for columns in [self.integers, self.codes, self.objects]:
+                for values in columns.values(): values[row] = values[last]
+            self.rows[str(self.objects['Acct-Session-Id'][row])] = row
+        for values in self.objects.values(): values[last] = None
+        self.size = last
+        return record
+
+
+    def copy(self) -> 'SessionTable':
+        """
+        Returns a copy of the sessions, to write them while the sessions change.
+        """
+        n = self.size
+        table = SessionTable(max(1, n))
+        table.size = n
+        table.timestamps[:n] = self.timestamps[:n]
+        for copies,columns in [(table.integers, self.integers), (table.codes, self.codes), (table.objects, self.objects)]:
+            for column,values in columns.items(): copies[column][:n] = values[:n]
+        table.values = {column:list(values) for column,values in self.values.items()}
+        table.lookup = {column:dict(lookup) for column,lookup in self.lookup.items()}
+        table.rows = dict(self.rows)
+        table.retries = dict(self.retries)
+        return table
+
+
+    def _column(self, column:str=None) -> 'np.ndarray':
+        """
+        Returns the values of the column for all sessions.
+        """
+        if column in self.CATEGORIES: return np.array(self.values[column] + [None], dtype=object)[self.codes[column][:self.size]]
+        if column in self.INTEGERS: return self.integers[column][:self.size]
+        if column in self.OBJECTS: return self.objects[column][:self.size]
+        raise ValueError(f"Invalid column: {column}")
+
+
+    def find(self, column:str=None, value=None) -> list:
+        """
+        Returns the records of the sessions with the value of the column.
+        """
+        if column in self.CATEGORIES:
+            code = self.lookup[column].get(value, None)
+            rows = [] if code is None else np.flatnonzero(self.codes[column][:self.size] == code)
+        else:
+            rows = np.flatnonzero(self._column(column) == value)
+        return [self.record(row) for row in rows]
+
+
+    def count(self, column:str=None) -> dict:
+        """
+        Returns a dictionary of the number of sessions with each value of the column.
+        """
+        if column in self.CATEGORIES:
+            counts = np.bincount(self.codes[column][:self.size], minlength=len(self.values[column]))
+            return {self.values[column][code]:int(count) for code,count in enumerate(counts) if count > 0}
+        values,counts = np.unique(self._column(column), return_counts=True)
+        return {value:int(count) for value,count in zip(values.tolist(), counts)}
+
+
+    def sample(self, n:int=1) -> list:
+        """
+        Returns the records of up to n random sessions.
+        """
+        rows = self.rng.choice(self.size, min(n, self.size), replace=False) if self.size > 0 else []
+        return [self.record(row) for row in rows]
+
+
+    def expired(self, now:float=None, drop:float=None) -> list:
+        """
+        Returns the Acct-Session-Ids of the sessions past their Session-Timeout or, with `drop`, older than `drop` seconds.
+        """
+        now = round(1000 * (time.time() if now is None else now))
+        timestamps = self.timestamps[:self.size]
+        timeouts = self.integers['Session-Timeout'][:self.size].astype(np.int64) * 1000
+        expired = (timeouts > 0) & (timestamps + timeouts <= now)
+        if drop is not None: expired |= timestamps <= now - round(1000 * drop)
+        sids = self.objects['Acct-Session-Id'][:self.size][expired].tolist()
+        if len(self.retries) > 0: sids = [sid for sid in sids if 1000 * self.retries.get(str(sid), 0) <= now]
+        return sids
+
+
+    def retry(self, sid:str=None, after:float=None) -> None:
+        """
+        Leave an expired session out of `expired()` until the time (epoch seconds), after its Stop failed.
+        """
+        if str(sid) in self.rows: self.retries[str(sid)] = after
+
+
+    def to_dataframe(self, records:list=None) -> 'pd.DataFrame':
+        """
+        Returns a DataFrame of the records, or all sessions, with `RADNAD.SESSION_COLUMNS` and the Timestamp index.
+        """
+        if records is not None: return SessionStore().to_dataframe(records)
+        from dateutil import tz
+        sessions = pd.DataFrame({column:self._column(column) for column in RADNAD.SESSION_COLUMNS[1:]}, columns=RADNAD.SESSION_COLUMNS[1:])
+        if (sessions['NAS-Port'] == self.MISSING).any(): sessions['NAS-Port'] = sessions['NAS-Port'].astype(object).where(sessions['NAS-Port'] != self.MISSING, '')
+        timestamps = pd.to_datetime(self.timestamps[:self.size], unit='ms', utc=True).tz_convert(tz.tzlocal()).tz_localize(None) # 💡 naive local time
+        sessions.index = pd.DatetimeIndex(timestamps, name=RADNAD.SESSION_COLUMNS[0])
+        return sessions
+
+
+    def load_dataframe(self, sessions:'pd.DataFrame'=None) -> None:
+        """
+        Add the sessions of a DataFrame with the Timestamp index, like from the sessions CSV file, a column at a time.
+        """
+        n = len(sessions)
+        if n == 0: return
+        sids = sessions['Acct-Session-Id'].astype(str)
+        if sids.duplicated().any() or any(sid in self.rows for sid in sids):
+            for timestamp,session in zip(sessions.index, sessions.to_dict('records')): # replace sessions one at a time
+                self.add(session, pd.Timestamp(timestamp).to_pydatetime().timestamp())
+            return
+        from dateutil import tz
+        self._reserve(n)
+        rows = slice(self.size, self.size + n)
+        index = pd.DatetimeIndex(sessions.index).tz_localize(tz.tzlocal(), ambiguous=np.zeros(n, dtype=bool), nonexistent='shift_forward') # 💡 naive local time
+        self.timestamps[rows] = index.as_unit('ms').asi8
+        for column in self.INTEGERS:
+            values = sessions[column] if column in sessions.columns else pd.Series([''] * n)
+            self.integers[column][rows] = pd.to_numeric(values, errors='coerce').fillna(self.MISSING).astype(np.int32).to_numpy()
+        for column in self.CATEGORIES:
+            values = sessions[column] if column in sessions.columns else pd.Series([''] * n)
+            codes,uniques = pd.factorize(values.to_numpy(dtype=object), use_na_sentinel=False)
+            self.codes[column][rows] = np.array([self.encode(column, value) for value in uniques], dtype=np.int32)[codes]
+        for column in self.OBJECTS:
+            self.objects[column][rows] = sessions[column].to_numpy(dtype=object) if column in sessions.columns else ''
+        self.rows.update(zip(sids, range(self.size, self.size + n)))
+        self.size += n
+
+
+    def to_csv(self, filename:str=None) -> None:
+        """
+        Write all sessions to a CSV file with `RADNAD.SESSION_COLUMNS`.
+        """
+        self.to_dataframe().to_csv(filename, index=True)
+
+
+    def load_csv(self, filename:str=None) -> int:
+        """
+        Add the sessions of a CSV file with `RADNAD.SESSION_COLUMNS`, like the sessions file, a column at a time.
+        Returns the largest numeric Acct-Session-Id or 0.
+        """
+        sessions = pd.read_csv(filename, parse_dates=True, index_col=[RADNAD.SESSION_COLUMNS[0]]).fillna('')
+        self.load_dataframe(sessions)
+        last = pd.to_numeric(sessions['Acct-Session-Id'], errors='coerce').max() if len(sessions) > 0 else None
+        return 0 if pd.isna(last) else int(last)
+
+
+    def nbytes(self) -> int:
+        """
+        Returns the approximate memory, in bytes, of the sessions: the used rows of the columns, their values and the Acct-Session-Id index.
+        Shared values are counted once.
+        """
+        size = self.size * (self.timestamps.itemsize + sum(values.itemsize for values in self.integers.values()) + sum(codes.itemsize for codes in self.codes.values()))
+        size += sum(sys.getsizeof(values) + sys.getsizeof(self.lookup[column]) for column,values in self.values.items())
+        size += sum(values.itemsize * self.size for values in self.objects.values()) + sys.getsizeof(self.rows)
+        values = {id(value):sys.getsizeof(value) for values in self.values.values() for value in values}
+        for column in self.objects.values(): values.update((id(value), sys.getsizeof(value)) for value in column[:self.size])
+        values.update((id(sid), sys.getsizeof(sid)) for sid in self.rows)
+        return size + sum(values.values())
+
+
+    def bytes_per_session(self) -> float:
+        """
+        Returns the approximate memory, in bytes, of each session.
+        """
+        return self.nbytes() / self.size if self.size > 0 else 0.0
+
+
+
+
+class SessionSnapshot():
+    """
+    A binary snapshot of the sessions: a JSON header followed by fixed-width little-endian NumPy columns.
+    Timestamps are int64 milliseconds, the `SessionTable.INTEGERS` are int32, the `SessionTable.CATEGORIES` are int32 codes
+    into the header's values and the other columns are fixed-width UTF-8 bytes.
+    An opened snapshot memory-maps the columns and has the read-only `SessionStore` interface, so a read-only RADNAD
+    pages through the sessions without loading them and only reads the pages of the columns it uses.
+
+    Usage:
+        SessionSnapshot.save('radnad.sessions.bin', store, counter)
+        snapshot = SessionSnapshot('radnad.sessions.bin')
+        snapshot.get('1')
+        for sessions in snapshot.pages(100): print(sessions)
+        snapshot.load(SessionStore())
+    """
+
+    MAGIC = b'RADNAD\x01\n' # file signature and version
+    ALIGNMENT = 64          # bytes, of the header and each column
+    PAGE_SIZE = 1000        # sessions in each page
+
+
+    def __init__(self, filename:str=None) -> None:
+        """
+        - filename (str): the snapshot file, created with `save()`
+        """
+        if filename is None or filename == '': raise ValueError(f"Must specify a snapshot filename")
+        with open(filename, 'rb') as file:
+            if file.read(len(self.MAGIC)) != self.MAGIC: raise ValueError(f"Invalid sessions snapshot: {filename}")
+            length = int.from_bytes(file.read(8), 'little')
+            header = json.loads(file.read(length))
+        self.filename = filename
+        self.size = header['rows']          # number of sessions
+        self.counter = header['counter']    # the RADNAD's last Acct-Session-Id
+        self.values = header['values']      # column : [value] by code
+        data = np.memmap(filename, dtype=np.uint8, mode='r')
+        start = self.align(len(self.MAGIC) + 8 + length)
+        self.columns = {}                   # column : memory-mapped values
+        for column,(dtype,offset) in header['columns'].items():
+            dtype = np.dtype(dtype)
+            self.columns[column] = data[start + offset:start + offset + self.size * dtype.itemsize].view(dtype)
+        self.rng = np.random.default_rng()
+
+
+    def __len__(self) -> int:
+        return self.size
+
+
+    def __iter__(self):
+        return self.records()
+
+
+    def __contains__(self, sid) -> bool:
+        return len(self._rows('Acct-Session-Id', sid)) > 0
+
+
+    @classmethod
+    def align(self, offset:int=0) -> int:
+        """
+        Returns the offset rounded up to the `ALIGNMENT`.
+        """
+        return -(-offset // self.ALIGNMENT) * self.ALIGNMENT
+
+
+    @classmethod
+    def save(self, filename:str=None, sessions=None, counter:int=0) -> None:
+        """
+        Write the sessions to a new snapshot file and sync it to disk.
+
+        - filename (str): the snapshot file
+        - sessions (SessionStore or SessionTable): the sessions
+        - counter (int): the last Acct-Session-Id, restored without reading the sessions
+        """
+        values = {}
+        if isinstance(sessions, SessionTable): # 💡 already in columns
+            n = sessions.size
+            columns = {'Timestamp': sessions.timestamps[:n]}
+            columns.update({column:sessions.integers[column][:n] for column in SessionTable.INTEGERS})
+            for column in SessionTable.CATEGORIES:
+                columns[column] = sessions.codes[column][:n]
+                values[column] = sessions.values[column]
+            objects = {column:sessions.objects[column][:n] for column in SessionTable.OBJECTS}
+        else:
+            records = list(sessions)
+            fields = {column:[getattr(record, field) for record in records] for field,column in zip(SessionRecord.FIELDS, RADNAD.SESSION_COLUMNS)}
+            columns = {'Timestamp': np.round(np.array(fields['Timestamp'], dtype=np.float64) * 1000)}
+            for column in SessionTable.INTEGERS:
+                columns[column] = [SessionTable.MISSING if value is None or value == '' else int(value) for value in fields[column]]
+            for column in SessionTable.CATEGORIES:
+                codes,uniques = pd.factorize(np.array(fields[column], dtype=object), use_na_sentinel=False)
+                columns[column] = codes
+                values[column] = list(uniques)
+            objects = {column:fields[column] for column in SessionTable.OBJECTS}
+        columns = {column:np.ascontiguousarray(array, dtype=np.dtype(np.int64 if column == 'Timestamp' else np.int32).newbyteorder('<')) for column,array in columns.items()}
+        for column,strings in objects.items():
+            columns[column] = np.array([b'' if value is None else str(value).encode() for value in strings], dtype=bytes)
+
+        layout = {}
+        offset = 0
+        for column,array in columns.items():
+            layout[column] = [array.dtype.str, offset]
+            offset += self.align(array.nbytes)
+        header = json.dumps({'rows': len(columns['Timestamp']), 'counter': int(counter), 'columns': layout, 'values': values}, default=str).encode()
+        with open(filename, 'wb') as file:
+            file.write(self.MAGIC + len(header).to_bytes(8, 'little') + header)
+            file.write(bytes(self.align(file.tell()) - file.tell()))
+            for array in columns.values():
+                file.write(array.tobytes())
+                file.write(bytes(self.align(array.nbytes) - array.nbytes))
+            file.flush()
+            os.fsync(file.fileno())
+
+
+    def _column(self, column:str=None, rows=slice(None)) -> 'np.ndarray':
+        """
+        Returns the values of the column for the rows, decoding only those rows.
+        """
+        if column in SessionTable.CATEGORIES: return np.array(self.values[column] + [None], dtype=object)[self.columns[column][rows]]
+        if column in SessionTable.INTEGERS: return self.columns[column][rows]
+        if column in SessionTable.OBJECTS: return np.array([value.decode() for value in self.columns[column][rows].tolist()], dtype=object)
+        raise ValueError(f"Invalid column: {column}")
+
+
+    def _rows(self, column:str=None, value=None) -> 'np.ndarray':
+        """
+        Returns the rows with the value of the column.
+        """
+        if column in SessionTable.CATEGORIES:
+            if value not in self.values[column]: return np.array([], dtype=np.int64)
+            return np.flatnonzero(self.columns[column] == self.values[column].index(value))
+        if column in SessionTable.OBJECTS: return np.flatnonzero(self.columns[column] == str(value).encode())
+        return np.flatnonzero(self._column(column) == value)
+
+
+    def records(self, rows=None):
+        """
+        Yields the SessionRecords of the rows or all sessions, a page at a time.
+        """
+        rows = np.arange(self.size) if rows is None else np.asarray(rows, dtype=np.int64)
+        for start in range(0, len(rows), self.PAGE_SIZE):
+            page = rows[start:start + self.PAGE_SIZE]
+            columns = {column:self._column(column, page).tolist() for column in RADNAD.SESSION_COLUMNS[1:]}
+            for column in SessionTable.INTEGERS:
+                columns[column] = ['' if value == SessionTable.MISSING else value for value in columns[column]]
+            timestamps = (self.columns['Timestamp'][page] / 1000).tolist()
+            for timestamp,*values in zip(timestamps, *columns.values()):
+                yield SessionRecord(dict(zip(columns, values)), timestamp)
+
+
+    def get(self, sid:str=None) -> SessionRecord:
+        """
+        Returns the record of the session or None.
+        """
+        rows = self._rows('Acct-Session-Id', sid)
+        return None if len(rows) == 0 else next(self.records(rows[-1:]))
+
+
+    def find(self, column:str=None, value=None) -> list:
+        """
+        Returns the records of the sessions with the value of the column.
+        """
+        return list(self.records(self._rows(column, value)))
+
+
+    def count(self, column:str=None) -> dict:
+        """
+        Returns a dictionary of the number of sessions with each value of the column.
+        """
+        if column in SessionTable.CATEGORIES:
+            counts = np.bincount(self.columns[column], minlength=len(self.values[column]))
+            return {self.values[column][code]:int(count) for code,count in enumerate(counts) if count > 0}
+        values,counts = np.unique(self._column(column), return_counts=True)
+        return {value:int(count) for value,count in zip(values.tolist(), counts)}
+
+
+    def sample(self, n:int=1) -> list:
+        """
+        Returns the records of up to n random sessions.
+        """
+        return list(self.records(self.rng.choice(self.size, min(n, self.size), replace=False))) if self.size > 0 else []
+
+
+    def to_dataframe(self, records:list=None, rows=None) -> 'pd.DataFrame':
+        """
+        Returns a DataFrame of the records, the rows or all sessions, with `RADNAD.SESSION_COLUMNS` and the Timestamp index.
+        """
+        if records is not None: return SessionStore().to_dataframe(records)
+        from dateutil import tz
+        rows = slice(None) if rows is None else rows
+        sessions = pd.DataFrame({column:self._column(column, rows) for column in RADNAD.SESSION_COLUMNS[1:]}, columns=RADNAD.SESSION_COLUMNS[1:])
+        if (sessions['NAS-Port'] == SessionTable.MISSING).any(): sessions['NAS-Port'] = sessions['NAS-Port'].astype(object).where(sessions['NAS-Port'] != SessionTable.MISSING, '')
+        timestamps = pd.to_datetime(self.columns['Timestamp'][rows], unit='ms', utc=True).tz_convert(tz.tzlocal()).tz_localize(None) # 💡 naive local time
+        sessions.index = pd.DatetimeIndex(timestamps, name=RADNAD.SESSION_COLUMNS[0])
+        return sessions
+
+
+    def pages(self, size:int=PAGE_SIZE, rows=None):
+        """
+        Yields DataFrames of up to `size` sessions of the rows, in their order, or of all sessions.
+
+        - size (int): the sessions in each page. Default: `PAGE_SIZE`
+        - rows (np.ndarray): the rows, like `np.argsort()` of a column. Default: all sessions in the snapshot order
+        """
+        if size < 1: raise ValueError(f"Invalid size: {size}")
+        rows = np.arange(self.size) if rows is None else rows
+        for start in range(0, len(rows), size):
+            yield self.to_dataframe(rows=rows[start:start + size])
+
+
+    def load(self, sessions=None) -> None:
+        """
+        Add the snapshot's sessions to a SessionStore or SessionTable.
+        """
+        if not isinstance(sessions, SessionTable) or len(sessions) > 0:
+            for record in self.records(): sessions.add(record)
+            return
+        n = self.size # 💡 copy the columns into an empty SessionTable
+        sessions._reserve(n)
+        sessions.timestamps[:n] = self.columns['Timestamp']
+        for column in SessionTable.INTEGERS:
+            sessions.integers[column][:n] = self.columns[column]
+        for column in SessionTable.CATEGORIES:
+            sessions.codes[column][:n] = np.array([sessions.encode(column, value) for value in self.values[column]], dtype=np.int32)[self.columns[column]]
+        for column in SessionTable.OBJECTS:
+            sessions.objects[column][:n] = self._column(column)
+        sessions.rows = dict(zip(sessions.objects['Acct-Session-Id'][:n].tolist(), range(n)))
+        sessions.size = n
+
+
+
+
+class SessionDatabase():
+    """
+    Persists each session Start and Stop incrementally in a SQLite database in WAL mode, so a crash or SIGKILL loses at most
+    the last `FLUSH_INTERVAL` instead of every session since the start. Writes are queued and committed together in one transaction
+    every `FLUSH_INTERVAL` seconds or `BATCH_SIZE` writes. Acct-Session-Id is the primary key and the Expiry time is indexed.
+
+    Usage:
+        database = SessionDatabase('radnad.sessions.db')
+        database.insert(record, expiry=record.timestamp + 3600)
+        database.expired()       # the Acct-Session-Ids of the expired sessions
+        database.delete('1')
+        database.close()
+    """
+
+    BATCH_SIZE = 1000     # queued writes that are committed immediately
+    FLUSH_INTERVAL = 1.0  # seconds before queued writes are committed
+
+
+    def __init__(self, filename:str=None) -> None:
+        """
+        - filename (str): the SQLite database file, created if it does not exist
+        """
+        if filename is None or filename == '': raise ValueError(f"Must specify a database filename")
+        self.filename = filename
+        self.pending = []   # queued (sql, parameters) writes, in order
+        self.timer = None   # asyncio TimerHandle of the next flush
+        self.db = sqlite3.connect(filename)
+        self.db.execute('PRAGMA journal_mode=WAL')   # 💡 readers do not block the writer and commits append to the WAL
+        self.db.execute('PRAGMA synchronous=NORMAL') # 💡 WAL commits survive a process crash without an fsync per transaction
+        columns = ', '.join(f'"{column}" {self.type(column)}' for column in RADNAD.SESSION_COLUMNS)
+        self.db.execute(f'CREATE TABLE IF NOT EXISTS sessions ({columns}, "Expiry" REAL, PRIMARY KEY ("Acct-Session-Id"))')
+        self.db.execute('CREATE INDEX IF NOT EXISTS sessions_expiry ON sessions ("Expiry")')
+        self.db.commit()
+        self.insert_sql = f'INSERT OR REPLACE INTO sessions VALUES ({", ".join("?" * (len(RADNAD.SESSION_COLUMNS) + 1))})'
+        self.select_sql = f'SELECT {", ".join(f"[{column}]" for column in RADNAD.SESSION_COLUMNS)} FROM sessions'
+
+
+    @classmethod
+    def type(self, column:str=None) -> str:
+        """
+        Returns the SQLite type of the session column.
+        """
+        return {'Timestamp': 'REAL', 'Session-Timeout': 'INTEGER', 'Acct-Session-Id': 'TEXT NOT NULL'}.get(column, '')
+
+
+    def __len__(self) -> int:
+        self.flush()
+        return self.db.execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+
+
+    def _queue(self, sql:str=None, parameters:tuple=None) -> None:
+        """
+        Queue a write and commit the queue when it is full or, in an event loop, after `FLUSH_INTERVAL`.
+        - raises ValueError when the database is closed
+        """
+        if self.db is None: raise ValueError(f"Invalid database: {self.filename} is closed")
+        self.pending.append((sql, parameters))
+        if len(self.pending) >= self.BATCH_SIZE:
+            self.flush()
+        elif self.timer is None:
+            try:
+                self.timer = asyncio.get_running_loop().call_later(self.FLUSH_INTERVAL, self.flush)
+            except RuntimeError:
+                pass # no event loop: committed when full or closed
+
+
+    def flush(self) -> None:
+        """
+        Commit the queued writes in one transaction. When a write fails, the transaction is rolled back
+        and the writes stay queued for the next flush.
+        """
+        if self.timer is not None: self.timer.cancel()
+        self.timer = None
+        if len(self.pending) == 0: return
+        with self.db: # one transaction
+            for sql,parameters in self.pending:
+                self.db.execute(sql, parameters)
+        self.pending = []
+
+
+    def insert(self, record:SessionRecord=None, expiry:float=None) -> None:
+        """
+        Queue the insert, or replacement, of the session with its expiry time (epoch seconds).
+        """
+        values = [record.get(column) for column in RADNAD.SESSION_COLUMNS]
+        values[RADNAD.SESSION_COLUMNS.index('Acct-Session-Id')] = str(record.acct_session_id)
+        self._queue(self.insert_sql, (*[value if isinstance(value, (int, float, str)) else str(value) for value in values], expiry))
+
+
+    def delete(self, sid:str=None) -> None:
+        """
+        Queue the removal of the session.
+        """
+        self._queue('DELETE FROM sessions WHERE "Acct-Session-Id" = ?', (str(sid),))
+
+
+    def reschedule(self, sid:str=None, expiry:float=None) -> None:
+        """
+        Queue a new expiry time (epoch seconds) for the session.
+        """
+        self._queue('UPDATE sessions SET "Expiry" = ? WHERE "Acct-Session-Id" = ?', (expiry, str(sid)))
+
+
+    def expired(self, now:float=None) -> list:
+        """
+        Returns the Acct-Session-Ids of the sessions with an expiry time by now, the earliest first, with the Expiry index.
+        """
+        self.flush()
+        now = time.time() if now is None else now
+        return [row[0] for row in self.db.execute('SELECT "Acct-Session-Id" FROM sessions WHERE "Expiry" <= ? ORDER BY "Expiry"', (now,))]
+
+
+    def get(self, sid:str=None) -> SessionRecord:
+        """
+        Returns the session's record or None, with the Acct-Session-Id primary key.
+        """
+        self.flush()
+        row = self.db.execute(f'{self.select_sql} WHERE "Acct-Session-Id" = ?', (str(sid),)).fetchone()
+        return None if row is None else SessionRecord(dict(zip(RADNAD.SESSION_COLUMNS, row)))
+
+
+    def records(self):
+        """
+        Yields a record of each session, like when loading the sessions at startup.
+        """
+        self.flush()
+        for row in self.db.execute(f'{self.select_sql} ORDER BY "Timestamp"'):
+            yield SessionRecord(dict(zip(RADNAD.SESSION_COLUMNS, row)))
+
+
+    def close(self) -> None:
+        """
+        Commit the queued writes and close the database.
+        """
+        if self.db is None: return
+        self.flush()
+        self.db.close()
+        self.db = None
+
+
+
+
+class SessionJournal():
+    """
+    An append-only journal of session Start and Stop events, written in batches with one fsync each, so a killed RADNAD
+    loses at most the last `FSYNC_INTERVAL` of sessions. After `COMPACT_ENTRIES` events the journal is set aside, a copy of
+    the sessions is written to the snapshot (the sessions file, replaced atomically) in a thread and the old journal is deleted,
+    so replaying the snapshot and the journals at startup never takes longer than about `COMPACT_ENTRIES` events.
+
+    Usage:
+        journal = SessionJournal('radnad.sessions.journal', snapshot=radnad.save_sessions, copy=radnad.sessions.copy)
+        journal.start(record)
+        journal.stop('1')
+        for event in journal.replay(): ...
+    """
+
+    BATCH_SIZE = 1000          # queued events that are written immediately
+    FSYNC_INTERVAL = 1.0       # seconds before queued events are written and synced
+    COMPACT_ENTRIES = 100_000  # journal events before a compaction into the snapshot
+
+
+    def __init__(self, filename:str=None, snapshot:callable=None, copy:callable=None) -> None:
+        """
+        - filename (str): the journal file, created if it does not exist
+        - snapshot (callable): a function `snapshot(sessions=None)` writing the sessions, or all of the sessions, to the snapshot
+        - copy (callable): a function returning a copy of the sessions, written by `snapshot()` in a thread. Default: compact in the caller
+        """
+        if filename is None or filename == '': raise ValueError(f"Must specify a journal filename")
+        self.filename = filename
+        self.previous = f"{filename}.old" # the journal set aside while a compaction writes the snapshot
+        self.snapshot = snapshot
+        self.copy = copy
+        self.pending = []   # queued JSON lines
+        self.timer = None   # asyncio TimerHandle of the next write
+        self.entries = 0    # events in the journal file
+        self.file = None
+        self.compaction = None # concurrent.futures.Future of the compaction in a thread
+        self.executor = None
+
+
+    def replay(self, truncate:bool=True):
+        """
+        Yields each ('start', SessionRecord) and ('stop', Acct-Session-Id) event in the journals, in order.
+        - truncate (bool): truncate the torn last line of a crash, so the next events are not appended to it, instead of only skipping it. Default: True
+        - raises ValueError for any other invalid line
+        """
+        self.entries = 0
+        for filename in [self.previous, self.filename]:
+            if not os.path.exists(filename): continue
+            with open(filename, 'rb') as file:
+                lines = file.readlines()
+            size = sum(len(line) for line in lines)
+            if len(lines) > 0 and not lines[-1].endswith(b'\n'): # 💡 a write cut short by a crash
+                size -= len(lines.pop())
+                log.warning(f"{RADNAD.ICONS['WARN']} SessionJournal: ignored an incomplete event in {filename}")
+                if truncate: os.truncate(filename, size)
+            events = []
+            for n,line in enumerate(lines, 1):
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    raise ValueError(f"Invalid event on line {n} of the journal {filename}")
+            if filename == self.filename: self.entries = len(events)
+            for event in events:
+                if event['op'] == 'start': yield ('start', SessionRecord(event['session']))
+                elif event['op'] == 'stop': yield ('stop', event['sid'])
+
+
+    def _queue(self, event:dict=None) -> None:
+        """
+        Queue an event and write the queue when it is full or, in an event loop, after `FSYNC_INTERVAL`.
+        """
+        self.pending.append(json.dumps(event, default=str))
+        if len(self.pending) >= self.BATCH_SIZE:
+            self.flush()
+        elif self.timer is None:
+            try:
+                self.timer = asyncio.get_running_loop().call_later(self.FSYNC_INTERVAL, self.flush)
+            except RuntimeError:
+                pass # no event loop: written when full or closed
+
+
+    def start(self, record:SessionRecord=None) -> None:
+        """
+        Queue a session Start event.
+        """
+        self._queue({'op': 'start', 'session': record.to_dict()})
+
+
+    def stop(self, sid:str=None) -> None:
+        """
+        Queue a session Stop event.
+        """
+        self._queue({'op': 'stop', 'sid': str(sid)})
+
+
+    def flush(self) -> None:
+        """
+        Append the queued events to the journal with one write and fsync, then start a compaction if the journal is too long.
+        """
+        if self.timer is not None: self.timer.cancel()
+        self.timer = None
+        if len(self.pending) == 0: return
+        pending,self.pending = self.pending,[]
+        if self.file is None: self.file = open(self.filename, 'a')
+        self.file.write('\n'.join(pending) + '\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.entries += len(pending)
+        if self.entries >= self.COMPACT_ENTRIES:
+            if self.copy is None: self.compact()
+            elif self.compaction is None or self.compaction.done(): self._compact_later()
+
+
+    def _compact_later(self) -> None:
+        """
+        Set the journal aside and write a copy of the sessions to the snapshot in a thread, then delete the old journal.
+        💡 A full snapshot takes seconds with millions of sessions: only the copy is made in the caller, between two events.
+        """
+        if os.path.exists(self.previous):
+            self.compact() # 💡 the last compaction failed and its journal is still needed: compact everything now
+            return
+        if self.file is not None: self.file.close()
+        self.file = None
+        os.replace(self.filename, self.previous)
+        self.entries = 0
+        sessions = self.copy()
+        def compact() -> None:
+            self.snapshot(sessions)
+            os.remove(self.previous)
+        if self.executor is None: self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='SessionJournal')
+        self.compaction = self.executor.submit(compact)
+
+
+    def wait(self) -> None:
+        """
+        Wait for the compaction in a thread, if any, and log its error.
+        """
+        if self.compaction is None: return
+        try:
+            self.compaction.result()
+        except Exception as e:
+            log.error(f"{RADNAD.ICONS['ERROR']} SessionJournal: compaction failed: {e.__class__} {e}")
+
+
+    def compact(self) -> None:
+        """
+        Write all of the sessions to a new snapshot, replace the old snapshot atomically and truncate the journals.
+        A crash before the truncation replays the journals over the new snapshot again, which is harmless.
+        """
+        if self.timer is not None: self.timer.cancel()
+        self.timer = None
+        self.wait()
+        self.compaction = None
+        self.pending = [] # 💡 the queued events are already in the snapshot
+        self.snapshot()
+        if self.file is not None: self.file.close()
+        self.file = None
+        if os.path.exists(self.filename): os.truncate(self.filename, 0)
+        if os.path.exists(self.previous): os.remove(self.previous)
+        self.entries = 0
+
+
+    def close(self, compact:bool=True) -> None:
+        """
+        Compact the journal, or write the queued events, and close it.
+        """
+        self.compact() if compact else self.flush()
+        self.wait()
+        if self.file is not None: self.file.close()
+        self.file = None
+        if self.executor is not None: self.executor.shutdown()
+        self.executor = None
+
+
+
+
+class SessionExpiry():
+    """
+    The expiry time of each active session in a min-heap so finding the expired sessions costs only the number expiring, not the number of sessions.
+    Stopped sessions are removed from the index and their heap entries are skipped when they reach the top.
+
+    Usage:
+        expiry = SessionExpiry()
+        expiry.add('1', time.time() + 3600)
+        await expiry.wait(5)      # until the next expiry, an earlier one is added or 5 seconds
+        expired = expiry.due()    # ['1'] after an hour
+    """
+
+    def __init__(self) -> None:
+        self.expiries = {}               # Acct-Session-Id : expiry time (epoch seconds)
+        self.heap = []                   # (expiry, Acct-Session-Id)
+        self.earlier = asyncio.Event()   # set when an expiry is added before the next one
+
+
+    def __len__(self) -> int:
+        return len(self.expiries)
+
+
+    def add(self, sid:str=None, expiry:float=None) -> None:
+        """
+        Add or reschedule the session's expiry.
+
+        - sid (str): the Acct-Session-Id
+        - expiry (float): the expiry time (epoch seconds)
+        """
+        sid = str(sid)
+        next_expiry = self.next()
+        self.expiries[sid] = expiry
+        heapq.heappush(self.heap, (expiry, sid))
+        if next_expiry is None or expiry < next_expiry: self.earlier.set()
+
+
+    def remove(self, sid:str=None) -> None:
+        """
+        Remove the session's expiry, if any.
+        """
+        self.expiries.pop(str(sid), None)
+
+
+    def next(self) -> float:
+        """
+        Returns the next expiry time or None without sessions.
+        """
+        while self.heap and self.expiries.get(self.heap[0][1], None) != self.heap[0][0]:
+            heapq.heappop(self.heap) # stopped or rescheduled
+        return self.heap[0][0] if self.heap else None
+
+
+    def due(self, now:float=None) -> list:
+        """
+        Removes and returns the Acct-Session-Ids of the sessions that expired by now, the earliest first.
+        """
+        now = time.time() if now is None else now
+        sids = []
+        while self.next() is not None and self.heap[0][0] <= now:
+            _expiry,sid = heapq.heappop(self.heap)
+            del self.expiries[sid]
+            sids.append(sid)
+        return sids
+
+
+    async def wait(self, timeout:float=None) -> None:
+        """
+        Wait until the next expiry, an earlier expiry is added or the timeout, in seconds.
+        """
+        next_expiry = self.next()
+        delay = timeout if next_expiry is None else next_expiry - time.time()
+        if timeout is not None: delay = min(delay, timeout)
+        if delay is not None and delay <= 0: return
+        self.earlier.clear()
+        try:
+            await asyncio.wait_for(self.earlier.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+
+
+
+class InterimSession():
+    """
+    The accounting state of an active session for its Interim-Updates.
+    """
+
+    __slots__ = ['sid', 'values', 'server', 'start', 'updated', 'due', 'octets_in', 'octets_out', 'packets_in', 'packets_out']
+
+    def __init__(self, sid:str=None, values:tuple=None, server:str=None, start:float=0) -> None:
+        """
+        - sid (str): the Acct-Session-Id
+        - values (tuple): the session's `InterimScheduler.ATTRIBUTES` values
+        - server (str): the RADIUS server address that started the session
+        - start (float): the session start time (epoch seconds)
+        """
+        self.sid = sid
+        self.values = values
+        self.server = server
+        self.start = start
+        self.updated = start # time of the last counters update
+        self.due = 0.0       # time of the next Interim-Update
+        self.octets_in = 0   # octets from the endpoint
+        self.octets_out = 0  # octets to the endpoint
+        self.packets_in = 0
+        self.packets_out = 0
+
+
+
+
+class InterimScheduler():
+    """
+    Sends an Accounting Interim-Update for each active session every `interval` seconds with a single task however many sessions there are.
+    Sessions are kept in a min-heap by the time of their next update so each tick costs only the updates that are due.
+    The first update of each session is at a random time in its first interval to spread the updates of sessions started together.
+    Acct-Session-Time and the octet and packet counters increase with each update and are generated for all of the due sessions at once.
+
+    Usage:
+        radnad = RADNAD(server=server, secret=secret, interim=600)
+        asyncio.create_task(radnad.interim.run())
+    """
+
+    INTERVAL_DEFAULT = 600 # seconds
+    TICK = 1.0             # seconds between checks for due updates
+    ATTRIBUTES = ['User-Name', 'Calling-Station-Id', 'Called-Station-Id', 'Framed-IP-Address', 'NAS-Port-Type', 'NAS-Port', 'NAS-IP-Address', 'Class']
+    RATE_LOG_MEAN = 8.0    # log of the mean octets per second from each endpoint (about 3 kB/s)
+    RATE_LOG_SIGMA = 1.5   # lognormal spread of the rates between sessions and updates
+    DOWNLOAD_RATIO = 4     # octets to the endpoint for each octet from it
+    PACKET_SIZE = 800      # mean octets per packet
+    GIGAWORD = 1 << 32     # 📄 RFC2869: Acct-Input-Gigawords counts the Acct-Input-Octets overflows
+    CONCURRENCY_DEFAULT = 8 # batches in flight at once
+
+
+    def __init__(self, radnad:'RADNAD'=None, interval:int=INTERVAL_DEFAULT, batch_size:int=None, concurrency:int=CONCURRENCY_DEFAULT) -> None:
+        """
+        - radnad (RADNAD): the RADNAD sending the updates
+        - interval (int): the time, in seconds, between the updates of each session. Default: `INTERVAL_DEFAULT`
+        - batch_size (int): the updates sent at once. Default: `RADNAD.BATCH_SIZE_DEFAULT`
+        - concurrency (int): the batches sent concurrently. Default: `CONCURRENCY_DEFAULT`
+        """
+        if radnad is None: raise ValueError(f"radnad is None")
+        if interval <= 0: raise ValueError(f"Invalid interval: {interval}")
+        if concurrency < 1: raise ValueError(f"Invalid concurrency: {concurrency}")
+        self.radnad = radnad
+        self.interval = interval
+        self.batch_size = RADNAD.BATCH_SIZE_DEFAULT if batch_size is None else batch_size
+        if self.batch_size < 1: raise ValueError(f"Invalid batch_size: {self.batch_size}")
+        self.sessions = {}  # Acct-Session-Id : InterimSession
+        self.heap = []      # (due, Acct-Session-Id); entries of stopped or rescheduled sessions are skipped
+        self.counts = collections.Counter() # sent, accepted and timeouts
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.tasks = set()  # in-flight batches
+        self.rng = np.random.default_rng()
+
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+
+    def add(self, session:dict=None, start:float=None) -> None:
+        """
+        Schedule the Interim-Updates of a session.
+
+        - session (dict): the session's `RADNAD.SESSION_COLUMNS`
+        - start (float): the session start time (epoch seconds). Default: now
+        """
+        now = time.time()
+        start = now if start is None else start
+        sid = str(session['Acct-Session-Id'])
+        entry = InterimSession(sid, tuple(session.get(name, '') for name in self.ATTRIBUTES), session.get('Server', '') or None, start)
+        entry.due = start + random.uniform(0, self.interval) # 💡 spread the updates of sessions started together
+        if entry.due < now: entry.due = now + random.uniform(0, self.interval) # sessions loaded at startup
+        self.sessions[sid] = entry
+        heapq.heappush(self.heap, (entry.due, sid))
+
+
+    def remove(self, sid:str=None) -> None:
+        """
+        Stop the Interim-Updates of the session. Its heap entry is skipped when it is due.
+        """
+        self.sessions.pop(str(sid), None)
+
+
+    def update(self, sessions:list=None, now:float=None) -> None:
+        """
+        Increase the octet and packet counters of the sessions for the time since their last update, all at once.
+        """
+        now = time.time() if now is None else now
+        elapsed = np.array([max(0.0, now - session.updated) for session in sessions])
+        octets_in = (self.rng.lognormal(self.RATE_LOG_MEAN, self.RATE_LOG_SIGMA, len(sessions)) * elapsed).astype(np.int64)
+        octets_out = (octets_in * self.rng.uniform(0.5, 2 * self.DOWNLOAD_RATIO - 0.5, len(sessions))).astype(np.int64)
+        packets_in = octets_in // self.PACKET_SIZE + (octets_in > 0)
+        packets_out = octets_out // self.PACKET_SIZE + (octets_out > 0)
+        for n,session in enumerate(sessions):
+            session.octets_in += int(octets_in[n])
+            session.octets_out += int(octets_out[n])
+            session.packets_in += int(packets_in[n])
+            session.packets_out += int(packets_out[n])
+            session.updated = now
+
+
+    def counters(self, sid:str=None, now:float=None) -> dict:
+        """
+        Returns the session's Acct-Session-Time and octet and packet counter attributes up to now, or an empty dictionary for an unknown session.
+        """
+        session = self.sessions.get(str(sid), None)
+        if session is None: return {}
+        now = time.time() if now is None else now
+        if session.updated < now: self.update([session], now)
+        return {
+            'Acct-Session-Time' : int(now - session.start),
+            'Acct-Input-Octets' : session.octets_in % self.GIGAWORD,
+            'Acct-Output-Octets' : session.octets_out % self.GIGAWORD,
+            'Acct-Input-Gigawords' : session.octets_in // self.GIGAWORD,
+            'Acct-Output-Gigawords' : session.octets_out // self.GIGAWORD,
+            'Acct-Input-Packets' : session.packets_in % self.GIGAWORD,
+            'Acct-Output-Packets' : session.packets_out % self.GIGAWORD,
+        }
+
+
+    def attributes(self, session:InterimSession=None, now:float=None) -> MultiDict:
+        """
+        Returns the Interim-Update attributes of the session.
+        """
+        attrs = MultiDict({'Acct-Status-Type' : RADNAD.ACCT_INTERIM, 'Acct-Session-Id' : session.sid})
+        for name,value in zip(self.ATTRIBUTES, session.values):
+            if value is not None and value != '': attrs[name] = value
+        attrs['NAS-Identifier'] = self.radnad.name
+        attrs.update(self.counters(session.sid, now))
+        return attrs
+
 
-        INDENT = ' ' * 4
-        out = io.StringIO()
-        print(f"Sent {self.req_type} Id {self.id} from {self.nas_ip}:{self.nas_port} to {self.srv_ip}:{self.srv_port} length {self.req_length}", file=out)
-        print(f"{INDENT}",f"\n{INDENT}".join([f"{key}='{val}'" for key,val in self.req_attrs.items()]), sep="", file=out)
-        print(f"Received {self.rsp_type} Id {self.id} from {self.srv_ip}:{self.srv_port} to {self.nas_ip}:{self.nas_port} length {self.rsp_length}", file=out)
-        print(f"{INDENT}", f"\n{INDENT}".join([f"{key}='{val}'" for key,val in self.rsp_attrs.items()]), sep="", file=out)
-        return out.getvalue()
+    def due(self, now:float=None) -> list:
+        """
+        Returns the sessions with an update due by now and schedules their next update.
+        """
+        now = time.time() if now is None else now
+        sessions = []
+        while self.heap and self.heap[0][0] <= now:
+            due,sid = heapq.heappop(self.heap)
+            session = self.sessions.get(sid, None)
+            if session is None or session.due != due: continue # stopped or rescheduled
+            session.due = due + self.interval if due + self.interval > now else now + self.interval
+            heapq.heappush(self.heap, (session.due, sid))
+            sessions.append(session)
+        return sessions
+
+
+    def send_batches(self, now:float=None) -> list:
+        """
+        Starts a task sending each batch of the due Interim-Updates, `batch_size` at a time, to the server that started each session.
+        At most `concurrency` batches are sent at once. Returns the tasks.
+        """
+        now = time.time() if now is None else now
+        sessions = self.due(now)
+        if len(sessions) == 0: return []
+        self.update(sessions, now)
+        by_server = collections.defaultdict(list)
+        for session in sessions: by_server[session.server].append(session)
+        loop = asyncio.get_running_loop()
+        tasks = []
+        for server,sessions in by_server.items():
+            for n in range(0, len(sessions), self.batch_size):
+                attributes_list = [self.attributes(session, now) for session in sessions[n:n+self.batch_size]]
+                task = loop.create_task(self._send_batch(server, attributes_list))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+                tasks.append(task)
+        return tasks
+
+
+    async def _send_batch(self, server:str=None, attributes_list:list=None) -> dict:
+        """
+        Sends a batch of Interim-Updates and returns a dictionary of `Acct-Session-Id` : RADIUSResponse (or Exception).
+        """
+        async with self.semaphore:
+            try:
+                results = await self.radnad._request_many('acct', attributes_list, self.batch_size, self.radnad.servers.get(server), 'interim')
+            except Exception as e:
+                log.error(f"{RADNAD.ICONS['ERROR']} InterimScheduler: {e.__class__} {e}")
+                results = [e] * len(attributes_list)
+        responses = {attrs['Acct-Session-Id'] : result for attrs,result in zip(attributes_list, results)}
+        self.counts['sent'] += len(responses)
+        self.counts['accepted'] += sum(1 for result in responses.values() if isinstance(result, RADIUSResponse) and result.is_accepted())
+        self.counts['timeouts'] += sum(1 for result in responses.values() if isinstance(result, Exception))
+        log.info(f"{RADNAD.ICONS['ACCT']} InterimScheduler: {len(responses)} Interim-Updates")
+        return responses
 
 
-    def to_ise_log(self) -> str:
+    async def send_due(self, now:float=None) -> dict:
         """
-        Generate a log string *similar* to an ISE LiveLog entry. 
-        Not all values are available in the RADIUS client and the order and format may be customized.
+        Sends the due Interim-Updates and waits for all of their batches.
+        Returns a dictionary of `Acct-Session-Id` : RADIUSResponse (or TimeoutError).
+        """
+        responses = {}
+        for batch in await asyncio.gather(*self.send_batches(now)):
+            responses.update(batch)
+        return responses
 
-        ISE LiveLog Field Names:
-            'Timestamp',                # ISE format example: Jan 01, 2024 01:02:03.456 PM
-            'Event',                    # Pass, Fail, Start, Stop
-            'Identity',                 # username or MAC (12:34:56:78:90:AB)
-            'Endpoint',                 # MAC (12:34:56:78:90:AB)
-            'Method',                   # 'mab', ...
-            'NAS-Id',                   # RADIUS client name in ISE (should match NAD-Identifier)
-            'NAS-Port-Type',            # RADIUS client port, if any
-            'NAS-Port-Id',              # RADIUS client port, if any
-            'NAS-IP-Address',           # Endpoint IP address, if provided by RADIUS client
-            'Acct-Session-Id',          # Created by RADIUS client
-            'CiscoAVPair',              # If assigned by ISE
-            # 'Security Group',         # If assigned by ISE
-            # 'Endpoint Profile',       # Unknown unless returned in attribute!
-            # 'Server',                 # ISE PSN node name
-            # 'Response Time (ms)',     # Example: 29
+
+    async def run(self) -> None:
         """
-        log = {
-            'Timestamp'   : datetime.datetime.fromtimestamp(self.timestamp, tz=None).isoformat(sep=" ", timespec="milliseconds"),
-            'Event'       : self.RESPONSE_ICONS[self.rsp_type],  # Passed, Failed, Session
-            'Identity'    : self.req_attrs.get('User-Name', ''),
-            'Endpoint'    : self.req_attrs.get('Calling-Station-Id', ''),
-            'Endpoin IP' : self.req_attrs.get('Framed-IP-Address', ''),
-            'Method'      : self.guess_access_method(),
-            'NAS-Id'      : self.req_attrs.get('NAS-Identifier', ''),
-            'NAS-IP' : self.req_attrs.get('NAS-IP-Address', ''),
-            'Port-Type' : self.req_attrs.get('NAS-Port-Type', ''),
-            'Port-Id' : self.req_attrs.get('NAS-Port-Id', ''),
-            'Acct-Session-Id'  : self.req_attrs.get('Acct-Session-Id', ''),
-            # 'Attributes'  : RADNAD.to_avp_string(self.req_attrs),
-        }
-        out = io.StringIO()
-        print(tabulate.tabulate([log.keys(), log.values()], headers="firstrow", tablefmt="simple"), file=out)
-        return out.getvalue()
+        Starts sending the due Interim-Updates every `TICK` until cancelled, then cancels the batches in flight.
+        💡 A tick does not wait for the batches of the previous ones so a slow server does not delay the other updates.
+        """
+        try:
+            while True:
+                await asyncio.sleep(self.TICK)
+                try:
+                    self.send_batches()
+                except Exception as e:
+                    log.error(f"{RADNAD.ICONS['ERROR']} InterimScheduler: {e.__class__} {e}")
+        finally:
+            for task in list(self.tasks): task.cancel()
+
+
+    def stats(self) -> dict:
+        """
+        Returns a dictionary with the number of scheduled sessions and the Interim-Updates sent, accepted and timed out.
+        """
+        return {'sessions': len(self.sessions), 'sent': self.counts['sent'], 'accepted': self.counts['accepted'], 'timeouts': self.counts['timeouts']}
 
 
 
@@ -366,6 +3395,10 @@ class RADNAD:
 
     ACCT_START = 'Start'
     ACCT_STOP = 'Stop'
+    ACCT_INTERIM = 'Interim-Update'
+    EXPIRY_DROP = 4 * 24 * 3600 # seconds after which ISE has already cleared a session, so it is dropped without a Stop
+    EXPIRY_RETRY = 60           # seconds before stopping an expired session again after its Stop failed
+    STOP_CONCURRENCY_DEFAULT = 32 # concurrent Accounting Stops of `stop_sessions()`
 
     HIDE_COLUMNS = ['Class','Other']
 
@@ -377,12 +3410,56 @@ class RADNAD:
     TIMEOUT_DEFAULT = 5 # seconds
     TIMEOUT_MIN = 1 # seconds
     TIMEOUT_MAX = 60 # seconds
+    BACKOFF_DEFAULT = 0.1 # seconds, the base of the exponential backoff between retries
+    BACKOFF_MAX = 2.0 # seconds, the maximum backoff between retries
+    HEDGE_PERCENTILE = 0.95 # send a hedged request when there is no reply within this latency percentile of the server
+    LATENCY_SCOPE = contextvars.ContextVar('radnad_latency_scope', default=None) # extra latency histograms of the current task, like a daemon command's
     LOG_MIN = 0
     LOG_MAX = 5
 
     COMMAND_DEFAULT = 'auth'
     OPTIONS_DEFAULT = '-x' # show attributes sent and received
+
+    TRANSPORT_RADCLIENT = 'radclient' # spawn a `radclient` process per request
+    TRANSPORT_UDP = 'udp'             # native asyncio RADIUS client
+    TRANSPORTS = [TRANSPORT_RADCLIENT, TRANSPORT_UDP]
+    TRANSPORT_DEFAULT = TRANSPORT_RADCLIENT
+
+    STORE_RECORDS = 'records'   # SessionStore of SessionRecords with secondary indexes
+    STORE_COLUMNAR = 'columnar' # SessionTable of NumPy columns for millions of sessions
+    STORES = [STORE_RECORDS, STORE_COLUMNAR]
+    STORE_DEFAULT = STORE_RECORDS
+
+    PERSISTENCE_CSV = 'csv'       # the sessions file is written by `close()`
+    PERSISTENCE_SQLITE = 'sqlite' # each session Start and Stop is written to a SQLite database
+    PERSISTENCE_JOURNAL = 'journal' # each session Start and Stop is appended to a journal, compacted into the sessions file
+    PERSISTENCES = [PERSISTENCE_CSV, PERSISTENCE_SQLITE, PERSISTENCE_JOURNAL]
+    PERSISTENCE_DEFAULT = PERSISTENCE_CSV
+
+    SNAPSHOT_CSV = 'csv'       # the sessions file is a CSV file
+    SNAPSHOT_BINARY = 'binary' # the sessions file is a memory-mapped SessionSnapshot with a `.bin` extension
+    SNAPSHOTS = [SNAPSHOT_CSV, SNAPSHOT_BINARY]
+    SNAPSHOT_DEFAULT = SNAPSHOT_CSV
+
+    BATCH_SIZE_DEFAULT = 256    # requests per `radclient` process for `auth_many()` and `acct_many()`
+    BATCH_PARALLEL_DEFAULT = 32 # requests sent in parallel by each `radclient` process (`-p`)
+
+    COALESCE_WINDOW_DEFAULT = 0 # seconds to collect concurrent requests into one `radclient` process; 0 is disabled
+    COALESCE_SIZE_DEFAULT = 64  # requests that flush a coalesced batch immediately
+
+    admission:AdmissionController = None # limits concurrent `radclient` processes of all RADNADs in this process
+    METRICS_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60] # seconds, Prometheus histogram buckets
+    SOURCES_MAX = 65536 # source addresses (simulated NADs) from `sources`
     NAS_IDENTIFIER_DEFAULT = 'RADNAD'
+    ENDPOINT_OUI = '020000' # locally administered OUI for numbered endpoints, `generate_mac(index=N)`
+
+    LOAD_CONCURRENCY_DEFAULT = 64           # concurrent sessions per `load` worker
+    LOAD_SESSION_ID_RANGE = 100_000_000     # Acct-Session-Ids reserved for each `load` worker
+    LOAD_SCENARIOS = ['dot1x', 'dot1x-wireless', 'mab', 'mab-wireless', 'vpn'] # `load` scenarios for the `--mix`
+    LOAD_MIX_DEFAULT = 'mab:100'            # `load` scenario weights
+    LOAD_ARRIVALS = ['constant', 'poisson'] # open-loop `load` arrival schedules with a `--rate`
+    LOAD_DURATION_DEFAULT = 60              # seconds of open-loop `load` arrivals
+    LOAD_PASSWORD_DEFAULT = 'C1sco12345'    # `load` dot1x and vpn password without `--password`
 
     NAS_PORT_TYPES = [
         # NAS-Port-Type convenience list
@@ -450,6 +3527,8 @@ class RADNAD:
         'NAS-Port-Id',         # String identifying the port (GigabitEthernet1/1)
         'NAS-Port',            # numeric port on which the session is terminated
         'NAS-Identifier',      # name given to this network device
+        'NAS-IP-Address',      # network device IP address, the source address with `sources`
+        'Server',              # RADIUS server (PSN) address that started the session
         'Class',               # class value from AAA server, if any
         'Other',               # Other attributes
     ]
@@ -512,12 +3591,27 @@ class RADNAD:
                   retries:int=RETRIES_DEFAULT,  # If timeout, retry sending packet N times
                   timeout:int=TIMEOUT_DEFAULT,  # seconds
                   level:int=0,  # verbosity log level
+                  transport:str=TRANSPORT_DEFAULT,
+                  coalesce_window:float=COALESCE_WINDOW_DEFAULT, # seconds
+                  coalesce_size:int=COALESCE_SIZE_DEFAULT,
+                  policy=ServerPool.POLICY_DEFAULT,
+                  deadline:float=None,
+                  backoff:float=BACKOFF_DEFAULT,
+                  hedge:bool=False,
+                  sources=None,
+                  sessions_file:str=SESSIONS_FILENAME,
+                  session_id_start:int=0,
+                  interim:int=0,
+                  store:str=STORE_DEFAULT,
+                  persistence:str=PERSISTENCE_DEFAULT,
+                  snapshot:str=SNAPSHOT_DEFAULT,
+                  readonly:bool=False,
                  ):
         """
         Creates a RADNAD instance with the spcecific configuration options.
 
         name (str): the NAS identifier to use for RADIUS client requests. Default: `NAS_IDENTIFIER_DEFAULT`
-        server (str): the RADIUS server address to send requests. Default: None
+        server (str or [str]): the RADIUS server address, a comma-separated list of addresses, or a list of addresses to send requests. Default: None
         secret (str): the RADIUS pre-shared key to use with the server. Default: None
         auth_port (int): the RADIUS authentication port. Default: `AUTH_PORT_DEFAULT`
         acct_port (int): the RADIUS accounting port. Default: `ACCT_PORT_DEFAULT`
@@ -526,12 +3620,29 @@ class RADNAD:
         retries (int): the number of retries before timeout. Default: `RETRIES_DEFAULT`,
         timeout (int): the time to wait, in seconds, between retries. Default: `TIMEOUT_DEFAULT`,
         level (int): verbosity (log) level (0-5). Default: 0
+        transport (str): how requests are sent, one of `TRANSPORTS`. Default: `TRANSPORT_DEFAULT`
+        coalesce_window (float): the time, in seconds, to collect concurrent `radclient` requests into a single `radclient` process. Default: `COALESCE_WINDOW_DEFAULT` (disabled)
+        coalesce_size (int): the number of collected requests that are sent immediately. Default: `COALESCE_SIZE_DEFAULT`
+        policy (str or callable): how to select the server for each request with multiple servers, one of `ServerPool.POLICIES` or a callable. Default: `ServerPool.POLICY_DEFAULT`
+        deadline (float): the maximum time, in seconds, for a request including all retries. Default: None (enough for all retries)
+        backoff (float): the base, in seconds, of the exponential backoff with jitter between retries. Default: `BACKOFF_DEFAULT`
+        hedge (bool): send a duplicate authentication to a second server when there is no reply within its p95 latency. Default: False
+        sources (str or [str]): local IP addresses or networks (CIDR) to send from as separate NADs with the `udp` transport, comma-separated or a list. Default: None
+        sessions_file (str): the file to load and save the sessions; its extension is `.bin` with the `binary` snapshot. Default: `SESSIONS_FILENAME`
+        session_id_start (int): the Acct-Session-Id counter starts after this value, for disjoint ranges across RADNADs. Default: 0
+        interim (int): the Accounting Interim-Update interval, in seconds, of every active session sent by `interim.run()`. Default: 0 (none)
+        store (str): how the active sessions are kept in memory, one of `STORES`. Default: `STORE_DEFAULT`
+        persistence (str): how the sessions are saved, one of `PERSISTENCES`. `sqlite` uses the sessions file name with a `.db` extension
+            and `journal` a `.journal` extension. Default: `PERSISTENCE_DEFAULT`
+        snapshot (str): the format of the sessions file with the `csv` and `journal` persistence, one of `SNAPSHOTS`. Default: `SNAPSHOT_DEFAULT`
+        readonly (bool): the sessions are not saved and a `binary` snapshot is memory-mapped instead of loaded, for showing the sessions. Default: False
         """
-        log.debug(f"▷ RADNAD.__init__(name:{name}, server:{server}, auth_port:{auth_port}, acct_port:{acct_port}, coa_port:{coa_port}, secret:{'*'}, options:{options}, retries:{retries}, timeout:{timeout})")
+        log.debug(f"▷ RADNAD.__init__(name:{name}, server:{server}, auth_port:{auth_port}, acct_port:{acct_port}, coa_port:{coa_port}, secret:{'*'}, options:{options}, retries:{retries}, timeout:{timeout}, transport:{transport}, policy:{policy}, deadline:{deadline}, backoff:{backoff}, hedge:{hedge}, sources:{sources}, sessions_file:{sessions_file}, session_id_start:{session_id_start}, interim:{interim}, store:{store}, persistence:{persistence}, snapshot:{snapshot}, readonly:{readonly})")
 
         # Instance Variables
         self.name = name                          # NAS-Identifier
-        self.server = None                        # RADIUS server hostname or IP address
+        self.server = None                        # RADIUS server hostname or IP address (the first server)
+        self.servers = None                       # ServerPool of all RADIUS servers
         self.secret = None                        # RADIUS shared secret. 📄 RFC2866: The source IP of the Access-Request packet MUST be used to select the shared secret.
         self.auth_port = self.AUTH_PORT_DEFAULT   # RADIUS authentication port
         self.acct_port = self.ACCT_PORT_DEFAULT   # RADIUS accounting port
@@ -540,13 +3651,38 @@ class RADNAD:
         self.timeout = self.TIMEOUT_DEFAULT       # time, in seconds, before retry
         self.retries = self.RETRIES_DEFAULT       # total number of retries after timeouts
         self.logger = None                        # logger 🚧 ToDo: Implement this!
-        self.sessions = None                      # sessions (accounting) DataFrame
+        self.sessions = None                      # active (accounting) sessions: SessionStore, SessionTable or a read-only SessionSnapshot
+        self.store = self.STORE_DEFAULT           # session store
+        self.persistence = self.PERSISTENCE_DEFAULT # how the sessions are saved
+        self.database = None                      # SessionDatabase with the `sqlite` persistence
+        self.journal = None                       # SessionJournal with the `journal` persistence
+        self.snapshot = self.SNAPSHOT_DEFAULT     # sessions file format
+        self.readonly = readonly                  # the sessions are not saved
+        self.closed = False                       # the sessions are persisted by `close()`
+        self.sessions_file = sessions_file        # sessions file
         self.counter = 0                          # session counter
         self.level = 0                            # log level
-
-        if server is None or server == '': raise ValueError(f"Must specify a RADIUS server name or address")
-        if not isinstance(server, str): raise ValueError(f"server {server} is a {type(server)} not a string")
-        self.server = server
+        self.transport = self.TRANSPORT_DEFAULT   # request transport
+        self.udp = None                           # RADIUSUDPClient for the `udp` transport
+        self.coalescer = None                     # RequestCoalescer for the `radclient` transport
+        self.argv = {}                            # (server, port, command) : `radclient` argv template
+        self.deadline = None                      # time, in seconds, for a request including all retries
+        self.backoff = self.BACKOFF_DEFAULT       # base, in seconds, of the backoff between retries
+        self.hedge = False                        # send hedged authentications to a second server
+        self.retry_counts = collections.Counter() # requests, attempts, retries, hedges, hedge wins and timeouts
+        self.sources = []                         # local IP addresses of the simulated NADs
+        self.sources_set = set()                  # the sources for fast lookups
+        self.latency = {}                         # (scenario, request type, outcome) : LatencyHistogram
+        self.expiry_lag = LatencyHistogram()      # time from each session's expiry to the reply to its Stop
+        self.interim = None                       # InterimScheduler of the active sessions' Interim-Updates
+        self.expiry = SessionExpiry()             # expiry time of each active session
+
+        if server is None or server == '' or server == []: raise ValueError(f"Must specify a RADIUS server name or address")
+        if isinstance(server, str): server = [host.strip() for host in server.split(',') if host.strip() != '']
+        if not isinstance(server, (list, tuple)): raise ValueError(f"server {server} is a {type(server)} not a string or list")
+        if not all(isinstance(host, str) for host in server): raise ValueError(f"server {server} is not a list of strings")
+        self.servers = ServerPool(server, policy)
+        self.server = server[0]
         
         if int(auth_port) < 1024 or int(auth_port) > 65536: raise ValueError(f"Invalid port number: {auth_port}")
         self.auth_port = auth_port
@@ -570,20 +3706,183 @@ class RADNAD:
         if timeout < self.TIMEOUT_MIN or timeout > self.TIMEOUT_MAX: raise ValueError(f"Invalid timeout: {timeout}")
         self.timeout = timeout
 
+        if deadline is None: deadline = self.timeout * (self.retries + 1) + self.BACKOFF_MAX * self.retries
+        if deadline <= 0: raise ValueError(f"Invalid deadline: {deadline}")
+        self.deadline = deadline
+
+        if backoff < 0 or backoff > self.BACKOFF_MAX: raise ValueError(f"Invalid backoff: {backoff}")
+        self.backoff = backoff
+        self.hedge = hedge
+
         if level < self.LOG_MIN or timeout > self.LOG_MAX: raise ValueError(f"Invalid verbosity/log level: {level}")
         self.level = level
 
-        # Load existing sessions CSV file
-        if os.path.exists(self.SESSIONS_FILENAME):
-            self.sessions = pd.read_csv(self.SESSIONS_FILENAME, parse_dates=True, index_col=[self.SESSION_COLUMNS[0]]).fillna('')
-            self.counter = 0 if len(self.sessions) == 0 else self.sessions['Acct-Session-Id'].max()
+        if transport not in self.TRANSPORTS: raise ValueError(f"Invalid transport: {transport}")
+        self.transport = transport
+
+        if sources:
+            if self.transport != self.TRANSPORT_UDP: raise ValueError(f"sources require the {self.TRANSPORT_UDP} transport; radclient cannot bind a source address")
+            self.sources = self.parse_sources(sources)
+            self.sources_set = set(self.sources)
+        if self.transport == self.TRANSPORT_UDP:
+            self.udp = RADIUSUDPClient(self.secret, timeout=self.timeout, retries=0) # 💡 RADNAD._request() retries
+        elif coalesce_window > 0:
+            self.coalescer = RequestCoalescer(self._radclient_coalesced, window=coalesce_window, size=coalesce_size)
+
+        if RADNAD.admission is None: RADNAD.admission = AdmissionController()
+
+        if session_id_start < 0: raise ValueError(f"Invalid session_id_start: {session_id_start}")
+        self.counter = session_id_start
+
+        if store not in self.STORES: raise ValueError(f"Invalid store: {store}")
+        self.store = store
+        self.sessions = SessionTable() if self.store == self.STORE_COLUMNAR else SessionStore()
+
+        if persistence not in self.PERSISTENCES: raise ValueError(f"Invalid persistence: {persistence}")
+        self.persistence = persistence
+
+        if snapshot not in self.SNAPSHOTS: raise ValueError(f"Invalid snapshot: {snapshot}")
+        self.snapshot = snapshot
+        if self.snapshot == self.SNAPSHOT_BINARY: self.sessions_file = f"{os.path.splitext(self.sessions_file)[0]}.bin"
+        journal_file = f"{os.path.splitext(self.sessions_file)[0]}.journal"
+
+        if self.persistence == self.PERSISTENCE_SQLITE:
+            self.sessions_file = f"{os.path.splitext(self.sessions_file)[0]}.db"
+            self.database = SessionDatabase(self.sessions_file)
+            for record in self.database.records():
+                self.sessions.add(record)
+                if str(record.acct_session_id).isdigit(): self.counter = max(self.counter, int(record.acct_session_id))
+            log.info(f"{RADNAD.ICONS['INFO']} Loaded {len(self.sessions)} Sessions, Last Acct-Session-Id: {self.counter}")
+        # Load existing sessions file
+        elif os.path.exists(self.sessions_file) and self.snapshot == self.SNAPSHOT_BINARY:
+            snapshot = SessionSnapshot(self.sessions_file)
+            self.counter = max(self.counter, snapshot.counter)
+            journaled = [filename for filename in [journal_file, f"{journal_file}.old"] if os.path.exists(filename) and os.path.getsize(filename) > 0]
+            if self.readonly and (self.persistence != self.PERSISTENCE_JOURNAL or len(journaled) == 0):
+                self.sessions = snapshot # 💡 memory-mapped and paged instead of loaded
+            else:
+                snapshot.load(self.sessions)
+            log.info(f"{RADNAD.ICONS['INFO']} Loaded {len(self.sessions)} Sessions, Last Acct-Session-Id: {self.counter}")
+        elif os.path.exists(self.sessions_file):
+            self.counter = max(self.counter, self.sessions.load_csv(self.sessions_file))
             log.info(f"{RADNAD.ICONS['INFO']} Loaded {len(self.sessions)} Sessions, Last Acct-Session-Id: {self.counter}")
+
+        if self.persistence == self.PERSISTENCE_JOURNAL: # 💡 replay the Starts and Stops since the last snapshot
+            self.journal = SessionJournal(journal_file, self.save_sessions, None if self.readonly else self.sessions.copy)
+            for op,event in self.journal.replay(truncate=not self.readonly):
+                if op == 'start':
+                    self.sessions.add(event)
+                    if str(event.acct_session_id).isdigit(): self.counter = max(self.counter, int(event.acct_session_id))
+                else:
+                    self.sessions.remove(event)
+            log.info(f"{RADNAD.ICONS['INFO']} Replayed {self.journal.entries} journal events, {len(self.sessions)} Sessions, Last Acct-Session-Id: {self.counter}")
+
+        if interim < 0: raise ValueError(f"Invalid interim: {interim}")
+        if interim > 0: self.interim = InterimScheduler(self, interim)
+        if not isinstance(self.sessions, SessionSnapshot): self.schedule_sessions()
+
+
+    def schedule_sessions(self, records:list=None) -> None:
+        """
+        Schedule the expiry and any Interim-Updates of the sessions, like those loaded from the sessions file.
+        The `sqlite` persistence finds the expired sessions with its Expiry index and the `columnar` store with a vectorized scan
+        of its columns instead of the `expiry` heap.
+        :param records ([SessionRecord]) : the sessions to schedule. Default: all sessions
+        """
+        heap = self.database is None and self.store != self.STORE_COLUMNAR
+        if not heap and self.interim is None: return
+        for record in (self.sessions if records is None else records):
+            if heap: self.expiry.add(record.acct_session_id, self.expiry_time(record))
+            if self.interim is not None: self.interim.add(record, record.timestamp)
+
+
+    def save_sessions(self, sessions=None) -> None:
+        """
+        Write all of the sessions to the sessions file, in the `snapshot` format, replacing it atomically.
+
+        - sessions (SessionStore or SessionTable): a copy of the sessions, written by a journal compaction in a thread. Default: the sessions
+        """
+        sessions = self.sessions if sessions is None else sessions
+        filename = f"{self.sessions_file}.tmp"
+        if self.snapshot == self.SNAPSHOT_BINARY:
+            SessionSnapshot.save(filename, sessions, self.counter)
         else:
-            # No CSV, create a new DataFrame
-            self.sessions = pd.DataFrame(columns=self.SESSION_COLUMNS)
-            self.sessions.set_index([self.SESSION_COLUMNS[0]], inplace=True)
-            self.sessions.index = pd.to_datetime(self.sessions.index)
-            
+            sessions.to_csv(filename)
+            fd = os.open(filename, os.O_RDONLY)
+            os.fsync(fd)
+            os.close(fd)
+        os.replace(filename, self.sessions_file)
+
+
+    def expiry_time(self, record:SessionRecord=None) -> float:
+        """
+        Returns the time (epoch seconds) the session expires, or is dropped after `EXPIRY_DROP`.
+        """
+        return record.timestamp + min(record.session_timeout or self.EXPIRY_DROP, self.EXPIRY_DROP)
+
+
+    def remove_session(self, sid:str=None) -> None:
+        """
+        Remove the session from the sessions, its schedules and any database.
+        """
+        self.sessions.remove(sid)
+        self.expiry.remove(sid)
+        if self.interim is not None: self.interim.remove(sid)
+        if self.database is not None: self.database.delete(sid)
+        if self.journal is not None: self.journal.stop(sid)
+
+
+    @classmethod
+    def parse_sources(self, sources=None) -> list:
+        """
+        Returns the list of IPv4 addresses from the addresses and networks (CIDR), up to `SOURCES_MAX`.
+        Every address in `127.0.0.0/8` is local on Linux; other addresses must be assigned to an interface.
+
+        - sources (str or [str]): IP addresses or networks, comma-separated or a list. Example: `127.0.1.0/24` or `10.1.1.1,10.1.1.2`
+        """
+        if isinstance(sources, str): sources = [source.strip() for source in sources.split(',') if source.strip() != '']
+        addresses = []
+        for source in sources:
+            network = ipaddress.IPv4Network(source, strict=False) # raises ValueError
+            hosts = [network.network_address] if network.num_addresses == 1 else network.hosts()
+            for address in hosts:
+                if len(addresses) >= self.SOURCES_MAX:
+                    log.warning(f"{self.ICONS['WARN']} RADNAD: Using the first {self.SOURCES_MAX} source addresses")
+                    return addresses
+                addresses.append(str(address))
+        if len(addresses) == 0: raise ValueError(f"No source addresses in {sources}")
+        return addresses
+
+
+    @classmethod
+    def parse_mix(self, mix:str=LOAD_MIX_DEFAULT) -> dict:
+        """
+        Returns a dictionary of `load` scenario : weight from the comma-separated `scenario:weight` pairs.
+
+        - mix (str): the scenario weights. Example: `dot1x:50,mab:30,vpn:20`. A scenario without a weight has weight 1.
+        """
+        weights = {}
+        for item in [item.strip() for item in mix.split(',') if item.strip() != '']:
+            scenario,_sep,weight = item.partition(':')
+            if scenario not in self.LOAD_SCENARIOS: raise ValueError(f"Invalid load scenario: {scenario}")
+            weights[scenario] = float(weight) if weight else 1.0 # raises ValueError
+            if weights[scenario] < 0: raise ValueError(f"Invalid weight: {item}")
+        if sum(weights.values()) <= 0: raise ValueError(f"No load scenarios in {mix}")
+        return weights
+
+
+    @classmethod
+    def configure(cls, max_processes:int=None) -> AdmissionController:
+        """
+        Configures the AdmissionController shared by all RADNADs in this process and returns it.
+        Waiting requests are admitted immediately up to a higher limit.
+
+        - max_processes (int): the maximum concurrent `radclient` processes. Default: None (derived from `RLIMIT_NOFILE`)
+        """
+        if cls.admission is None: cls.admission = AdmissionController()
+        cls.admission.resize(AdmissionController.max_processes() if max_processes is None else max_processes)
+        return cls.admission
+
 
     def _handle_exception(self, e:Exception=None) -> None:
         """
@@ -592,11 +3891,21 @@ class RADNAD:
         print(f"{self.ICONS['ERROR']} RADNAD: {e.__class__} | {tb_text}", file=sys.stderr)
 
 
-    def __del__(self) -> None:
+    def close(self) -> None:
         """
-        Close the RADNAD by persisting any sessions' state.
+        Close any transport sockets and persist the sessions: commit the database, compact the journal or save the sessions file.
+        Call once the RADNAD is no longer used, before the event loop is closed.
+        💡 Not in `__del__`: the garbage collector may run it in the middle of an import of numpy or pandas.
         """
-        self.sessions.to_csv(self.SESSIONS_FILENAME, index=True)
+        if self.closed: return
+        self.closed = True
+        if self.udp: self.udp.close()
+        if self.database is not None:
+            self.database.close()
+        elif self.journal is not None:
+            self.journal.close(compact=not self.readonly) # 💡 compacts into the sessions file
+        elif not self.readonly and self.sessions is not None:
+            self.save_sessions()
 
 
     def generate_session_id(self) -> str:
@@ -654,17 +3963,21 @@ class RADNAD:
 
 
     @classmethod
-    def generate_mac(self, oui:str=None, sep:str='-') -> str:
+    def generate_mac(self, oui:str=None, sep:str='-', index:int=None) -> str:
         """
         Returns a random MAC prefixed with the specified OUI.
 
         oui (string): sep the group sep; default is '-'.
         sep (str): digits the number of digits in the group.
+        index (int): the number of the endpoint for the same MAC every time, with `ENDPOINT_OUI` if no OUI is given. Default: None (random)
         """
         if oui != None and not isinstance(oui, str): raise ValueError(f"RADNAD.generate_mac(oui): oui is not a string ({type(oui)})")
+        if index is not None:
+            if index < 0 or index >= 16777216: raise ValueError(f"RADNAD.generate_mac(index): index is not 0-16777215 ({index})")
+            oui = self.ENDPOINT_OUI if oui is None else oui
         # 16777216 == 2^24 and 'X' == capitalized hex
         oui = '{:06X}'.format(random.randint(1, 16777216)) if oui is None else oui  
-        mac = oui + '{:06X}'.format(random.randint(1, 16777216))
+        mac = oui + '{:06X}'.format(random.randint(1, 16777216) if index is None else index)
 
         # Format MAC address with the specified sep between groups of digits.
         # The default format is the IEEE 802 format: XX-XX-XX-XX-XX-XX
@@ -749,31 +4062,417 @@ class RADNAD:
         return ", ".join([f"{key}='{val}'" for key,val in attributes.items()])
 
 
-    async def _radclient_cli_cmd(self, attributes:dict=None) -> RADIUSResponse:
+    async def _request(self, command:str=COMMAND_DEFAULT, attributes:dict=None, server:RADIUSServer=None, scenario:str=None) -> RADIUSResponse:
         """
-        Performs a `radclient` CLI command and return a RADIUSResponse with the result.
+        Sends the request and returns a RADIUSResponse with the result, retrying timeouts with exponential backoff and full jitter until the `deadline`.
+        Without a `server`, each attempt selects a server with the ServerPool policy and, with `hedge`, may be hedged to a second server.
+        The attempts, hedging and the winning attempt are saved in the RADIUSResponse and counted in `retry_stats()`.
+        The latency from the first attempt to the reply (or timeout) is recorded for the scenario in `latency_report()`.
+
+        - command (str): the `radclient` command: `auth` or `acct`. Default: `COMMAND_DEFAULT`
+        - attributes (dict or MultiDict): a dictionary of RADIUS attributes
+        - server (RADIUSServer): the server to send the request, for accounting affinity. Default: the server selected by the ServerPool policy
+        - scenario (str): the scenario for the latency histograms. Default: the command
+        - raises TimeoutError when there is no reply after all retries or before the deadline
+        """
+        sent = time.time()
+        start = time.monotonic()
+        deadline = start + self.deadline
+        attempts = 0
+        self.retry_counts['requests'] += 1
+        for attempt in range(self.retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0: break
+            attempts += 1
+            self.retry_counts['attempts'] += 1
+            if attempt > 0: self.retry_counts['retries'] += 1
+            selected = self.servers.select() if server is None else server
+            try:
+                response = await asyncio.wait_for(self._hedged(command, attributes, selected, self.hedge and server is None), remaining)
+                response.attempts = attempts
+                response.sent = sent
+                response.latency = time.monotonic() - start
+                self.record_latency(scenario, command, response, response.latency)
+                return response
+            except (TimeoutError, asyncio.TimeoutError): # 💡 no reply (RADIUSResponse) or the wait_for() deadline
+                log.info(f"{RADNAD.ICONS['TIMEOUT']} RADNAD: No reply from {selected.address} ({attempts}/{self.retries+1})")
+            except Exception as e:
+                self.record_latency(scenario, command, e, time.monotonic() - start)
+                raise
+            if attempt < self.retries:
+                backoff = random.uniform(0, min(self.BACKOFF_MAX, self.backoff * 2 ** attempt)) # 💡 full jitter spreads the retries of many requests
+                await asyncio.sleep(min(backoff, max(0, deadline - time.monotonic())))
+        self.retry_counts['timeouts'] += 1
+        self.record_latency(scenario, command, None, time.monotonic() - start)
+        raise TimeoutError(f"(0) No reply from server after {attempts} attempts in {time.monotonic() - start:0.3f} seconds")
+
+
+    async def _hedged(self, command:str=COMMAND_DEFAULT, attributes:dict=None, server:RADIUSServer=None, hedge:bool=False) -> RADIUSResponse:
+        """
+        Sends the request to the server and, with hedge, a duplicate to another server when there is no reply within the server's `HEDGE_PERCENTILE` latency.
+        Returns the first reply and cancels the other request.
+        """
+        delay = server.percentile(self.HEDGE_PERCENTILE) if hedge else None
+        other = None if delay is None else self.servers.select(exclude=server)
+        if other is None:
+            response = await self._attempt(command, attributes, server)
+            response.winner = 'primary'
+            return response
+
+        primary = asyncio.ensure_future(self._attempt(command, attributes, server))
+        tasks = {primary: 'primary'}
+        try:
+            done,_pending = await asyncio.wait([primary], timeout=delay)
+            if not done:
+                self.retry_counts['hedges'] += 1
+                tasks[asyncio.ensure_future(self._attempt(command, attributes, other))] = 'hedge'
+            errors = []
+            pending = set(tasks)
+            while pending:
+                done,pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        errors.append(task.exception())
+                        continue
+                    response = task.result()
+                    response.hedged = len(tasks) > 1
+                    response.winner = tasks[task]
+                    if response.winner == 'hedge': self.retry_counts['hedge_wins'] += 1
+                    return response
+            raise errors[0]
+        finally:
+            for task in tasks: task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True) # 💡 wait for the cancelled request to clean up
+
+
+    async def _attempt(self, command:str=COMMAND_DEFAULT, attributes:dict=None, server:RADIUSServer=None) -> RADIUSResponse:
+        """
+        Sends the request once to the server with the configured transport and returns a RADIUSResponse with the result.
+
+        - raises TimeoutError
+        """
+        port = self.auth_port if command == 'auth' else self.acct_port
+        self.servers.start(server)
+        try:
+            if self.transport == self.TRANSPORT_UDP:
+                local = attributes.get('NAS-IP-Address', None) if self.sources else None
+                local = local if local in self.sources_set else RADIUSUDPClient.LOCAL_ADDRESS_DEFAULT
+                start = time.monotonic()
+                response = RADIUSResponse(await self.udp.request(server.address, port, command, attributes, local))
+                response.rtt = time.monotonic() - start
+            elif self.coalescer:
+                response = await self.coalescer.request((server, port, command), attributes)
+            else:
+                response = await self._radclient_cli_cmd(attributes, command, server)
+        except asyncio.CancelledError:
+            self.servers.cancel(server) # 💡 a cancelled hedge is neither a reply nor an error
+            raise
+        except Exception:
+            self.servers.finish(server, [True])
+            raise
+        self.servers.finish(server, [False], response.rtt)
+        return response
+
+
+    def retry_stats(self) -> dict:
+        """
+        Returns a dictionary with the number of requests, attempts, retries, hedges, hedge wins and timeouts.
+        """
+        return {key:self.retry_counts[key] for key in ['requests', 'attempts', 'retries', 'hedges', 'hedge_wins', 'timeouts']}
+
+
+    def record_latency(self, scenario:str=None, command:str=COMMAND_DEFAULT, result=None, seconds:float=0) -> None:
+        """
+        Count the latency of a request in the histogram of its scenario, request type and outcome.
+
+        - scenario (str): the scenario, like `mab_wired`. Default: the command
+        - command (str): the `radclient` command: `auth` or `acct`
+        - result (RADIUSResponse or Exception): the response, None or a TimeoutError for a timeout, or the exception of an error
+        - seconds (float): the time from sending the request to its reply, timeout or error
+        """
+        request = RADIUSResponse.ACCESS_REQUEST if command == 'auth' else RADIUSResponse.ACCOUNTING_REQUEST
+        if isinstance(result, RADIUSResponse):
+            outcome = LatencyHistogram.OUTCOMES.get(result.rsp_type, result.rsp_type)
+        elif result is None or isinstance(result, (TimeoutError, asyncio.TimeoutError)):
+            outcome = LatencyHistogram.OUTCOME_TIMEOUT
+        else:
+            outcome = LatencyHistogram.OUTCOME_ERROR
+        key = (scenario or command, request, outcome)
+        histogram = self.latency.get(key, None)
+        if histogram is None: histogram = self.latency[key] = LatencyHistogram()
+        histogram.record(seconds)
+        scope = self.LATENCY_SCOPE.get()
+        if scope is not None: # 💡 a daemon command's own histograms
+            if key not in scope: scope[key] = LatencyHistogram()
+            scope[key].record(seconds)
+
+
+    def latency_report(self) -> list:
+        """
+        Returns a list of dictionaries with the count, mean, p50, p90, p99, p99.9 and maximum latency, in milliseconds,
+        of the requests for each scenario, request type (Access-Request or Accounting-Request) and outcome (accept, reject, timeout, error).
+        """
+        return LatencyHistogram.report(self.latency)
+
+
+    def metrics(self) -> str:
+        """
+        Returns the request, timeout, `radclient` process, session, expiry lag and latency metrics in the Prometheus text format.
+        See `MetricsServer` to serve them.
+        """
+        out = io.StringIO()
+        label = lambda value: str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        def metric(name:str=None, type:str=None, help:str=None, samples:list=None):
+            print(f"# HELP {name} {help}\n# TYPE {name} {type}", file=out)
+            for labels,value in samples:
+                labels = ','.join(f'{key}="{label(val)}"' for key,val in labels.items())
+                print(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}", file=out)
+        def histogram(name:str=None, help:str=None, histograms:list=None):
+            help = f"{help}. Approximate bucket counts: each sample is counted at the midpoint of its LatencyHistogram bucket"
+            print(f"# HELP {name} {help}\n# TYPE {name} histogram", file=out)
+            for labels,values in histograms:
+                labels = [f'{key}="{label(val)}"' for key,val in labels.items()]
+                for bound,count in zip(self.METRICS_BUCKETS + [math.inf], values.cumulative(self.METRICS_BUCKETS) + [values.count]):
+                    le = 'le="+Inf"' if bound == math.inf else f'le="{bound:g}"'
+                    print(f"{name}_bucket{{{','.join(labels + [le])}}} {count}", file=out)
+                labels = f"{{{','.join(labels)}}}" if labels else ''
+                print(f"{name}_sum{labels} {values.total}\n{name}_count{labels} {values.count}", file=out)
+
+        keys = lambda key: {'scenario': key[0], 'request': key[1], 'outcome': key[2]}
+        metric('radnad_requests_total', 'counter', 'RADIUS requests by scenario, request type and outcome',
+               [(keys(key), histogram.count) for key,histogram in sorted(self.latency.items())])
+        for name in ['attempts', 'retries', 'hedges', 'timeouts']:
+            metric(f"radnad_{name}_total", 'counter', f"RADIUS request {name}", [({}, self.retry_counts[name])])
+        admission = RADNAD.admission.stats()
+        metric('radnad_radclient_processes', 'gauge', 'radclient processes running', [({}, admission['active'])])
+        metric('radnad_radclient_processes_limit', 'gauge', 'maximum concurrent radclient processes', [({}, admission['limit'])])
+        metric('radnad_radclient_queued', 'gauge', 'requests waiting for a radclient process', [({}, admission['depth'])])
+        metric('radnad_radclient_rejected_total', 'counter', 'requests rejected by a full admission queue', [({}, admission['rejected'])])
+        metric('radnad_server_outstanding', 'gauge', 'requests awaiting a reply from each RADIUS server', [({'server': server.host}, server.outstanding) for server in self.servers])
+        metric('radnad_sessions', 'gauge', 'active sessions by method',
+               [({'method': method}, count) for method,count in sorted(self.sessions.count('Method').items())])
+        if self.interim is not None: metric('radnad_interim_sessions', 'gauge', 'active sessions with scheduled Interim-Updates', [({}, len(self.interim))])
+        histogram('radnad_request_latency_seconds', 'RADIUS request latency, including retries, by scenario, request type and outcome',
+                  [(keys(key), histogram) for key,histogram in sorted(self.latency.items())])
+        histogram('radnad_expiry_lag_seconds', 'time from the Session-Timeout of each expired session to the reply to its Accounting Stop', [({}, self.expiry_lag)])
+        return out.getvalue()
+
+
+    async def _radclient_coalesced(self, key:tuple=None, attributes_list:list=None) -> list:
+        """
+        Sends the requests collected by the RequestCoalescer for the (server, port, command) key with a single `radclient` process.
+        """
+        server,_port,command = key
+        log.debug(f"▷ RADNAD._radclient_coalesced(key:{key}, attributes_list:[{len(attributes_list)}])")
+        return await self._radclient_batch(command, attributes_list, server, report=True)
+
+
+    def _radclient_argv(self, command:str=COMMAND_DEFAULT, options:list=None, server:RADIUSServer=None) -> list:
+        """
+        Returns the `radclient` argv for the command from a template built once per (server, port, command).
+
+        - command (str): the `radclient` command: `auth` or `acct`. Default: `COMMAND_DEFAULT`
+        - options ([str]): any additional `radclient` options for this invocation
+        - server (RADIUSServer): the server to send the requests. Default: the first server
+        """
+        server = self.servers.servers[0] if server is None else server
+        port = self.auth_port if command == 'auth' else self.acct_port
+        argv = self.argv.get((server.address, port, command), None)
+        if argv is None:
+            radclient = shutil.which('radclient') or 'radclient' # 💡 resolve the path once instead of every exec
+            argv = self.argv[(server.address, port, command)] = [radclient, '-t', str(self.timeout), *shlex.split(self.options), f"{server.address}:{port}", command, self.secret]
+        return argv if options is None else argv[:-3] + options + argv[-3:]
+
+
+    async def _radclient(self, argv:list=None, input:str=None) -> tuple:
+        """
+        Runs `radclient`, once admitted by the AdmissionController, writing the input to its stdin,
+        and returns its (stdout, stderr) text and the time, in seconds, it ran after admission.
+        💡 No shell: the attribute values are never interpreted by `/bin/sh` and no `echo` process is needed.
+
+        - argv ([str]): the `radclient` argv from `_radclient_argv()`
+        - input (str): the `radclient` request attributes. Default: None
+        - raises AdmissionError when too many requests are already waiting for a `radclient` process
+        """
+        log.info(f"RADNAD._radclient() argv: {shlex.join(argv[:-1] + [self.redact(argv[-1])])}")
+        async with RADNAD.admission:
+            start = time.monotonic() # 💡 exclude the admission wait from the round trip time
+            process = await asyncio.create_subprocess_exec(*argv,
+                                                           stdin=asyncio.subprocess.DEVNULL if input is None else asyncio.subprocess.PIPE,
+                                                           stdout=asyncio.subprocess.PIPE,
+                                                           stderr=asyncio.subprocess.PIPE)
+            try:
+                stdout,stderr = await process.communicate(None if input is None else input.encode())
+            except asyncio.CancelledError:
+                process.kill() # 💡 a cancelled (hedged or past the deadline) request must not leave radclient running
+                await process.wait()
+                raise
+        return stdout.decode(), stderr.decode(), time.monotonic() - start
+
+
+    @classmethod
+    def to_radclient_input(self, attributes:dict=None) -> str:
+        """
+        Return the `radclient` input for a request with one `key = "value"` attribute per line.
+        Backslashes and double-quotes in values are escaped.
+
+        - attributes (dict or MultiDict): a dictionary of RADIUS attributes
         """
-        attrs_string = self.to_avp_string(attributes)  # Stringify attrs for radclient CLI
-        cmd = f"""echo "{attrs_string}" | radclient -x {self.server}:{self.auth_port} auth {self.secret}"""
-        log.info(f"RADNAD.auth() cmd: {cmd}")
+        lines = []
+        for key,val in attributes.items():
+            val = str(val).replace('\\', '\\\\').replace('"', '\\"')
+            lines.append(f'{key} = "{val}"')
+        return '\n'.join(lines) + '\n'
 
-        # 🚧 ToDo: Prevent OSError: [Errno 24] Too many open files
-        process = await asyncio.create_subprocess_shell(cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
-        stdout,stderr = await process.communicate() # read a line of output from the program
-        std_out = stdout.decode() # read stdout
-        std_err = stderr.decode() # read stderr
+
+    async def _radclient_cli_cmd(self, attributes:dict=None, command:str=COMMAND_DEFAULT, server:RADIUSServer=None) -> RADIUSResponse:
+        """
+        Performs a `radclient` CLI command and return a RADIUSResponse with the result.
+        """
+        # 💡 radclient sends the request once (`-r 1`); RADNAD._request() retries with backoff until the deadline
+        std_out,std_err,elapsed = await self._radclient(self._radclient_argv(command, ['-r', '1'], server), self.to_radclient_input(attributes))
         response = RADIUSResponse(std_out) # parses radclient output
+        response.rtt = elapsed
         if std_err:
             log.error(f"{self.ICONS['ERROR']} {std_err}")
-            print(f"{self.ICONS['ERROR']} {response.guess_access_method()} {response.req_attrs['Calling-Station-Id']} {response.req_attrs['User-Name']} {std_err}", end="", file=sys.stderr)
+            self._print_std_err(response, std_err)
         return response
 
 
-    async def auth(self, attributes:dict=None) -> str:
+    def _print_std_err(self, response:RADIUSResponse=None, std_err:str=None) -> None:
+        """
+        Print the `radclient` stderr for an authentication response.
+        """
+        if std_err and isinstance(response, RADIUSResponse) and response.is_auth():
+            print(f"{self.ICONS['ERROR']} {response.guess_access_method()} {response.req_attrs.get('Calling-Station-Id', '')} {response.req_attrs.get('User-Name', '')} {std_err}", end="", file=sys.stderr)
+
+
+    async def _request_many(self, command:str=COMMAND_DEFAULT, attributes_list:list=None, batch_size:int=BATCH_SIZE_DEFAULT, server:RADIUSServer=None, scenario:str=None) -> list:
+        """
+        Sends many requests with the configured transport, with the same retries, backoff and deadline as `_request()`.
+        Returns a list of RADIUSResponse, or TimeoutError for requests without a reply, in the order of the attributes.
+
+        - command (str): the `radclient` command: `auth` or `acct`. Default: `COMMAND_DEFAULT`
+        - attributes_list ([dict or MultiDict]): a list of RADIUS attribute dictionaries
+        - batch_size (int): the maximum number of requests per `radclient` process. Default: `BATCH_SIZE_DEFAULT`
+        - server (RADIUSServer): the server to send the requests. Default: the server selected by the ServerPool policy for each batch
+        - scenario (str): the scenario for the latency histograms. Default: the command
+        """
+        if self.transport == self.TRANSPORT_RADCLIENT:
+            async def request_batch(batch:list=None) -> list:
+                batch_server = self.servers.select() if server is None else server
+                self.servers.start(batch_server, len(batch))
+                results = []
+                sent = time.time()
+                start = time.monotonic()
+                try:
+                    results = await self._radclient_batch_retry(command, batch, batch_server)
+                except Exception as e:
+                    for _attrs in batch: self.record_latency(scenario, command, e, time.monotonic() - start)
+                    raise
+                finally:
+                    self.servers.finish(batch_server, [isinstance(result, Exception) for result in results] + [True] * (len(batch) - len(results)))
+                latency = time.monotonic() - start # 💡 the replies of a batch are only known when its radclient exits
+                for result in results:
+                    if isinstance(result, RADIUSResponse): result.sent,result.latency = sent,latency
+                    self.record_latency(scenario, command, result, latency)
+                return results
+
+            # 💡 concurrent batches, so a batch waiting out a timeout does not hold up the others; RADNAD.admission limits the radclient processes
+            batches = await asyncio.gather(*[request_batch(attributes_list[n:n+batch_size]) for n in range(0, len(attributes_list), batch_size)])
+            return [result for results in batches for result in results]
+
+        async def request(attributes:dict=None):
+            try:
+                return await self._request(command, attributes, server, scenario)
+            except (TimeoutError, asyncio.TimeoutError) as e:
+                return e
+        return await asyncio.gather(*[request(attrs) for attrs in attributes_list])
+
+
+    async def _radclient_batch_retry(self, command:str=COMMAND_DEFAULT, attributes_list:list=None, server:RADIUSServer=None) -> list:
+        """
+        Sends the requests with `_radclient_batch()` and resends the requests without a reply in smaller batches,
+        with exponential backoff and full jitter, until there are no more retries or the `deadline`.
+        Returns a list of RADIUSResponse, or TimeoutError for requests without a reply, in the order of the attributes.
+        """
+        start = time.monotonic()
+        deadline = start + self.deadline
+        results = [None] * len(attributes_list)
+        unanswered = list(range(len(attributes_list)))
+        self.retry_counts['requests'] += len(attributes_list)
+        for attempt in range(self.retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0: break
+            self.retry_counts['attempts'] += len(unanswered)
+            if attempt > 0: self.retry_counts['retries'] += len(unanswered)
+            try:
+                replies = await asyncio.wait_for(self._radclient_batch(command, [attributes_list[i] for i in unanswered], server), remaining)
+            except asyncio.TimeoutError:
+                replies = [TimeoutError(f"(0) No reply from server before the deadline")] * len(unanswered)
+            for i,reply in zip(unanswered, replies):
+                results[i] = reply
+                if isinstance(reply, RADIUSResponse): reply.attempts = attempt + 1
+            unanswered = [i for i in unanswered if isinstance(results[i], TimeoutError)]
+            if len(unanswered) == 0: break
+            if attempt < self.retries:
+                backoff = random.uniform(0, min(self.BACKOFF_MAX, self.backoff * 2 ** attempt))
+                await asyncio.sleep(min(backoff, max(0, deadline - time.monotonic())))
+        for i in unanswered:
+            if results[i] is None: results[i] = TimeoutError(f"(0) No reply from server before the deadline")
+        self.retry_counts['timeouts'] += len(unanswered)
+        return results
+
+
+    async def _radclient_batch(self, command:str=COMMAND_DEFAULT, attributes_list:list=None, server:RADIUSServer=None, tries:int=1, report:bool=False) -> list:
+        """
+        Performs a single `radclient` CLI command sending all of the requests from an input file (`-f`) in parallel (`-p`).
+        Returns a list of RADIUSResponse, or TimeoutError for requests without a reply, in the order of the attributes.
+
+        - tries (int): the number of times `radclient` sends each request without a reply (`-r`). Default: 1
+        - report (bool): print the `radclient` stderr of each request like `_radclient_cli_cmd()`. Default: False
+        """
+        session_ids = [str(attrs.get('Acct-Session-Id', '')) for attrs in attributes_list]
+        if len(set(session_ids)) < len(session_ids):
+            # 💡 replies are matched to their request by Acct-Session-Id: send the repeated requests of a session
+            # (e.g. a Start and an Interim-Update coalesced together) with separate radclient invocations, in order
+            runs = [[]]
+            sids = set()
+            for attrs,sid in zip(attributes_list, session_ids):
+                if sid in sids:
+                    runs.append([])
+                    sids = set()
+                runs[-1].append(attrs)
+                sids.add(sid)
+            results = []
+            for run in runs:
+                results += await self._radclient_batch(command, run, server, tries, report)
+            return results
+        with tempfile.NamedTemporaryFile(mode='w', prefix='radnad.', suffix='.txt') as file:
+            for attrs in attributes_list:
+                print(self.to_radclient_input(attrs), file=file) # 💡 radclient packets are separated by a blank line
+            file.flush()
+            log.info(f"RADNAD._radclient_batch() {len(attributes_list)} requests")
+            std_out,std_err,_elapsed = await self._radclient(self._radclient_argv(command, ['-r', str(tries), '-p', str(self.BATCH_PARALLEL_DEFAULT), '-f', file.name], server))
+        if std_err: log.error(f"{self.ICONS['ERROR']} {std_err}")
+        responses = RADIUSResponse.parse_many(std_out + '\n' + std_err, session_ids)
+        if report and std_err:
+            # 💡 radclient prefixes its stderr lines with `(n)`, the request number in the input file
+            errors = collections.defaultdict(str)
+            for line in std_err.splitlines(keepends=True):
+                n = line[1:line.find(')')] if line.startswith('(') else ''
+                errors[int(n) if n.isdigit() else None] += line
+            for n,sid in enumerate(session_ids):
+                self._print_std_err(responses[sid], errors.get(n, ''))
+        return [responses[sid] for sid in session_ids]
+
+
+    async def auth(self, attributes:dict=None, scenario:str=None) -> str:
         """
         Performs a `radclient` authentication and returns a RADIUSResponse object.
 
         - attributes (dict or MultiDict): a dictionary of RADIUS attributes
+        - scenario (str): the scenario for the latency histograms. Default: `auth`
         - raises TimeoutError
 
         Require use of MultiDict to support these protocol requirements:
@@ -782,7 +4481,30 @@ class RADNAD:
         📄 RFC2866: The client MUST NOT require attributes of the same type to be contiguous.
         """
         log.debug(f"▷ RADNAD.auth(attributes:{attributes})")
+        return await self._request('auth', self._auth_attributes(attributes), scenario=scenario)
+
+
+    async def auth_many(self, attributes_list:list=None, batch_size:int=BATCH_SIZE_DEFAULT, scenario:str=None) -> dict:
+        """
+        Performs many authentications and returns a dictionary of `Acct-Session-Id` : RADIUSResponse (or TimeoutError).
+        With the `radclient` transport, each `radclient` process sends up to `batch_size` requests.
+
+        - attributes_list ([dict or MultiDict]): a list of RADIUS attribute dictionaries, one per authentication
+        - batch_size (int): the maximum number of requests per `radclient` process. Default: `BATCH_SIZE_DEFAULT`
+        - scenario (str): the scenario for the latency histograms. Default: `auth`
+        """
+        log.debug(f"▷ RADNAD.auth_many(attributes_list:[{len(attributes_list)}], batch_size:{batch_size})")
+        attributes_list = [self._auth_attributes(attributes) for attributes in attributes_list]
+        responses = await self._request_many('auth', attributes_list, batch_size, scenario=scenario)
+        return {str(attrs['Acct-Session-Id']):response for attrs,response in zip(attributes_list, responses)}
+
 
+    def _auth_attributes(self, attributes:dict=None) -> MultiDict:
+        """
+        Returns the validated authentication attributes with the NAS-Identifier and a new Acct-Session-Id.
+
+        - attributes (dict or MultiDict): a dictionary of RADIUS attributes
+        """
         if attributes is None: raise ValueError('attributes is None')
         if not isinstance(attributes, dict) and not isinstance(attributes, MultiDict): raise ValueError(f"attributes is not a dict or MultiDict: {type(attributes)}")
         if len(attributes) <= 0: raise ValueError('auth(attributes) is empty')
@@ -793,6 +4515,10 @@ class RADNAD:
         if attributes.get('NAS-Identifier', None) is None: # add NAS-Identifier
             attributes['NAS-Identifier'] = self.name
 
+        if self.sources and attributes.get('NAS-IP-Address', None) is None:
+            # 💡 The session's NAD: the NAS-IP-Address is also the source address of all of its requests
+            attributes['NAS-IP-Address'] = random.choice(self.sources)
+
         # ISE Error 11015: An Access-Request MUST contain at least a NAS-IP-Address, NAS-IPv6-Address, or a NAS-Identifier
         # 🚧 ToDo: Validate required RADIUS attributes
         if (attributes.get('NAS-IP-Address', None) is None and
@@ -817,14 +4543,15 @@ class RADNAD:
 
         # 📄 RFC2866: No other Attributes defined in this document are permitted in an Access-Challenge.
 
-        return await self._radclient_cli_cmd(attributes)
+        return attributes
 
 
-    async def acct(self, auth:RADIUSResponse=None, state:str=ACCT_START):
+    async def acct(self, auth:RADIUSResponse=None, state:str=ACCT_START, scenario:str=None):
         """
         Uses the `auth` RADIUSResponse to send a RADIUS accounting start message to the RADIUS server.
 
         - auth (RADIUSResponse): an authentication RADIUSResponse.
+        - scenario (str): the scenario for the latency histograms. Default: `acct`
         - raises TimeoutError
 
         🚧 ToDo: Which attributes are required to Start a session in ISE?
@@ -847,7 +4574,39 @@ class RADNAD:
             log.error(f" ACCESS-REJECTED: Nothing to account {auth}")
             return auth
         if state != self.ACCT_START and state != self.ACCT_STOP: raise ValueError(f"acct(state) is invalid")
+        # 💡 Send the accounting to the server that authenticated the session
+        return await self._request('acct', self._acct_attributes(auth, state), self.servers.get(auth.srv_ip), scenario)
+
+
+    async def acct_many(self, auths:list=None, state:str=ACCT_START, batch_size:int=BATCH_SIZE_DEFAULT, scenario:str=None) -> dict:
+        """
+        Sends accounting requests for each accepted authentication RADIUSResponse.
+        Returns a dictionary of `Acct-Session-Id` : RADIUSResponse (or TimeoutError).
+        Rejected, challenged and timed out authentications are ignored.
+
+        - auths ([RADIUSResponse]): authentication RADIUSResponses, like the values from `auth_many()`
+        - state (str): the Acct-Status-Type. Default: ACCT_START
+        - batch_size (int): the maximum number of requests per `radclient` process. Default: `BATCH_SIZE_DEFAULT`
+        - scenario (str): the scenario for the latency histograms. Default: `acct`
+        """
+        if state != self.ACCT_START and state != self.ACCT_STOP: raise ValueError(f"acct_many(state) is invalid")
+        auths = [auth for auth in auths if isinstance(auth, RADIUSResponse) and auth.is_passed()]
+        log.debug(f"▷ RADNAD.acct_many(auths:[{len(auths)}], state:{state}, batch_size:{batch_size})")
+        responses = {}
+        for srv_ip in set(auth.srv_ip for auth in auths): # 💡 Send the accounting to the server that authenticated each session
+            attributes_list = [self._acct_attributes(auth, state) for auth in auths if auth.srv_ip == srv_ip]
+            results = await self._request_many('acct', attributes_list, batch_size, self.servers.get(srv_ip), scenario)
+            responses.update({str(attrs['Acct-Session-Id']):response for attrs,response in zip(attributes_list, results)})
+        return responses
+
+
+    def _acct_attributes(self, auth:RADIUSResponse=None, state:str=ACCT_START) -> MultiDict:
+        """
+        Returns the accounting attributes for the session of the `auth` RADIUSResponse.
 
+        - auth (RADIUSResponse): an authentication RADIUSResponse.
+        - state (str): the Acct-Status-Type. Default: ACCT_START
+        """
         if len(auth.rsp_attrs) <= 0: raise ValueError(f"auth.rsp_attrs is empty: {auth}")
 
         # Merge all auth request & response attributes into a single list
@@ -886,17 +4645,7 @@ class RADNAD:
         if attrs.get('NAS-Port', None) is None and attrs.get('NAS-Port-Type', None) is None:
             print(f"{self.ICONS['WARN']} No NAS-Port or NAS-Port-Type", file=sys.stderr)
 
-        attrs_string = self.to_avp_string(attrs)  # Stringify attrs for radclient CLI
-        cmd = f"""echo "{attrs_string}" | radclient -x {self.server}:{self.acct_port} acct {self.secret}"""
-        log.info(f"RADNAD.acct() cmd: {cmd}")
-
-        process = await asyncio.create_subprocess_shell(cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
-        stdout,stderr = await process.communicate() # read a line of output from the program
-        std_out = stdout.decode() # read stdout
-        std_err = stderr.decode() # read stderr
-        if std_err: log.error(f"{self.ICONS['ERROR']} {std_err}")
-
-        return RADIUSResponse(std_out) # parses radclient output
+        return attrs
 
 
     async def acct_stop(self, response:RADIUSResponse=None, state:str=ACCT_STOP):
@@ -910,24 +4659,23 @@ class RADNAD:
         - Acct-Session-Id     # May be anything but must include something
         """
         log.debug(f"▷ RADNAD.acct_stop(response={response}, state={state})")
+        if response is None: raise ValueError(f"acct_stop(response) is None")
 
-        # 🚧 ToDo: 📄 RFC2866: The start and stop records for a given session MUST have the same Acct-Session-Id.
-        # 🚧 ToDo: 📄 RFC2866
+        # 📄 RFC2866: The start and stop records for a given session MUST have the same Acct-Session-Id.
+        attrs = MultiDict(response.req_attrs)
+        if attrs.get('Acct-Session-Id', None) is None: raise ValueError(f"Acct-Session-Id is None")
+        for key in ['User-Password', 'CHAP-Password', 'Reply-Message', 'State', 'Cleartext-Password']:
+            attrs.popall(key, None) # 📄 RFC2866: MUST NOT be present in an Accounting-Request
+        attrs['Acct-Status-Type'] = state
 
         # This attribute indicates how many seconds the user has received service for, and can only be present in Accounting-Request records where the Acct-Status-Type is set to Stop.
-        attrs['Acct-Session-Time'] = (datetime.datetime.now(tz=None) - response.timestamp).seconds
+        attrs['Acct-Session-Time'] = int(time.time() - response.timestamp)
+        if self.interim is not None:
+            for name,value in self.interim.counters(attrs['Acct-Session-Id']).items(): attrs.setdefault(name, value) # final counters
 
-        # 🚧 ToDo - use return await self._radclient_cli_cmd(attributes)
-        attrs_string = self.to_avp_string(attrs)  # Stringify attrs for radclient CLI
-        cmd = f"""echo "{attrs_string}" | radclient -x {self.server}:{self.acct_port} acct {self.secret}"""
-        log.info(f"RADNAD.acct() cmd: {cmd}")
-
-        process = await asyncio.create_subprocess_shell(cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
-        stdout,stderr = await process.communicate() # read a line of output from the program
-        std_out = stdout.decode() # read stdout
-        std_err = stderr.decode() # read stderr
-        if std_err: log.error(f"{self.ICONS['ERROR']} {std_err}")
-        return RADIUSResponse(std_out) # parses radclient output
+        stop = await self._request('acct', attrs, self.servers.get(response.srv_ip), 'acct_stop')
+        if self.interim is not None and stop.is_accepted(): self.interim.remove(attrs['Acct-Session-Id'])
+        return stop
 
 
     async def acct_stop_by_attrs(self, attrs:dict=None):
@@ -955,27 +4703,31 @@ class RADNAD:
         # 📄 RFC2866: Acct-Session-Time can only be present in Accounting-Request records where the Acct-Status-Type is set to Stop
         #    Acct-Session-Time indicates how many seconds the user has received service for.
         if attrs.get('Timestamp', None) != None:
-            attrs['Acct-Session-Time'] = (datetime.datetime.now(tz=None) - attrs.get('Timestamp')).seconds
-
-        # 🚧 ToDo - use return await self._radclient_cli_cmd(attributes)
-        attrs_string = self.to_avp_string(attrs)  # Stringify attrs for radclient CLI
-        cmd = f"""echo "{attrs_string}" | radclient -x {self.server}:{self.acct_port} acct {self.secret}"""
-        log.info(f"RADNAD.acct() cmd: {cmd}")
-
-        process = await asyncio.create_subprocess_shell(cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
-        stdout,stderr = await process.communicate() # read a line of output from the program
-        std_out = stdout.decode() # read stdout
-        std_err = stderr.decode() # read stderr
-        if std_err: log.error(f"{self.ICONS['ERROR']} {std_err}")
-
-        response = RADIUSResponse(std_out) # parses radclient output
+            attrs['Acct-Session-Time'] = (datetime.datetime.now(tz=None) - attrs.pop('Timestamp')).seconds
+        if self.interim is not None and attrs.get('Acct-Status-Type') == self.ACCT_STOP:
+            for name,value in self.interim.counters(attrs.get('Acct-Session-Id')).items(): attrs.setdefault(name, value) # final counters
+
+        # 💡 Send the Stop to the server that started the session, from the same NAD
+        server = self.servers.get(attrs.pop('Server', None) or self.get_session_value(attrs.get('Acct-Session-Id'), 'Server'))
+        if self.sources and attrs.get('NAS-IP-Address', None) is None:
+            nas_ip = self.get_session_value(attrs.get('Acct-Session-Id'), 'NAS-IP-Address')
+            if nas_ip: attrs['NAS-IP-Address'] = nas_ip
+        response = await self._request('acct', attrs, server, 'acct_stop')
         # print(f"{self.ICONS['INFO']} Acct STOP response: {response.is_accepted()}\n{response}", file=sys.stderr)
         if response.is_accepted(): # Remove session
-            self.sessions.drop(self.sessions.loc[self.sessions['Acct-Session-Id'] == attrs.get('Acct-Session-Id')].index, inplace=True)
+            # 💡 Select by Acct-Session-Id, not the Timestamp index which concurrent sessions may share
+            self.remove_session(attrs.get('Acct-Session-Id'))
             # print(f"{self.ICONS['STOP']} Removed session-id: {attrs.get('Acct-Session-Id')} {attrs.get('User-Name')}", file=sys.stderr)
         return response
 
 
+    def server_stats(self) -> list:
+        """
+        Returns a list of dictionaries with the request statistics of each RADIUS server.
+        """
+        return [server.stats() for server in self.servers]
+
+
     async def auto(self, ):
         """
         🚧 ToDo - Not Implemented.
@@ -1091,12 +4843,13 @@ class RADNAD:
 
 
     # async def session(self, attrs:dict=None, response_handler:callable=session_response_handler):
-    async def session(self, attrs:dict=None):
+    async def session(self, attrs:dict=None, scenario:str=None):
         """
         Convenience function to perform both authentication and authorization to create a session.
         A session is started upon the acknowledgment of the accounting request from the RADIUS server.
 
         - attrs (dict or MultiDict): a dictionary of RADIUS attributes to use for the authentication.
+        - scenario (str): the scenario for the latency histograms, like `mab_wired`. Default: `session`
         - response_handler (callable): a function to handle the session response.
         - raises TimeoutError
         """
@@ -1104,13 +4857,14 @@ class RADNAD:
         log.debug(f"▷ RADNAD.session(attrs:{attrs})")
 
         # Perform an authentication with the specified attributes
-        response = await self.auth(attrs)    # returns RADIUSResponse
+        scenario = 'session' if scenario is None else scenario
+        response = await self.auth(attrs, scenario)    # returns RADIUSResponse
         if response.rsp_type == RADIUSResponse.ACCESS_ACCEPT:
             # Authentication Passed
             log.info(f"{self.RESPONSE_ICONS[response.rsp_type]} {response.rsp_type} {response.__dict__}")
 
             # Send Accounting request
-            response = await self.acct(response) # returns RADIUSResponse
+            response = await self.acct(response, scenario=scenario) # returns RADIUSResponse
             if response.rsp_type == RADIUSResponse.ACCOUNTING_RESPONSE:
                 log.info(f"{self.RESPONSE_ICONS[response.rsp_type]} {response.rsp_type} {response.__dict__}")
                 await self.create_session(response)
@@ -1130,6 +4884,27 @@ class RADNAD:
         return response
 
 
+    async def session_many(self, attributes_list:list=None, batch_size:int=BATCH_SIZE_DEFAULT, scenario:str=None) -> dict:
+        """
+        Convenience function to create many sessions using `auth_many()` and `acct_many()`.
+        Returns a dictionary of `Acct-Session-Id` : RADIUSResponse (or TimeoutError) with the
+        Accounting-Response for each accepted authentication or the Access-Request's response otherwise.
+
+        - attributes_list ([dict or MultiDict]): a list of RADIUS attribute dictionaries, one per session
+        - batch_size (int): the maximum number of requests per `radclient` process. Default: `BATCH_SIZE_DEFAULT`
+        - scenario (str): the scenario for the latency histograms. Default: `session_many`
+        """
+        log.debug(f"▷ RADNAD.session_many(attributes_list:[{len(attributes_list)}], batch_size:{batch_size})")
+        scenario = 'session_many' if scenario is None else scenario
+        responses = await self.auth_many(attributes_list, batch_size, scenario)
+        accounting = await self.acct_many(responses.values(), self.ACCT_START, batch_size, scenario)
+        for response in accounting.values():
+            if isinstance(response, RADIUSResponse) and response.rsp_type == RADIUSResponse.ACCOUNTING_RESPONSE:
+                await self.create_session(response)
+        responses.update(accounting)
+        return responses
+
+
     async def dot1x_wired_pap(self, username:str=None, password:str=None, calling:str=None, called:str=None, nas_port_id=None, attributes:dict=None):
         """
         Convenience function to perform a RADIUS wired PAP authentication and accounting request.
@@ -1164,7 +4939,7 @@ class RADNAD:
         if attributes and len(attributes) > 0:
             attrs.update(attributes) # override defaults
 
-        return await self.session(attrs)
+        return await self.session(attrs, 'dot1x_wired_pap')
 
 
     async def mab_wired(self, calling:str=None, called:str=None, nas_port_id=None, attributes:dict=None):
@@ -1240,7 +5015,7 @@ class RADNAD:
         if attributes and len(attributes) > 0:
             attrs.update(attributes)
 
-        return await self.session(attrs)
+        return await self.session(attrs, 'mab_wired')
 
 
     async def dot1x_wireless_pap(self, username:str=None, password:str=None, calling:str=None, called:str=None, nas_port_id=None, attributes:dict=None):
@@ -1277,7 +5052,7 @@ class RADNAD:
         if attributes and len(attributes) > 0:
             attrs.update(attributes) # override defaults
 
-        return await self.session(attrs)
+        return await self.session(attrs, 'dot1x_wireless_pap')
 
 
     async def mab_wireless(self, calling:str=None, called:str=None, attributes:dict=None, nas_port_id=None, ssid:str=None):
@@ -1350,7 +5125,7 @@ class RADNAD:
         if attributes and len(attributes) > 0:
             attrs.update(attributes) # override defaults
 
-        return await self.session(attrs)
+        return await self.session(attrs, 'mab_wireless')
 
 
     async def vpn(self, username:str=None, password:str=None, calling:str=None, called:str=None, nas_port_id=None, attributes:dict=None):
@@ -1478,7 +5253,7 @@ class RADNAD:
         if attributes and len(attributes) > 0:
             attrs.update(attributes) # override defaults
 
-        return await self.session(attrs)
+        return await self.session(attrs, 'vpn')
 
 
     async def web_auth () :
@@ -1497,16 +5272,16 @@ class RADNAD:
     #
 
 
-    def get_sessions_by_id(self, id:int=0):
+    def get_sessions_by_id(self, id:int=0, file=None):
         """
         Return the session with the specified id or None if there is no such session id.
         :param id (int) : a session identifier
+        :param file (file) : where the session is shown. Default: stdout
         """
         if id is None: return None
-        # self.show_sessions()
-        print(f"get_sessions_by_id(id={id}):\n{self.sessions['Acct-Session-Id']}")
-        session_to_stop = self.sessions[self.sessions['Acct-Session-Id'] == id]
-        print(f"get_sessions_by_id(id={id}) [{len(session_to_stop)}]:\n{session_to_stop}")
+        record = self.sessions.get(id) if self.database is None else self.database.get(id)
+        session_to_stop = self.sessions.to_dataframe([] if record is None else [record])
+        print(f"get_sessions_by_id(id={id}) [{len(session_to_stop)}]:\n{session_to_stop}", file=file)
         return session_to_stop
 
 
@@ -1519,7 +5294,7 @@ class RADNAD:
         #     print(f"filter: {conditions}")
         #     return self.sessions.loc[conditions]
         # else:
-        return self.sessions.copy()
+        return self.sessions.to_dataframe()
 
 
     def get_session_count(self):
@@ -1530,6 +5305,17 @@ class RADNAD:
         return len(self.sessions)
 
 
+    def get_session_value(self, session_id=None, column:str='Server') -> str:
+        """
+        Returns the column value of the session, like the RADIUS server address that started it, or None if it is unknown.
+        :param session_id (str) : the Acct-Session-Id of the session
+        :param column (str) : the session column. Default: 'Server'
+        """
+        record = self.sessions.get(session_id)
+        value = None if record is None else record.get(column)
+        return value if value != '' else None # '' for sessions saved before the column was added
+
+
     def get_sessions_by_status(self, status:str=None):
         """
         Return the DataFrame of sessions, loading from persistence, if necessary.
@@ -1537,7 +5323,7 @@ class RADNAD:
         """
         if not status in [self.ACCT_START,self.ACCT_STOP]: raise ValueError(f"Invalid status: {status}")
         log.debug(f"▷ RADNAD.get_sessions_by_status(status={status})")
-        return self.sessions[self.sessions['Status'] == status]
+        return self.sessions.to_dataframe([record for record in self.sessions if record.status == status])
 
 
     async def create_session(self, response:RADIUSResponse=None):
@@ -1549,92 +5335,367 @@ class RADNAD:
         if response.rsp_type != RADIUSResponse.ACCOUNTING_RESPONSE: raise ValueError(f"RADIUS Response Type {response.rsp_type} is not {RADIUSResponse.ACCOUNTING_RESPONSE}")
 
         # 🚧 ToDo: Check for an existing session and update it!
-        # Create a dictionary to map RADIUSResponse to SESSION_COLUMNS in DataFrame
+        # Create a dictionary to map RADIUSResponse to SESSION_COLUMNS
         row = {
-            'Timestamp'          : datetime.datetime.fromtimestamp(response.timestamp, tz=None).isoformat(sep=" ", timespec="milliseconds"),
+            'Timestamp'          : response.timestamp,
             'Method'             : response.guess_access_method(),
             'Status'             : response.req_attrs.pop('Acct-Status-Type', self.ACCT_START),
             'User-Name'          : response.req_attrs.pop('User-Name', ''),
             'Calling-Station-Id' : response.req_attrs.pop('Calling-Station-Id', ''),
             'Framed-IP-Address'  : response.req_attrs.pop('Framed-IP-Address', ''),
-            'Session-Timeout'    : response.req_attrs.pop('Session-Timeout', self.SESSION_TIMEOUT),
+            'Session-Timeout'    : int(response.req_attrs.pop('Session-Timeout', self.SESSION_TIMEOUT)),
             'Acct-Session-Id'    : response.req_attrs.pop('Acct-Session-Id', ''),
             'Called-Station-Id'  : response.req_attrs.pop('Called-Station-Id', ''),
             'NAS-Port-Type'      : response.req_attrs.pop('NAS-Port-Type', ''),
             'NAS-Port-Id'        : response.req_attrs.pop('NAS-Port-Id', ''),
             'NAS-Port'           : response.req_attrs.pop('NAS-Port', ''),
             'NAS-Identifier'     : response.req_attrs.pop('NAS-Identifier', ''),
+            'NAS-IP-Address'     : response.req_attrs.pop('NAS-IP-Address', ''),
+            'Server'             : response.srv_ip,
             'Class'              : response.req_attrs.pop('Class', ''),
             'Other'              : RADNAD.to_avp_string(response.req_attrs), # Append any remaining attribute-value-pairs into 'Other' for reference
         }
-        new = pd.DataFrame([row]).set_index(['Timestamp'])
-        self.sessions = pd.concat([self.sessions, new], axis='index')
-        self.sessions.index = pd.to_datetime(self.sessions.index) # 💡 fix index after concat
+        record = self.sessions.add(row)
+        if self.database is not None: self.database.insert(record, self.expiry_time(record))
+        if self.journal is not None: self.journal.start(record)
+        self.schedule_sessions([record])
 
 
-    def show_sessions(self, sessions:pd.DataFrame=None):
+    def show_sessions(self, sessions:'pd.DataFrame'=None, file=None):
         """
         Show the specified sessions in a table or all of the RADNAD's sessions.
         :param sessions (pandas.DataFrame) : filter sessions by the status: ['started','stopped','expired']
+        :param file (file) : where the table is shown. Default: stdout
         """
-        sessions = self.sessions.copy() if sessions is None else sessions
+        if sessions is None and isinstance(self.sessions, SessionSnapshot): # 💡 page through the memory-mapped sessions by Duration
+            log.info(f"show_sessions(): {len(self.sessions)}")
+            rows = np.argsort(-self.sessions.columns['Timestamp'], kind='stable')
+            for page,sessions in enumerate(self.sessions.pages(rows=rows)):
+                sessions['Duration'] = (datetime.datetime.now(tz=None) - sessions.index).seconds
+                if page == 0: print("All Sessions by Duration", file=file)
+                print(sessions.drop(columns=RADNAD.HIDE_COLUMNS).infer_objects(copy=False).reset_index().to_string(index=False), file=file)
+            return
+
+        sessions = self.sessions.to_dataframe() if sessions is None else sessions
         log.info(f"show_sessions(): {len(sessions)}")
         if len(sessions) <= 0: return
 
         # Calculate Session Duration
         if len(sessions) > 0:
             sessions['Duration'] = (datetime.datetime.now(tz=None) - sessions.index).seconds
-            print(f"All Sessions by Duration\n{sessions.sort_values(by=['Duration']).drop(columns=RADNAD.HIDE_COLUMNS).infer_objects(copy=False).reset_index().to_string(index=False)}")
+            print(f"All Sessions by Duration\n{sessions.sort_values(by=['Duration']).drop(columns=RADNAD.HIDE_COLUMNS).infer_objects(copy=False).reset_index().to_string(index=False)}", file=file)
             log.info(f"▷ RADNAD.show_sessions(): {len(self.sessions)} sessions")
 
 
-    async def stop_expired_sessions(self) -> [RADIUSResponse]:
+    async def stop_sessions(self, sessions=None, concurrency:int=STOP_CONCURRENCY_DEFAULT, scenario:str='acct_stop') -> dict:
+        """
+        Stop the sessions with `concurrency` Accounting Stops at a time, each to the server that started the session,
+        and remove the stopped sessions from the sessions.
+        Returns a dictionary of `Acct-Session-Id` : RADIUSResponse (or TimeoutError or other exception) for every session.
+        :param sessions (pandas.DataFrame or iterable of SessionRecord) : the sessions to stop, like from `get_sessions()` or `sessions.sample()`
+        :param concurrency (int) : the maximum number of Accounting Stops awaiting a reply. Default: `STOP_CONCURRENCY_DEFAULT`
+        :param scenario (str) : the scenario for the latency histograms. Default: 'acct_stop'
+        """
+        if concurrency < 1: raise ValueError(f"Invalid concurrency: {concurrency}")
+        if pd.loaded() and isinstance(sessions, pd.DataFrame): # 💡 only a loaded pandas may have made a DataFrame
+            store = SessionStore()
+            store.load_dataframe(sessions)
+            sessions = list(store)
+        else:
+            sessions = list(sessions) # a tuple or generator of sessions
+        log.debug(f"▷ RADNAD.stop_sessions(sessions:[{len(sessions)}], concurrency:{concurrency})")
+        if len(sessions) == 0: return {}
+        now = time.time()
+        stops = []
+        for session in sessions:
+            # The minimum attributes required by ISE for an Accounting Stop are:
+            # - User-Name           # Does not like MAC for MAB
+            # - Calling-Station-Id
+            # - Acct-Status-Type    # Must be 'Stop'
+            # - Acct-Session-Id     # May be anything but must include something
+            attrs = MultiDict({
+                'Acct-Status-Type' : self.ACCT_STOP,
+                'Acct-Session-Id' : session['Acct-Session-Id'],
+                'User-Name' : session['User-Name'],
+                'Calling-Station-Id' : session['Calling-Station-Id'],
+                'Acct-Session-Time' : max(0, int(now - session.timestamp)),
+            })
+            if self.sources and session.nas_ip_address: attrs['NAS-IP-Address'] = session.nas_ip_address
+            if self.interim is not None:
+                for name,value in self.interim.counters(session['Acct-Session-Id'], now).items(): attrs.setdefault(name, value) # final counters
+            stops.append((str(session['Acct-Session-Id']), attrs, self.servers.get(session.server or None)))
+
+        results = {}
+        pending = iter(stops) # 💡 shared by the workers so only `concurrency` requests are outstanding
+        async def worker():
+            for sid,attrs,server in pending:
+                try:
+                    results[sid] = await self._request('acct', attrs, server, scenario)
+                except Exception as e:
+                    results[sid] = e
+        await asyncio.gather(*[worker() for _ in range(min(concurrency, len(stops)))])
+
+        stopped = {sid for sid,result in results.items() if isinstance(result, RADIUSResponse) and result.is_accepted()}
+        for sid in stopped:
+            self.remove_session(sid)
+        return {sid:results[sid] for sid,_attrs,_server in stops}
+
+
+    async def stop_expired_sessions(self, concurrency:int=STOP_CONCURRENCY_DEFAULT) -> [RADIUSResponse]:
         """
-        Stop all expired sessions and return the stopped sessions' `RADIUSResponse`s.
-        return: ([RADIUSResponse]) : a list of RADIUSResponse or an empty list if there are none.
+        Stop all expired sessions with `stop_sessions()` and return the stopped sessions' `RADIUSResponse`s.
+        Only the sessions due in the `expiry` heap are looked up so a run without expired sessions does not scan the sessions.
+        :param concurrency (int) : the maximum number of Accounting Stops awaiting a reply. Default: `STOP_CONCURRENCY_DEFAULT`
+        return: ([RADIUSResponse]) : a list of RADIUSResponse (or TimeoutError) or an empty list if there are none.
         """
+        now = time.time()
+        if self.database is not None:
+            sids = self.database.expired(now)
+        elif self.store == self.STORE_COLUMNAR:
+            sids = self.sessions.expired(now, self.EXPIRY_DROP)
+        else:
+            sids = self.expiry.due(now)
+        if len(sids) == 0: return [] # No sessions to stop
+        expired = [record for record in map(self.sessions.get, sids) if record is not None]
+        if len(expired) == 0: return []
 
         # Drop any sessions with a Duration > 4 days because ISE has already cleared them
-        four_day_expiration = datetime.datetime.now(tz=None) - datetime.timedelta(days=4)
-        df_expired = self.sessions.loc[self.sessions.index < four_day_expiration]
-        if len(df_expired) > 0:
-            self.sessions = self.sessions.drop(self.sessions[self.sessions['Acct-Session-Id'].isin(df_expired['Acct-Session-Id'].to_list())].index)
-            log.debug(f"{self.ICONS['INFO']} Dropped {len(df_expired)} sessions > 4 days old\n{df_expired.drop(columns=RADNAD.HIDE_COLUMNS).infer_objects(copy=False).reset_index().to_string(index=False)}")
-
-        if len(self.sessions) <= 0: return [] # No sessions to stop
+        dropped = [record for record in expired if now - record.timestamp >= self.EXPIRY_DROP]
+        if len(dropped) > 0:
+            for record in dropped:
+                self.remove_session(record.acct_session_id)
+            log.debug(f"{self.ICONS['INFO']} Dropped {len(dropped)} sessions > 4 days old\n{self.sessions.to_dataframe(dropped).drop(columns=RADNAD.HIDE_COLUMNS).infer_objects(copy=False).reset_index().to_string(index=False)}")
 
         # Stop any session with a duration beyond the Session-Timeout
         responses = []
-        session_expired_condition = (datetime.datetime.now(tz=None) - self.sessions.index).seconds > self.sessions['Session-Timeout']
-        df_expired = self.sessions.loc[session_expired_condition]
-        if len(df_expired) > 0:
-            log.info(f"{self.ICONS['INFO']} Expiring {len(df_expired)} sessions ...\n{df_expired.drop(columns=RADNAD.HIDE_COLUMNS).infer_objects(copy=False).reset_index().to_string(index=False)}")
-            for idx,session in df_expired.iterrows():
-                # log.info(f"expired session: {type(session)} {session}")
-                attrs = {
-                    'Acct-Status-Type' : 'Stop',
-                    'Acct-Session-Id' : session['Acct-Session-Id'],
-                    'User-Name' : session['User-Name'],
-                    'Calling-Station-Id' : session['Calling-Station-Id'],
-                }
-
-                # Perform the RADIUS Accounting Stop and remove the session from table if successful
-                response = await self.acct_stop_by_attrs(attrs)
-                responses.append(response)
+        expired = [record for record in expired if now - record.timestamp < self.EXPIRY_DROP]
+        if len(expired) > 0:
+            log.info(f"{self.ICONS['INFO']} Expiring {len(expired)} sessions ...\n{self.sessions.to_dataframe(expired).drop(columns=RADNAD.HIDE_COLUMNS).infer_objects(copy=False).reset_index().to_string(index=False)}")
+            # Perform the RADIUS Accounting Stops and remove the sessions from table if successful
+            results = await self.stop_sessions(expired, concurrency)
+            stopped = time.time()
+            timeouts = {str(record.acct_session_id): record.timestamp + record.session_timeout for record in expired}
+            for sid,result in results.items():
+                if isinstance(result, RADIUSResponse) and result.is_accepted():
+                    self.expiry_lag.record(stopped - timeouts[sid]) # 💡 a failed Stop is recorded when its retry is accepted
+                    continue
+                if self.database is not None: # 💡 not stopped, try again later
+                    self.database.reschedule(sid, time.time() + self.EXPIRY_RETRY)
+                elif self.store == self.STORE_COLUMNAR: # 💡 the columnar scan skips it until then
+                    self.sessions.retry(sid, time.time() + self.EXPIRY_RETRY)
+                else:
+                    self.expiry.add(sid, time.time() + self.EXPIRY_RETRY)
+            responses = list(results.values())
 
             log.info(f"{self.ICONS['INFO']} Expired {len(responses)} sessions")
 
         return responses
 
 
+async def radnad_load(config:dict=None, worker:int=0, workers:int=1) -> dict:
+    """
+    Runs a `load` worker's share of the sessions with its own RADNAD and returns its counters and latency histograms.
+    Each worker has a disjoint Acct-Session-Id range, its own sessions file and slice of the endpoints and sources.
+
+    Without a `rate`, `concurrency` sessions run at a time (closed loop) and each latency starts when its session is sent.
+    With a `rate`, sessions start on a constant or Poisson timetable for `duration` seconds however many are outstanding (open loop)
+    and each latency starts at its scheduled time, so a slow server is not hidden by sending less (coordinated omission).
+    The latencies include the sessions that time out or fail.
+
+    :param config (dict) : the `load` options: name, server, secret, transport, store, persistence, policy, hedge, sources, number, endpoints, concurrency,
+        rate, duration, arrival, mix, username, password
+    :param worker (int) : the worker number, 0 to workers-1
+    :param workers (int) : the total number of workers
+    """
+    log.debug(f"▷ radnad_load(worker:{worker}, workers:{workers})")
+    rate = config['rate'] / workers if config['rate'] else None # 💡 the workers' arrivals add up to the rate
+    total = round(config['rate'] * config['duration']) if rate else config['number']
+    number = total // workers + (1 if worker < total % workers else 0)
+    first = config['endpoints'] * worker // workers  # 💡 contiguous endpoint slice
+    endpoints = max(1, config['endpoints'] * (worker + 1) // workers - first)
+    sources = config['sources'][worker::workers] or config['sources'] if config['sources'] else None
+    sessions_file = RADNAD.SESSIONS_FILENAME if workers == 1 else f"{os.path.splitext(RADNAD.SESSIONS_FILENAME)[0]}.{worker}.csv"
+    scenarios = list(config['mix'].keys())
+    weights = list(config['mix'].values())
+
+    radnad = RADNAD(name=config['name'], server=config['server'], secret=config['secret'], transport=config['transport'], policy=config['policy'], hedge=config['hedge'],
+                    sources=sources, sessions_file=sessions_file, session_id_start=worker * RADNAD.LOAD_SESSION_ID_RANGE, store=config['store'], persistence=config['persistence'], snapshot=config['snapshot'])
+    semaphore = asyncio.Semaphore(config['concurrency'])
+    outcomes = collections.Counter()
+    latency = LatencyHistogram() # session latencies
+
+    async def scenario(n:int=0) -> RADIUSResponse:
+        index = first + n % endpoints
+        name = random.choices(scenarios, weights=weights)[0]
+        username = config['username'] or f"user{index}"
+        password = config['password'] or RADNAD.LOAD_PASSWORD_DEFAULT
+        nas_port_id = f"GigabitEthernet1/{random.randrange(1,48)}"
+        if name == 'dot1x':
+            return await radnad.dot1x_wired_pap(username, password, RADNAD.generate_mac(index=index), nas_port_id=nas_port_id)
+        if name == 'dot1x-wireless':
+            return await radnad.dot1x_wireless_pap(username, password, RADNAD.generate_mac(index=index), RADNAD.generate_mac() + ':corp')
+        if name == 'mab-wireless':
+            return await radnad.mab_wireless(RADNAD.generate_mac(index=index), RADNAD.generate_mac(), ssid='iot')
+        if name == 'vpn':
+            return await radnad.vpn(username, password, RADNAD.generate_ip_address(), RADNAD.generate_ip_address())
+        return await radnad.mab_wired(RADNAD.generate_mac(index=index), nas_port_id=nas_port_id)
+
+    async def session(n:int=0, scheduled:float=None):
+        start = time.perf_counter() if scheduled is None else scheduled
+        try:
+            response = await scenario(n)
+            outcomes[response.rsp_type] += 1
+        except (TimeoutError, asyncio.TimeoutError):
+            outcomes['Timeout'] += 1
+        except Exception as e:
+            outcomes['Error'] += 1
+            log.error(f"{RADNAD.ICONS['ERROR']} radnad_load(worker:{worker}): {e.__class__} {e}")
+        latency.record(time.perf_counter() - start) # 💡 timeouts and errors too: leaving out the slowest sessions hides them again
+
+    async def closed(n:int=0):
+        async with semaphore:
+            await session(n)
+
+    lag = 0.0 # the latest start after the scheduled time, in seconds
+    start = time.perf_counter()
+    try:
+        if rate is None:
+            await asyncio.gather(*[closed(n) for n in range(number)])
+        else:
+            tasks = set()
+            scheduled = start + (worker / config['rate'] if config['arrival'] == 'constant' else 0) # 💡 interleave the workers' timetables
+            for n in range(number):
+                scheduled += random.expovariate(rate) if config['arrival'] == 'poisson' else (1 / rate if n > 0 else 0)
+                delay = scheduled - time.perf_counter()
+                if delay > 0: await asyncio.sleep(delay)
+                lag = max(lag, time.perf_counter() - scheduled)
+                task = asyncio.create_task(session(n, scheduled)) # 💡 never wait for outstanding sessions
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+    finally:
+        radnad.close()
+    return {
+        'worker': worker,
+        'sessions': number,
+        'elapsed': time.perf_counter() - start,
+        'rate': rate,
+        'lag': lag,
+        'outcomes': dict(outcomes),
+        'latency': latency,
+        'histograms': radnad.latency, # request latencies by scenario, request type and outcome
+        'retries': radnad.retry_stats(),
+    }
+
+
+def radnad_load_worker(config:dict=None, worker:int=0, workers:int=1) -> dict:
+    """
+    Runs `radnad_load()` in its own event loop in a worker process.
+    """
+    return asyncio.run(radnad_load(config, worker, workers))
+
+
+async def radnad_load_report(config:dict=None, workers:int=1, stats:bool=False) -> list:
+    """
+    Runs the `load` sessions in `workers` processes, prints one report of all workers and returns the worker results.
+    A single worker runs in this process.
+
+    :param config (dict) : the `load` options. See `radnad_load()`.
+    :param workers (int) : the number of worker processes
+    :param stats (bool) : also print the request latencies of all workers by scenario, request type and outcome
+    """
+    log.debug(f"▷ radnad_load_report(workers:{workers})")
+    if workers == 1:
+        results = [await radnad_load(config)]
+    else:
+        # 💡 spawn, not fork, a clean interpreter without this event loop
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            loop = asyncio.get_running_loop()
+            results = await asyncio.gather(*[loop.run_in_executor(pool, radnad_load_worker, config, worker, workers) for worker in range(workers)])
+
+    def row(name:str=None, results:list=None) -> list:
+        latency = LatencyHistogram()
+        for result in results: latency.merge(result['latency'])
+        outcomes = collections.Counter()
+        for result in results: outcomes.update(result['outcomes'])
+        elapsed = max(result['elapsed'] for result in results)
+        sessions = sum(result['sessions'] for result in results)
+        rate = sum(result['rate'] for result in results) if results[0]['rate'] else None
+        percentile = lambda p: f"{1000 * latency.percentile(p):0.1f}" if latency.count else '-'
+        return [name, sessions, outcomes[RADIUSResponse.ACCOUNTING_RESPONSE], outcomes[RADIUSResponse.ACCESS_REJECT], outcomes['Timeout'], outcomes['Error'],
+                sum(result['retries']['retries'] for result in results), f"{elapsed:0.2f}", '-' if rate is None else f"{rate:0.1f}",
+                f"{sessions / elapsed:0.1f}" if elapsed > 0 else '-', '-' if rate is None else f"{1000 * max(result['lag'] for result in results):0.1f}",
+                percentile(0.50), percentile(0.95), percentile(0.99), percentile(0.999)]
+
+    headers = ['Worker', 'Sessions', 'Started', 'Rejected', 'Timeout', 'Error', 'Retries', 'Seconds', 'Target/s', 'Sessions/s', 'Lag ms', 'p50 ms', 'p95 ms', 'p99 ms', 'p99.9 ms']
+    rows = [row(str(result['worker']), [result]) for result in results] if workers > 1 else []
+    rows.append(row('Total', results))
+    print(tabulate.tabulate(rows, headers=headers, tablefmt="simple"))
+    if stats:
+        histograms = {}
+        for result in results:
+            for key,histogram in result['histograms'].items():
+                histograms.setdefault(key, LatencyHistogram()).merge(histogram)
+        print(tabulate.tabulate(LatencyHistogram.report(histograms), headers='keys', tablefmt="simple", floatfmt='0.1f'))
+    return results
+
+
+async def radnad_command(radnad:RADNAD=None, command:dict=None, out=None, err=None) -> None:
+    """
+    Run a `radnad.py` session command with the RADNAD: list the sessions, stop sessions or authenticate a session.
+    The CLI and the `serve` daemon share it, so a thin client shows the same output.
+    :param radnad (RADNAD) : the RADNAD
+    :param command (dict) : the `scenario` and its `calling`, `called`, `username`, `password`, `nas_port_id`, `sid`, `concurrency` and `verbosity`
+    :param out (file) : where the sessions are shown. Default: stdout
+    :param err (file) : where the progress is shown. Default: stderr
+    """
+    err = sys.stderr if err is None else err
+    scenario = command['scenario']
+    verbosity = command.get('verbosity', 0)
+    if scenario == 'sessions':
+        if verbosity: print(f"{RADNAD.ICONS['INFO']} List active sessions", file=err)
+        radnad.show_sessions(file=out)
+
+    elif scenario == 'stop':
+        if verbosity: print(f"{RADNAD.ICONS['INFO']} Stop active sessions", file=err)
+        # Filter sessions by Session-ID?
+        sid = command.get('sid', None)
+        sessions = list(radnad.sessions) if sid is None else radnad.get_sessions_by_id(int(sid), file=out)
+        results = await radnad.stop_sessions(sessions, concurrency=command.get('concurrency', RADNAD.STOP_CONCURRENCY_DEFAULT))
+        if verbosity:
+            for sid,result in results.items():
+                icon = RADNAD.ICONS['STOP'] if isinstance(result, RADIUSResponse) and result.is_accepted() else RADNAD.ICONS['FAIL']
+                print(f"{icon} Stopped Session: {sid} {result if isinstance(result, Exception) else ''}", file=err)
+
+    else:
+        calling, called = command.get('calling', None), command.get('called', None)
+        username, password = command.get('username', None), command.get('password', None)
+        nas_port_id = command.get('nas_port_id', None)
+        attributes = None
+        if scenario in ['dot1x', 'dot1x-wired', 'wired']:
+            response= await radnad.dot1x_wired_pap(username, password, calling, called, nas_port_id=nas_port_id, attributes=None)
+        elif scenario in ['wireless', 'dot1x-wireless', 'wireless-dot1x']:
+            response= await radnad.dot1x_wireless_pap(username, password, calling, called, attributes=None)
+        elif scenario in ['mab', 'mab-wired', 'wired-mab']:
+            response= await radnad.mab_wired(calling, called, nas_port_id=nas_port_id, attributes=None)
+        elif scenario in ['mab-wireless', 'wireless-mab']:
+            response= await radnad.mab_wireless(calling, called, attributes)
+        elif scenario == 'vpn':
+            response= await radnad.vpn(username, password, calling, called, attributes)
+        else:
+            raise ValueError(f"Unknown scenario: {scenario}")
+
+        if response is not None: radnad.show_sessions(file=out)
+
+
 async def radnad_cli() :
     """
     Parse the command line arguments
     """
-    SCENARIOS = ['dot1x', 'dot1x-wired', 'wired-dot1x', 'dot1x-wireless', 'wireless-dot1x', 'mab', 'mab-wired','wired-mab', 'mab-wireless', 'wireless-mab', 'vpn', 'sessions', 'stop', 'random']
+    SCENARIOS = ['dot1x', 'dot1x-wired', 'wired-dot1x', 'dot1x-wireless', 'wireless-dot1x', 'mab', 'mab-wired','wired-mab', 'mab-wireless', 'wireless-mab', 'vpn', 'sessions', 'stop', 'random', 'serve', 'load']
 
     argp = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter) # keep my format
-    # argp.add_argument('-n','--number', default=0, type=int, help='the number of auths to perform', required=False)
+    argp.add_argument('-n','--number', default=100, type=int, help='the number of sessions to create with a closed-loop `load`', required=False)
     argp.add_argument('scenario', choices=SCENARIOS, default='dot1x', help='authentication scenario')
     argp.add_argument('-i','--id', default=RADNAD.NAS_IDENTIFIER_DEFAULT, help='NAS Identifier', required=False)
     argp.add_argument('-m','--calling', default=RADNAD.generate_mac(), help='endpoint address (MAC)', required=False)
@@ -1643,6 +5704,24 @@ async def radnad_cli() :
     argp.add_argument('-p','--password', default=None, help='password', required=False)
     argp.add_argument('-s','--sid', default=None, help='session ID', required=False)
     argp.add_argument('-t','--timer', action='store_true', default=False, help='time', required=False)
+    argp.add_argument('--transport', choices=RADNAD.TRANSPORTS, default=RADNAD.TRANSPORT_DEFAULT, help='request transport', required=False)
+    argp.add_argument('--store', choices=RADNAD.STORES, default=RADNAD.STORE_DEFAULT, help='in-memory session store; columnar for millions of sessions', required=False)
+    argp.add_argument('--persistence', choices=RADNAD.PERSISTENCES, default=RADNAD.PERSISTENCE_DEFAULT, help='how the sessions are saved; sqlite writes each Start and Stop', required=False)
+    argp.add_argument('--snapshot', choices=RADNAD.SNAPSHOTS, default=RADNAD.SNAPSHOT_DEFAULT, help='sessions file format; binary is memory-mapped by `sessions`', required=False)
+    argp.add_argument('--policy', choices=ServerPool.POLICIES, default=ServerPool.POLICY_DEFAULT, help='server selection policy when ISE_PSN is a comma-separated list', required=False)
+    argp.add_argument('--hedge', action='store_true', default=False, help='hedge slow authentications to a second PSN', required=False)
+    argp.add_argument('--sources', default=None, help='local source address or CIDR of the simulated NADs (udp transport)', required=False)
+    argp.add_argument('--workers', default=1, type=int, help='`load` worker processes', required=False)
+    argp.add_argument('--endpoints', default=0, type=int, help='`load` endpoint (MAC) population, shared by the workers. Default: number', required=False)
+    argp.add_argument('--concurrency', default=None, type=int, help=f"`load` concurrent sessions per worker or concurrent `stop` requests. Default: {RADNAD.LOAD_CONCURRENCY_DEFAULT} for `load`, {RADNAD.STOP_CONCURRENCY_DEFAULT} for `stop`", required=False)
+    argp.add_argument('--rate', default=0, type=lambda rate: float(rate.removesuffix('/s')), help='open-loop `load` sessions per second (`100` or `100/s`) instead of --number and --concurrency', required=False)
+    argp.add_argument('--duration', default=RADNAD.LOAD_DURATION_DEFAULT, type=lambda duration: float(duration.removesuffix('s')), help='open-loop `load` seconds of arrivals', required=False)
+    argp.add_argument('--arrival', choices=RADNAD.LOAD_ARRIVALS, default=RADNAD.LOAD_ARRIVALS[0], help='open-loop `load` arrival schedule', required=False)
+    argp.add_argument('--mix', default=RADNAD.LOAD_MIX_DEFAULT, help=f"`load` scenario weights, like `dot1x:50,mab:30,vpn:20`, of {','.join(RADNAD.LOAD_SCENARIOS)}", required=False)
+    argp.add_argument('--stats', action='store_true', default=False, help='show the request latency percentiles by scenario and outcome', required=False)
+    argp.add_argument('--socket', default=RADNADDaemon.PATH_DEFAULT, help='Unix socket of the `serve` daemon, used by the other commands while it is running', required=False)
+    argp.add_argument('--local', action='store_true', default=False, help='run the command in this process even while a `serve` daemon is running', required=False)
+    argp.add_argument('--profile', choices=Profiler.MODES, default=None, help='profile the command in this process: cpu writes radnad.cpu.pstats and radnad.cpu.txt, mem writes radnad.mem.txt by phase. `load` workers are not profiled', required=False)
     argp.add_argument('-v','--verbosity', action='count', default=0, help='verbosity level', required=False)
     args = argp.parse_args()
 
@@ -1662,63 +5741,100 @@ async def radnad_cli() :
         print(f"{RADNAD.ICONS['INFO']} Verbosity: {args.verbosity} => LOG_LEVEL: {log_level}", file=sys.stderr)
 
     if args.timer: start_time = datetime.datetime.now(tz=None)  # timezone aware
+    profiler = Profiler(args.profile).start() if args.profile else None
 
     # Validate options
     nas_id = args.id
     scenario = args.scenario.strip().lower() # validated by argpase choices
-    scenario = random.choice(RADNAD.SCENARIOS[0:-1]) if scenario == 'random' else scenario # any but 'random'!
+    scenario = random.choice(SCENARIOS[0:-5]) if scenario == 'random' else scenario # any authentication scenario
     calling = RADNAD.generate_ip_address() if scenario.lower() == 'vpn' else args.calling
     called = args.called
     username = args.username
     password = args.password
+    concurrency = args.concurrency
+    if concurrency is None: concurrency = RADNAD.LOAD_CONCURRENCY_DEFAULT if scenario == 'load' else RADNAD.STOP_CONCURRENCY_DEFAULT # 💡 each command has its own default
     nas_port_id = f"GigabitEthernet1/{random.randrange(1,48)}" if scenario.lower() in ['dot1x', 'dot1x-wired', 'wired', 'mab', 'mab-wired', 'wired-mab'] else None
-    attributes = None
+
+    command = {'scenario': scenario, 'calling': calling, 'called': called, 'username': username, 'password': password, 'nas_port_id': nas_port_id,
+               'sid': args.sid, 'concurrency': concurrency, 'verbosity': args.verbosity, 'stats': args.stats}
+    if scenario not in ['serve', 'load'] and not args.local and not args.profile and os.path.exists(args.socket): # 💡 a thin client of the running `serve` daemon
+        try:
+            reply = RADNADDaemon.request(args.socket, command)
+            print(reply['stdout'], end='')
+            print(reply['stderr'], end='', file=sys.stderr)
+            if args.timer : print(f"⏲ {(datetime.datetime.now(tz=None).timestamp() - start_time.timestamp()):0.3f} seconds")
+            return
+        except (ConnectionRefusedError, FileNotFoundError):
+            log.warning(f"{RADNAD.ICONS['WARN']} No daemon on {args.socket}: running the command in this process")
+        except (PermissionError, TimeoutError, ConnectionError, ValueError) as e: # 💡 ValueError includes a JSONDecodeError of a truncated reply
+            print(f"{RADNAD.ICONS['FAIL']} {args.socket}: {e.__class__.__name__} {e}", file=sys.stderr)
+            return
 
     env = {k:v for (k,v) in os.environ.items()} # Load environment variables
+    radnad = None
     try:
-        radnad = RADNAD(name=nas_id, server=env.get('ISE_PSN', None), secret=env.get('ISE_RADIUS_SECRET', None))
-        await radnad.stop_expired_sessions()
-
-        if scenario == 'sessions':
-            if args.verbosity: print(f"{RADNAD.ICONS['INFO']} List active sessions", file=sys.stderr)
-            radnad.show_sessions()
-
-        elif scenario == 'stop':
-            if args.verbosity: print(f"{RADNAD.ICONS['INFO']} Stop active sessions", file=sys.stderr)
-            # Filter sessions by Session-ID?
-            sessions = radnad.get_sessions() if args.sid is None else radnad.get_sessions_by_id(int(args.sid))
-            for idx,session in sessions.iterrows():
-                if args.verbosity: print(f"{RADNAD.ICONS['INFO']} Expired Session: {session.to_list()}", file=sys.stderr)
-                attrs = {
-                    'Acct-Status-Type' : 'Stop',
-                    'Acct-Session-Id' : session['Acct-Session-Id'],
-                    'User-Name' : session['User-Name'],
-                    'Calling-Station-Id' : session['Calling-Station-Id'],
-                }
-                response = await radnad.acct_stop_by_attrs(attrs)
+        if scenario == 'serve' and RADNADDaemon.running(args.socket): raise ValueError(f"Invalid socket: a daemon is running on {args.socket}")
+        if profiler: profiler.phase('startup')
+        if scenario != 'load': # 💡 each load worker has its own RADNAD
+            radnad = RADNAD(name=nas_id, server=env.get('ISE_PSN', None), secret=env.get('ISE_RADIUS_SECRET', None), transport=args.transport, policy=args.policy, hedge=args.hedge, sources=args.sources,
+                            store=args.store, persistence=args.persistence, snapshot=args.snapshot, readonly=scenario == 'sessions')
+            if not radnad.readonly and scenario != 'serve': await radnad.stop_expired_sessions() # 💡 the daemon stops them as they expire
+            if profiler: profiler.phase('session load')
+
+        if scenario == 'load':
+            if args.workers < 1: raise ValueError(f"Invalid workers: {args.workers}")
+            if args.number < 1: raise ValueError(f"Invalid number: {args.number}")
+            if concurrency < 1: raise ValueError(f"Invalid concurrency: {concurrency}")
+            if args.rate < 0: raise ValueError(f"Invalid rate: {args.rate}")
+            if args.rate and args.duration <= 0: raise ValueError(f"Invalid duration: {args.duration}")
+            config = {
+                'name': nas_id,
+                'server': env.get('ISE_PSN', None),
+                'secret': env.get('ISE_RADIUS_SECRET', None),
+                'transport': args.transport,
+                'store': args.store,
+                'persistence': args.persistence,
+                'snapshot': args.snapshot,
+                'policy': args.policy,
+                'hedge': args.hedge,
+                'sources': RADNAD.parse_sources(args.sources) if args.sources else None,
+                'number': args.number,
+                'endpoints': (max(1, round(args.rate * args.duration)) if args.rate else args.number) if args.endpoints < 1 else args.endpoints,
+                'concurrency': concurrency,
+                'rate': args.rate,
+                'duration': args.duration,
+                'arrival': args.arrival,
+                'mix': RADNAD.parse_mix(args.mix),
+                'username': username,
+                'password': password,
+            }
+            if args.verbosity and args.rate: print(f"{RADNAD.ICONS['INFO']} Load {args.rate:g}/s {args.arrival} for {args.duration:g}s with {args.workers} workers", file=sys.stderr)
+            elif args.verbosity: print(f"{RADNAD.ICONS['INFO']} Load {args.number} sessions with {args.workers} workers", file=sys.stderr)
+            await radnad_load_report(config, args.workers, args.stats)
+
+        elif scenario == 'serve':
+            if args.verbosity: print(f"{RADNAD.ICONS['INFO']} Serve commands on {args.socket}", file=sys.stderr)
+            await RADNADDaemon(radnad, args.socket).run()
 
         else:
-            if scenario in ['dot1x', 'dot1x-wired', 'wired']:
-                response= await radnad.dot1x_wired_pap(username, password, calling, called, nas_port_id=nas_port_id, attributes=None)
-            elif scenario in ['wireless', 'dot1x-wireless', 'wireless-dot1x']:
-                response= await radnad.dot1x_wireless_pap(username, password, calling, called, attributes=None)
-            elif scenario in ['mab', 'mab-wired', 'wired-mab']:
-                response= await radnad.mab_wired(calling, called, nas_port_id=nas_port_id, attributes=None)
-            elif scenario in ['mab-wireless', 'wireless-mab']:
-                response= await radnad.mab_wireless(calling, called, attributes)
-            elif scenario == 'vpn':
-                response= await radnad.vpn(username, password, calling, called, attributes)
-            else:
-                sys.exit(f"Unknown scenario: {scenario}")
-
-            if response is not None: radnad.show_sessions()
+            await radnad_command(radnad, command)
+        if profiler: profiler.phase('steady state')
 
-    except TimeoutError as e:
+    except (TimeoutError, asyncio.TimeoutError) as e:
         log.error(f"No Reply. Timeout/Dropped:\n{e}")   # No content!
         print(f"✖ No Reply. Timeout/Dropped:\n{e}", file=sys.stderr)   # No content!
     except Exception as e:
         tb_text = '\n'.join(traceback.format_exc().splitlines()[1:]) # remove 'Traceback (most recent call last):'
         print(f"✖ {e.__class__} | {tb_text}", file=sys.stderr)
+    finally:
+        if radnad: radnad.close()
+
+    if args.stats and radnad and len(radnad.latency) > 0:
+        print(tabulate.tabulate(radnad.latency_report(), headers='keys', tablefmt="simple", floatfmt='0.1f'))
+
+    if profiler:
+        profiler.phase('shutdown')
+        print(f"{RADNAD.ICONS['INFO']} Profile: {', '.join(profiler.stop())}", file=sys.stderr)
 
     if args.timer : print(f"⏲ {(datetime.datetime.now(tz=None).timestamp() - start_time.timestamp()):0.3f} seconds")
 